@@ -0,0 +1,62 @@
+"""
+Compare the status line encoder with the previous `asdict`-based encoder.
+
+    uv run python benchmarks/encode.py [--repeat N]
+"""
+
+import argparse
+import timeit
+from collections.abc import Callable
+from dataclasses import asdict
+from json import JSONEncoder
+
+from swaystatus.block import Block
+from swaystatus.output import OutputEncoder
+
+SIZES = [10, 100, 1000]
+
+
+class AsdictEncoder(JSONEncoder):
+    """The encoder used before blocks could encode themselves."""
+
+    def default(self, o):
+        return {field: value for field, value in asdict(o).items() if value is not None}
+
+
+def sample_blocks(count: int) -> list[Block]:
+    return [
+        Block(
+            full_text=f" {i:03d}",
+            color="#ffffff",
+            name="clock",
+            instance=str(i),
+            separator=i % 2 == 0,
+            separator_block_width=9,
+        )
+        for i in range(count)
+    ]
+
+
+def seconds_per_call(function: Callable[[], object], repeat: int) -> float:
+    number, _ = timeit.Timer(function).autorange()
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs per measurement (default: %(default)s)")
+    args = parser.parse_args()
+
+    old_encoder = AsdictEncoder()
+    new_encoder = OutputEncoder()
+
+    print(f"{'blocks':>8} {'asdict (us)':>12} {'encode (us)':>12} {'speedup':>8}")
+    for size in SIZES:
+        blocks = sample_blocks(size)
+        old = seconds_per_call(lambda: old_encoder.encode(blocks), args.repeat)  # noqa: B023
+        new = seconds_per_call(lambda: new_encoder.encode_blocks(blocks), args.repeat)  # noqa: B023
+        print(f"{size:>8} {old * 1e6:>12.1f} {new * 1e6:>12.1f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
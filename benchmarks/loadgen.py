@@ -0,0 +1,361 @@
+"""
+Load test a running swaystatus by playing the part of swaybar.
+
+    uv run python benchmarks/loadgen.py [--elements N] [--click-rate HZ] [--duration SECONDS] [--output FILE]
+
+A swaystatus process is started with a generated configuration of elements
+that count their clicks and refreshes. Its status lines are read from stdout
+while it's sent click events (steady clicks, then bursts of scroll-wheel
+clicks) and signals (SIGUSR1, and SIGSTOP followed by SIGCONT), as swaybar
+would. The latency from each click or signal to the first status line
+reflecting it is reported, along with the status line throughput during
+each phase. Results can be saved as JSON with --output.
+"""
+
+import argparse
+import json
+import platform
+import signal
+import subprocess
+import sys
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Condition, Thread
+from typing import IO, Any
+
+ELEMENT_SOURCE = """\
+from swaystatus.element import BaseElement
+
+
+class Element(BaseElement):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.clicks = 0
+        self.refreshes = 0
+
+    def blocks(self):
+        self.refreshes += 1
+        yield self.block(f"{self.clicks} {self.refreshes}")
+
+    def on_click_1(self, click_event):
+        self.clicks += click_event.count
+        return True
+
+    on_click_4 = on_click_5 = on_click_1
+"""
+
+type Number = float | int
+
+
+@dataclass(slots=True)
+class Frame:
+    received: float
+    clicks: int
+    refreshes: int
+
+
+class Bar:
+    """The swaybar side of the protocol: status lines in, click events and signals out."""
+
+    def __init__(self, process: subprocess.Popen) -> None:
+        assert process.stdin and process.stdout
+        self.process = process
+        self.header: dict[str, Any] = {}
+        self.frames: list[Frame] = []
+        self._stdin = process.stdin
+        self._condition = Condition()
+        self._reader = Thread(target=self._read, args=(process.stdout,), name="ReaderThread", daemon=True)
+
+    def start(self, timeout: Number) -> None:
+        self._reader.start()
+        self._stdin.write("[\n")
+        self._stdin.flush()
+        if not self.wait_for(lambda frame: True, timeout):
+            raise RuntimeError("no status line received")
+
+    def _read(self, stdout: IO[str]) -> None:
+        self.header = json.loads(stdout.readline())
+        assert stdout.readline().strip() == "[[]"
+        for line in stdout:
+            blocks = json.loads(line.lstrip(","))
+            clicks, refreshes = map(int, blocks[0]["full_text"].split())
+            with self._condition:
+                self.frames.append(Frame(time.perf_counter(), clicks, refreshes))
+                self._condition.notify_all()
+
+    @property
+    def last(self) -> Frame:
+        with self._condition:
+            return self.frames[-1]
+
+    def wait_for(self, predicate: Callable[[Frame], bool], timeout: Number) -> Frame | None:
+        """Return the first status line satisfying a predicate, starting from the latest one."""
+        deadline = time.perf_counter() + timeout
+        with self._condition:
+            seen = max(len(self.frames) - 1, 0)
+            while True:
+                for frame in self.frames[seen:]:
+                    if predicate(frame):
+                        return frame
+                seen = len(self.frames)
+                if (remaining := deadline - time.perf_counter()) <= 0:
+                    return None
+                self._condition.wait(timeout=remaining)
+
+    def click(self, name: str, button: int = 1) -> None:
+        click_event = {
+            "name": name,
+            "instance": None,
+            "x": 1,
+            "y": 1,
+            "button": button,
+            "event": 272 if button == 1 else 768 + button,
+            "relative_x": 1,
+            "relative_y": 1,
+            "width": 10,
+            "height": 10,
+            "scale": 1.0,
+        }
+        self._stdin.write(f",{json.dumps(click_event)}\n")
+        self._stdin.flush()
+
+    def signal(self, signum: int) -> None:
+        self.process.send_signal(signum)
+
+    def frames_between(self, start: float, end: float) -> list[Frame]:
+        with self._condition:
+            return [frame for frame in self.frames if start <= frame.received < end]
+
+
+@dataclass(slots=True)
+class Result:
+    """Latencies (in milliseconds) from each request to the status line reflecting it."""
+
+    requests: int
+    answered: int
+    frames_per_second: float
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    max_ms: float
+
+    @classmethod
+    def summarize(cls, requests: int, latencies: list[float], frames: int, seconds: float) -> Result:
+        latencies = sorted(latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return float("nan")
+            return 1000 * latencies[min(int(p / 100 * len(latencies)), len(latencies) - 1)]
+
+        return cls(
+            requests=requests,
+            answered=len(latencies),
+            frames_per_second=frames / seconds if seconds else 0.0,
+            p50_ms=percentile(50),
+            p90_ms=percentile(90),
+            p99_ms=percentile(99),
+            max_ms=percentile(100),
+        )
+
+
+def clicks(bar: Bar, rate: Number, duration: Number, timeout: Number) -> Result:
+    """Click steadily at `rate` per second, measuring latency to the status line counting each click."""
+    base = bar.last.clicks
+    sent: list[float] = []
+    start = time.perf_counter()
+    while (now := time.perf_counter()) < start + duration:
+        bar.click("loadgen")
+        sent.append(now)
+        time.sleep(max(start + len(sent) / rate - time.perf_counter(), 0.0))
+    end = time.perf_counter()
+    return Result.summarize(
+        len(sent), click_latencies(bar, base, sent, timeout), len(bar.frames_between(start, end)), end - start
+    )
+
+
+def scroll_bursts(bar: Bar, size: int, count: int, pause: Number, timeout: Number) -> Result:
+    """Send bursts of scroll-wheel clicks, measuring latency to the status line counting each one."""
+    base = bar.last.clicks
+    sent: list[float] = []
+    start = time.perf_counter()
+    for i in range(count):
+        for j in range(size):
+            bar.click("loadgen", button=4 + (i + j) % 2)
+            sent.append(time.perf_counter())
+        time.sleep(pause)
+    end = time.perf_counter()
+    return Result.summarize(
+        len(sent), click_latencies(bar, base, sent, timeout), len(bar.frames_between(start, end)), end - start
+    )
+
+
+def click_latencies(bar: Bar, base: int, sent: list[float], timeout: Number) -> list[float]:
+    """Return the time from sending each click to the first status line counting it."""
+    bar.wait_for(lambda frame: frame.clicks >= base + len(sent), timeout)
+    frames = bar.frames_between(sent[0], float("inf")) if sent else []
+    latencies = []
+    for i, sent_at in enumerate(sent, start=base + 1):
+        if frame := next((f for f in frames if f.clicks >= i and f.received >= sent_at), None):
+            latencies.append(frame.received - sent_at)
+    return latencies
+
+
+def signals(bar: Bar, count: int, pause: Number, timeout: Number, stop: Number | None = None) -> Result:
+    """
+    Signal a refresh `count` times, measuring latency to the next refreshed status line.
+
+    If `stop` is set, the process is stopped for that many seconds before
+    being continued, like swaybar does when it's hidden, instead of being
+    sent SIGUSR1.
+    """
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(count):
+        refreshes = bar.last.refreshes
+        if stop is not None:
+            bar.signal(signal.SIGSTOP)
+            time.sleep(stop)
+            signum = signal.SIGCONT
+        else:
+            signum = signal.SIGUSR1
+
+        def refreshed(frame: Frame, refreshes: int = refreshes) -> bool:
+            return frame.refreshes > refreshes
+
+        sent_at = time.perf_counter()
+        bar.signal(signum)
+        if frame := bar.wait_for(refreshed, timeout):
+            latencies.append(frame.received - sent_at)
+        time.sleep(pause)
+    end = time.perf_counter()
+    return Result.summarize(count, latencies, len(bar.frames_between(start, end)), end - start)
+
+
+def write_config(directory: Path, args: argparse.Namespace) -> Path:
+    package_dir = directory / "modules"
+    package_dir.mkdir()
+    (package_dir / "__init__.py").touch()
+    (package_dir / "loadgen.py").write_text(ELEMENT_SOURCE)
+    lines = [
+        "interval = 3600",
+        "click_events = true",
+        f'engine = "{args.engine}"',
+        f'include = ["{package_dir}"]',
+    ]
+    if args.min_frame_interval:
+        lines.append(f"min_frame_interval = {args.min_frame_interval}")
+    if args.render_workers:
+        lines.append(f"render_workers = {args.render_workers}")
+    if args.coalesce:
+        lines.append(f"\n[settings.loadgen.coalesce]\n4 = {args.coalesce}\n5 = {args.coalesce}")
+    lines.append('\n[[modules]]\nname = "loadgen"')
+    for i in range(1, args.elements):
+        lines.append(f'\n[[modules]]\nname = "loadgen"\ninstance = "{i}"')
+    path = directory / "config.toml"
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+@contextmanager
+def swaystatus(config_file: Path, log_file: IO[str]) -> Iterator[subprocess.Popen]:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "swaystatus", "--config-file", str(config_file)],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=log_file,
+        text=True,
+    )
+    try:
+        yield process
+    finally:
+        process.send_signal(signal.SIGCONT)  # in case it was left stopped
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def run(args: argparse.Namespace) -> dict[str, Result]:
+    results = {}
+    with TemporaryDirectory() as temp_dir:
+        config_file = write_config(Path(temp_dir), args)
+        with open(Path(temp_dir) / "swaystatus.log", "w+") as log_file, swaystatus(config_file, log_file) as process:
+            bar = Bar(process)
+            try:
+                bar.start(args.timeout)
+            except RuntimeError:
+                log_file.seek(0)
+                sys.exit(f"swaystatus failed to start:\n{log_file.read()}")
+            phases: dict[str, Callable[[], Result]] = {
+                "click": lambda: clicks(bar, args.click_rate, args.duration, args.timeout),
+                "scroll": lambda: scroll_bursts(bar, args.burst, args.bursts, 0.1, args.timeout),
+                "sigusr1": lambda: signals(bar, args.signals, 0.05, args.timeout),
+                "sigcont": lambda: signals(bar, args.signals, 0.05, args.timeout, stop=0.05),
+            }
+            print(
+                f"{'phase':<10} {'requests':>9} {'answered':>9} {'frames/s':>10} "
+                f"{'p50 (ms)':>10} {'p90 (ms)':>10} {'p99 (ms)':>10} {'max (ms)':>10}"
+            )
+            for name, phase in phases.items():
+                result = results[name] = phase()
+                print(
+                    f"{name:<10} {result.requests:>9} {result.answered:>9} {result.frames_per_second:>10.1f} "
+                    f"{result.p50_ms:>10.2f} {result.p90_ms:>10.2f} {result.p99_ms:>10.2f} {result.max_ms:>10.2f}"
+                )
+            if process.poll() is not None:
+                log_file.seek(0)
+                sys.exit(f"swaystatus exited with status {process.returncode}:\n{log_file.read()}")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--elements", type=int, default=10, help="number of elements (default: %(default)s)")
+    parser.add_argument("--engine", choices=["threads", "asyncio"], default="threads", help="(default: %(default)s)")
+    parser.add_argument("--min-frame-interval", type=float, help="merge requests within this many seconds")
+    parser.add_argument("--render-workers", type=int, help="refresh elements concurrently with this many threads")
+    parser.add_argument("--coalesce", type=float, help="merge scroll clicks within this many seconds")
+    parser.add_argument("--click-rate", type=float, default=50.0, help="clicks per second (default: %(default)s)")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds of clicking (default: %(default)s)")
+    parser.add_argument("--burst", type=int, default=20, help="scroll clicks per burst (default: %(default)s)")
+    parser.add_argument("--bursts", type=int, default=10, help="number of scroll bursts (default: %(default)s)")
+    parser.add_argument("--signals", type=int, default=50, help="signals of each kind (default: %(default)s)")
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=5.0,
+        help="seconds to wait for a status line before giving up on it (default: %(default)s)",
+    )
+    parser.add_argument("--output", type=Path, metavar="FILE", help="save results as JSON")
+    args = parser.parse_args()
+
+    results = run(args)
+
+    if args.output:
+        args.output.write_text(
+            json.dumps(
+                {
+                    "created": datetime.now(UTC).isoformat(),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "options": {k: v for k, v in vars(args).items() if k != "output"},
+                    "results": {name: asdict(result) for name, result in results.items()},
+                },
+                indent=2,
+            )
+            + "\n"
+        )
+
+    if any(result.answered < result.requests for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
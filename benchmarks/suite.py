@@ -0,0 +1,309 @@
+"""
+Benchmark the hot paths of swaystatus with synthetic elements.
+
+    uv run python benchmarks/suite.py [--filter TEXT] [--time SECONDS] [--output FILE] [--compare FILE]
+
+Every benchmark runs at 10, 100 and 1000 elements (or blocks, modules, or events),
+and reports throughput and latency percentiles for a single call. Results
+can be saved as JSON with --output, and compared against previously saved
+results with --compare, which exits with a non-zero status if any benchmark
+got slower than --threshold percent.
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+from collections.abc import Callable, Iterator
+from datetime import UTC, datetime
+from json import JSONDecoder
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from swaystatus.block import Block
+from swaystatus.click_event import ClickEvent
+from swaystatus.element import BaseElement
+from swaystatus.input import InputParser, InputProcessor
+from swaystatus.logger import logger
+from swaystatus.modules import Registry
+from swaystatus.output import OutputEncoder, OutputProcessor
+
+SIZES = [10, 100, 1000]
+MIN_CALLS = 10
+
+type Setup = Callable[[int], Iterator[Callable[[], object]]]
+
+BENCHMARKS: dict[str, Setup] = {}
+
+
+def benchmark(name: str) -> Callable[[Setup], Setup]:
+    """Register a generator that yields the function to be timed for a size, and cleans up after."""
+
+    def register(setup: Setup) -> Setup:
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+class Element(BaseElement):
+    def __init__(self, *args, count: int = 1, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.count = count
+        self.ticks = itertools.count()
+
+    def blocks(self) -> Iterator[Block]:
+        tick = next(self.ticks)
+        for i in range(self.count):
+            yield Block(
+                full_text=f" {tick:06d}",
+                color="#ffffff",
+                name=self.name,
+                instance=str(i),
+                separator_block_width=9,
+            )
+
+
+def sample_blocks(count: int) -> list[Block]:
+    return list(Element("sample", count=count).blocks())
+
+
+@benchmark("render/elements")
+def render_elements(size: int) -> Iterator[Callable[[], object]]:
+    processor = OutputProcessor([Element(f"e{i}") for i in range(size)], False)
+
+    def render() -> object:
+        processor.refresh()
+        return processor.status_line()
+
+    yield render
+
+
+@benchmark("render/blocks")
+def render_blocks(size: int) -> Iterator[Callable[[], object]]:
+    processor = OutputProcessor([Element("sample", count=size)], False)
+
+    def render() -> object:
+        processor.refresh()
+        return processor.status_line()
+
+    yield render
+
+
+@benchmark("encode/blocks")
+def encode_blocks(size: int) -> Iterator[Callable[[], object]]:
+    encoder = OutputEncoder()
+    blocks = sample_blocks(size)
+    yield lambda: encoder.encode_blocks(blocks)
+
+
+@benchmark("frame/elements")
+def frame_elements(size: int) -> Iterator[Callable[[], object]]:
+    processor = OutputProcessor([Element(f"e{i}") for i in range(size)], False)
+
+    def frame() -> object:
+        processor.refresh()
+        processor.status_line()
+        return processor.encode_status_line()
+
+    yield frame
+
+
+@benchmark("click/elements")
+def click_elements(size: int) -> Iterator[Callable[[], object]]:
+    def handler(element: BaseElement, click_event: ClickEvent) -> None:
+        return None
+
+    elements = [BaseElement(f"e{i}", instance=str(i), on_click={1: handler}) for i in range(size)]
+    processor = InputProcessor(elements, lambda: None)
+    parser = InputParser()
+    data = f",{json.dumps(click_fields(elements[-1]))}\n".encode()
+
+    def click() -> None:
+        for fields in parser.feed(data):
+            routed = processor.route(fields)
+            assert routed
+            element, click_event = routed
+            element.on_click(click_event)
+
+    yield click
+
+
+def click_fields(element: BaseElement) -> dict[str, object]:
+    return {
+        "name": element.name,
+        "instance": element.instance,
+        "x": 1,
+        "y": 1,
+        "button": 1,
+        "event": 272,
+        "relative_x": 1,
+        "relative_y": 1,
+        "width": 10,
+        "height": 10,
+        "scale": 1.0,
+    }
+
+
+def click_flood(size: int) -> bytes:
+    """A chunk of `size` click events, half of them for elements that don't exist."""
+    lines = [f",{json.dumps(click_fields(BaseElement(f'e{i % 20}', instance=str(i))))}\n" for i in range(size)]
+    return "".join(lines).encode()
+
+
+@benchmark("parse/lines")
+def parse_lines(size: int) -> Iterator[Callable[[], object]]:
+    """The line-based decoding that the input parser replaced, as a baseline."""
+    elements = [BaseElement(f"e{i}", instance=str(i)) for i in range(10)]
+    lookup = {(e.name, e.instance): e for e in elements}
+    decoder = JSONDecoder(object_hook=lambda kwargs: ClickEvent(**kwargs))
+    data = click_flood(size)
+
+    def parse() -> object:
+        routed = []
+        for line in data.decode().splitlines():
+            click_event = decoder.decode(line.strip().lstrip(","))
+            if element := lookup.get((click_event.name, click_event.instance)):
+                routed.append((element, click_event))
+        return routed
+
+    yield parse
+
+
+@benchmark("parse/stream")
+def parse_stream(size: int) -> Iterator[Callable[[], object]]:
+    processor = InputProcessor([BaseElement(f"e{i}", instance=str(i)) for i in range(10)], lambda: None)
+    parser = InputParser()
+    data = click_flood(size)
+    logger.disabled = True  # unroutable events are logged
+
+    def parse() -> object:
+        return [routed for fields in parser.feed(data) if (routed := processor.route(fields))]
+
+    yield parse
+    logger.disabled = False
+
+
+@benchmark("registry/modules")
+def registry_modules(size: int) -> Iterator[Callable[[], object]]:
+    with TemporaryDirectory() as temp_dir:
+        package_dir = Path(temp_dir) / "modules"
+        package_dir.mkdir()
+        (package_dir / "__init__.py").touch()
+        source = "from swaystatus.element import BaseElement\n\nclass Element(BaseElement):\n    pass\n"
+        names = [f"module{i}" for i in range(size)]
+        for name in names:
+            (package_dir / f"{name}.py").write_text(source)
+        registry = Registry([package_dir])
+        for name in names:
+            registry.find(name)  # importing is a one-time cost
+        cycle = itertools.cycle(names)
+        yield lambda: registry.find(next(cycle))
+        for package in registry.packages:
+            for module in [m for m in sys.modules if m == package or m.startswith(f"{package}.")]:
+                del sys.modules[module]
+
+
+def measure(function: Callable[[], object], min_time: float) -> dict[str, float]:
+    """Time individual calls for at least `min_time` seconds and summarize them."""
+    function()  # warm up
+    clock = time.perf_counter_ns
+    samples: list[int] = []
+    end = clock() + min_time * 1e9
+    while len(samples) < MIN_CALLS or clock() < end:
+        start = clock()
+        function()
+        samples.append(clock() - start)
+    samples.sort()
+
+    def percentile(p: float) -> float:
+        return samples[min(int(p / 100 * len(samples)), len(samples) - 1)] / 1e3
+
+    return {
+        "calls": len(samples),
+        "ops_per_second": len(samples) / (sum(samples) / 1e9),
+        "p50_us": percentile(50),
+        "p90_us": percentile(90),
+        "p99_us": percentile(99),
+        "max_us": samples[-1] / 1e3,
+    }
+
+
+def run(pattern: str | None, min_time: float) -> dict[str, dict[str, float]]:
+    results = {}
+    print(f"{'benchmark':<24} {'ops/s':>12} {'p50 (us)':>10} {'p90 (us)':>10} {'p99 (us)':>10}")
+    for base_name, setup in BENCHMARKS.items():
+        for size in SIZES:
+            name = f"{base_name}/{size}"
+            if pattern and pattern not in name:
+                continue
+            setup_iterator = setup(size)
+            result = measure(next(setup_iterator), min_time)
+            next(setup_iterator, None)
+            results[name] = result
+            print(
+                f"{name:<24} {result['ops_per_second']:>12.1f} "
+                f"{result['p50_us']:>10.1f} {result['p90_us']:>10.1f} {result['p99_us']:>10.1f}"
+            )
+    return results
+
+
+def compare(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], threshold: float) -> bool:
+    """Print the change in median latency from the baseline, and return whether any regressed."""
+    regressed = False
+    print(f"\n{'benchmark':<24} {'base p50':>10} {'p50':>10} {'change':>8}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]["p50_us"], result["p50_us"]
+        change = (after - before) / before * 100 if before else 0.0
+        flag = ""
+        if change > threshold:
+            regressed = True
+            flag = "  slower"
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"{name:<24} {before:>10.1f} {after:>10.1f} {change:>+7.1f}%{flag}")
+    return regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--filter", metavar="TEXT", help="only run benchmarks whose name contains TEXT")
+    parser.add_argument("--time", type=float, default=0.5, help="seconds per benchmark (default: %(default)s)")
+    parser.add_argument("--output", type=Path, metavar="FILE", help="save results as JSON")
+    parser.add_argument("--compare", type=Path, metavar="FILE", help="compare against results saved with --output")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="percent change in median latency considered significant (default: %(default)s)",
+    )
+    args = parser.parse_args()
+
+    results = run(args.filter, args.time)
+
+    if args.output:
+        args.output.write_text(
+            json.dumps(
+                {
+                    "created": datetime.now(UTC).isoformat(),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "results": results,
+                },
+                indent=2,
+            )
+            + "\n"
+        )
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())["results"]
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
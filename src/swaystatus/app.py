@@ -1,16 +1,22 @@
 """The application manages the daemon's life cycle."""
 
+import sys
 from functools import cached_property
 from pathlib import Path
+from typing import Any
 
 from .args import Args
 from .config import Config
 from .context import context
-from .daemon import Daemon
+from .daemon import AsyncDaemon, Daemon
 from .element import BaseElement
 from .env import environ_path, environ_paths
 from .logger import logger, logger_level_at
+from .memory import MemoryMonitor
 from .modules import Registry
+from .profiler import Profiler
+from .startup import startup
+from .trace import tracer
 
 
 class App:
@@ -34,7 +40,7 @@ class App:
 
     @cached_property
     def config(self) -> Config:
-        with context("configuration"):
+        with context("configuration"), startup.phase("config"):
             logger.info("from file %r", str(self.config_file))
             config = Config.from_file(self.config_file)
             logger.debug("%r", config)
@@ -72,28 +78,89 @@ class App:
             with context(f"element {i}"):
                 logger.info("initializing from %s", module)
                 logger.debug("%r", module)
-                Element = self.registry.find(module.name)
-                element = Element(
-                    module.name,
-                    instance=module.instance,
-                    env=module.settings.env,
-                    on_click=module.settings.on_click,
-                    **module.settings.params,
-                )
+                with startup.phase(f"import {module.name}"):
+                    Element = self.registry.find(module.name)
+                options: dict[str, Any] = dict(module.settings.params)
+                # Settings are only passed if configured, as element subclasses may not accept them.
+                if module.settings.interval is not None:
+                    options["interval"] = module.settings.interval
+                if module.settings.align is not None:
+                    options["align"] = module.settings.align
+                if module.settings.coalesce:
+                    options["coalesce"] = module.settings.coalesce
+                with startup.phase(f"init element {i} ({module.name})"):
+                    element = Element(
+                        module.name,
+                        instance=module.instance,
+                        env=module.settings.env,
+                        on_click=module.settings.on_click,
+                        **options,
+                    )
                 logger.debug("%r", element)
             elements.append(element)
         return elements
 
     @cached_property
-    def daemon(self) -> Daemon:
-        return Daemon(self.elements, self.config.interval, self.config.click_events)
+    def daemon(self) -> Daemon | AsyncDaemon:
+        if self.config.engine == "asyncio":
+            return AsyncDaemon(
+                self.elements,
+                self.config.interval,
+                self.config.click_events,
+                **self._daemon_options,
+            )
+        return Daemon(
+            self.elements,
+            self.config.interval,
+            self.config.click_events,
+            update_queue=self.config.update_queue,
+            update_policy=self.config.update_policy,
+            **self._daemon_options,
+        )
+
+    @property
+    def _daemon_options(self) -> dict[str, Any]:
+        return dict(
+            suppress_unchanged=self.config.suppress_unchanged,
+            keepalive=self.config.keepalive,
+            render_workers=self.config.render_workers,
+            render_timeout=self.config.render_timeout,
+            min_frame_interval=self.config.min_frame_interval,
+            watchdog_budget=self.config.watchdog_budget,
+            watchdog_strikes=self.config.watchdog_strikes,
+            metrics_socket=self.config.metrics_socket,
+            update_workers=self.config.update_workers,
+            sample_control=self.args.sample_control,
+        )
 
     def run(self) -> None:
         with logger_level_at(logger, self.args.log_level):
             logger.info("daemon starting")
-            self.daemon.start()
-            self.daemon.join()
+            if self.args.startup_report:
+                startup.output = sys.stderr
+            if self.args.trace:
+                tracer.start(self.args.trace)
+            profiler = Profiler(self.args.profile) if self.args.profile else None
+            memory_monitor = MemoryMonitor(self.args.watch_memory) if self.args.watch_memory else None
+            if memory_monitor:
+                memory_monitor.start()
+            try:
+                if profiler:
+                    profiler.runcall(self.serve)
+                else:
+                    self.serve()
+            finally:
+                if memory_monitor:
+                    memory_monitor.stop()
+                if profiler:
+                    profiler.dump()
+                tracer.dump()
+                tracer.stop()
             logger.info("daemon stopped")
 
+    def serve(self) -> None:
+        self.daemon.start()
+        self.daemon.join()
+
 
 __all__ = [App.__name__]
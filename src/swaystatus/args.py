@@ -20,12 +20,28 @@ class Args:
     config_file: Path | None = None
     log_level: str | None = None
     include: list[Path] = field(default_factory=list)
+    profile: Path | None = None
+    trace: Path | None = None
+    watch_memory: float | None = None
+    startup_report: bool = False
+    sample_control: bool = False
 
     @classmethod
     def parse(cls, args: Sequence[str] | None = None) -> Self:
         return cls(**vars(arg_parser.parse_args(args)))
 
 
+def positive_float(value: str) -> float:
+    """Parse a number greater than zero."""
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number: {value!r}") from None
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"must be greater than zero: {value!r}")
+    return number
+
+
 arg_parser = argparse.ArgumentParser(
     description="Generate a status line for swaybar",
     epilog="See `pydoc swaystatus` for full documentation.",
@@ -75,6 +91,34 @@ arg_parser.add_argument(
     choices=list(logging.getLevelNamesMapping().keys()),
     help=f"specify minimum logging level (default: {logging.getLevelName(logger.getEffectiveLevel())})",
 )
+arg_parser.add_argument(
+    "--profile",
+    metavar="FILE",
+    type=Path,
+    help="profile every thread, writing pstats to FILE at shutdown and on SIGUSR2",
+)
+arg_parser.add_argument(
+    "--trace",
+    metavar="FILE",
+    type=Path,
+    help="trace every thread, writing a Chrome trace to FILE at shutdown and on SIGUSR2",
+)
+arg_parser.add_argument(
+    "--startup-report",
+    action="store_true",
+    help="write how long each phase of starting up took to stderr, once the first status line is sent",
+)
+arg_parser.add_argument(
+    "--sample-control",
+    action="store_true",
+    help="sample every thread when $XDG_RUNTIME_DIR/swaystatus/sample.<PID> appears (SIGPROF works regardless)",
+)
+arg_parser.add_argument(
+    "--watch-memory",
+    metavar="SECONDS",
+    type=positive_float,
+    help="trace memory allocations, logging memory use and the fastest growing allocation sites every SECONDS",
+)
 arg_parser.add_argument(
     "-v",
     "--verbose",
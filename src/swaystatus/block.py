@@ -1,6 +1,9 @@
 """A block is a single unit of content for the status bar."""
 
-from dataclasses import asdict, dataclass
+from dataclasses import dataclass, fields
+from json import dumps
+from json.encoder import encode_basestring
+from operator import attrgetter
 from typing import Any
 
 
@@ -38,7 +41,44 @@ class Block:
 
     def min_dict(self) -> dict[str, Any]:
         """Return a dict representation of the dataclass without any unset values."""
-        return {field: value for field, value in asdict(self).items() if value is not None}
+        return {field: value for field in FIELDS if (value := getattr(self, field)) is not None}
 
+    def values(self) -> tuple[Any, ...]:
+        """Return the values of every field, e.g. to cheaply compare the contents of blocks."""
+        return VALUES(self)
+
+    def encode(self) -> str:
+        """
+        Return a JSON representation of the dataclass without any unset values.
+
+        This is equivalent to encoding `min_dict` with `ensure_ascii=False`,
+        but the fields are read and encoded directly, without building any
+        intermediate dicts.
+        """
+        return (
+            "{"
+            + ", ".join(
+                [KEYS[field] + encode_value(value) for field in FIELDS if (value := getattr(self, field)) is not None]
+            )
+            + "}"
+        )
+
+
+def encode_value(value: Any) -> str:
+    """Return a JSON representation of a block field value."""
+    if isinstance(value, str):
+        return encode_basestring(value)
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if type(value) is int:
+        return int.__repr__(value)
+    return dumps(value, ensure_ascii=False)
+
+
+FIELDS = tuple(field.name for field in fields(Block))
+VALUES = attrgetter(*FIELDS)
+KEYS = {field: f"{encode_basestring(field)}: " for field in FIELDS}
 
 __all__ = [Block.__name__]
@@ -1,8 +1,12 @@
+import time
+
 from .app import App
 from .logger import logger
+from .startup import startup
 
 
 def main() -> int:
+    startup.record("interpreter and imports", startup.origin, time.perf_counter())
     try:
         App().run()
     except Exception:
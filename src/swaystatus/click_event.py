@@ -9,6 +9,9 @@ class ClickEvent:
     Data class representing an event generated when clicking on a status bar block.
 
     Follows the event specification described in the CLICK EVENTS section of swaybar-protocol(7).
+
+    The `count` is not part of the protocol. It's the number of clicks merged
+    into this one, when the element coalesces clicks of its button.
     """
 
     name: str | None = None
@@ -22,6 +25,7 @@ class ClickEvent:
     width: int
     height: int
     scale: float
+    count: int = 1
 
     def __str__(self) -> str:
         return f"click event button={self.button} name={self.name!r} instance={self.instance!r}"
@@ -18,11 +18,61 @@ Configuration is defined in one of the following TOML files (in order of prefere
 The following keys are recognized at the top-level of the file:
 
     `interval` (type: float | int | None, default: None)
-        How often (in seconds) to update the status bar.
+        How often (in seconds) to update elements that don't specify their own.
 
     `click_events` (type: bool, default: False)
         Whether to listen for clicks on status bar blocks.
 
+    `engine` (type: str, default: "threads")
+        How the daemon runs, either "threads" or "asyncio".
+
+    `suppress_unchanged` (type: bool, default: False)
+        Whether to skip sending a status line identical to the previous one.
+
+    `keepalive` (type: float | int | None, default: None)
+        Maximum time (in seconds) to suppress unchanged status lines.
+
+    `render_workers` (type: int | None, default: None)
+        Number of threads used to refresh elements concurrently (if set).
+
+    `render_timeout` (type: float | int | None, default: None)
+        How long (in seconds) to wait for a concurrently refreshing element
+        before using its previous blocks.
+
+    `min_frame_interval` (type: float | int | None, default: None)
+        Minimum time (in seconds) between status lines requested by signals
+        or clicks. Requests within that time of the previous status line wait
+        until it has passed, and are merged into a single status line. Others
+        are answered immediately.
+
+    `watchdog_budget` (type: float | int | None, default: None)
+        How long (in seconds) an element may take to produce its blocks
+        before it counts as slow (if set). Consistently slow elements are
+        refreshed in the background, showing their previous blocks until the
+        refresh finishes, and return once they're consistently fast again.
+
+    `watchdog_strikes` (type: int, default: 3)
+        Number of refreshes in a row over (or within) `watchdog_budget`
+        before an element is moved to (or from) the background.
+
+    `metrics_socket` (type: str | None, default: None)
+        Path of a Unix socket on which to serve metrics over HTTP in the
+        Prometheus text format (if set).
+
+    `update_workers` (type: int, default: 4)
+        Maximum number of threads running the update handlers returned by
+        click handlers. Shell commands are waited for without taking one.
+
+    `update_queue` (type: int, default: 16)
+        Maximum number of update requests waiting for a thread. Requests that
+        don't fit are dropped. Only used by the "threads" engine.
+
+    `update_policy` (type: str, default: "merge")
+        What to do with an update request for the same element and button as
+        one that's still waiting, either "merge" (replace the waiting request)
+        or "drop" (ignore the new request, also while the other one is
+        running). Only used by the "threads" engine.
+
     `include` (type: list[str], default: [])
         Additional directories to treat as module packages.
 
@@ -48,12 +98,28 @@ Each item in the `modules` list recognizes the following keys:
 
 Each `settings[name]` and `modules[i].settings` dict recognizes the following keys:
 
+    `interval` (type: float | int | None, default: None)
+        How often (in seconds) to update the element, overriding its default.
+
+    `align` (type: bool | None, default: None)
+        Whether to update the element at multiples of its interval on the
+        wall clock (e.g. the top of every minute), overriding its default.
+
     `on_click` (type: dict[int, str | list[str]], default: {})
         Shell commands to run when the element is clicked by pointer buttons.
+        A string is run by the shell, and a list is run directly as a program
+        followed by its arguments (e.g. ["pavucontrol", "--tab=3"]).
 
     `env` (type: dict[str, str], default: {})
         Environment changes to make during click handler execution.
 
+    `coalesce` (type: dict[int, float | int], default: {})
+        Time windows (in seconds) in which clicks by pointer buttons are
+        merged into a single click handler call. The handler gets the last
+        click, with its `count` set to the number of clicks merged, e.g. to
+        scroll by that many steps at once, or to tell a double click from a
+        single one.
+
     `params` (type: dict[str, Any], default: {})
         Extra keyword parameters passed to the element initializer.
 """
@@ -65,23 +131,44 @@ from os import PathLike
 from pathlib import Path
 from typing import Self
 
+ENGINES = ["threads", "asyncio"]
+UPDATE_POLICIES = ["merge", "drop"]
+
 type Number = float | int
 type EnvMapping = Mapping[str, str | None]
 type OnClickMapping = Mapping[int, str | Sequence[str] | None]
+type CoalesceMapping = Mapping[int, Number]
 type ParamsMapping = Mapping[str, object]
 
 
 @dataclass(slots=True, kw_only=True)
 class ModuleSettings:
+    interval: Number | None = None
+    align: bool | None = None
     env: EnvMapping = field(default_factory=dict)
     on_click: OnClickMapping = field(default_factory=dict)
+    coalesce: CoalesceMapping = field(default_factory=dict)
     params: ParamsMapping = field(default_factory=dict)
 
     def __post_init__(self) -> None:
+        self._validate_interval()
+        self._validate_align()
         self._validate_env()
         self._validate_on_click()
+        self._validate_coalesce()
         self._validate_params()
 
+    def _validate_interval(self) -> None:
+        if self.interval is not None:
+            if not isinstance(self.interval, float | int):
+                raise TypeError(f"`interval` must be float or int, got {type(self.interval).__name__}")
+            if self.interval <= 0:
+                raise ValueError("`interval` must be greater than zero")
+
+    def _validate_align(self) -> None:
+        if self.align is not None and not isinstance(self.align, bool):
+            raise TypeError(f"`align` must be bool, got {type(self.align).__name__}")
+
     def _validate_env(self) -> None:
         if not isinstance(self.env, dict):
             raise TypeError(f"`env` must be dict, got {type(self.env).__name__}")
@@ -101,6 +188,8 @@ class ModuleSettings:
                 raise TypeError(f"`on_click` keys must be int, got {type(button).__name__}")
             if command is not None:
                 if isinstance(command, list):
+                    if not command:
+                        raise ValueError(f"`on_click[{button!r}]` must be non-empty")
                     for i, token in enumerate(command):
                         if not isinstance(token, str):
                             raise TypeError(f"`on_click[{button!r}][{i}]` must be str, got {type(token).__name__}")
@@ -112,6 +201,17 @@ class ModuleSettings:
                 else:
                     raise TypeError(f"`on_click[{button!r}] must be a str or list of str, got {type(command).__name__}")
 
+    def _validate_coalesce(self) -> None:
+        if not isinstance(self.coalesce, dict):
+            raise TypeError(f"`coalesce` must be dict, got {type(self.coalesce).__name__}")
+        for button, window in self.coalesce.items():
+            if not isinstance(button, int):
+                raise TypeError(f"`coalesce` keys must be int, got {type(button).__name__}")
+            if not isinstance(window, float | int) or isinstance(window, bool):
+                raise TypeError(f"`coalesce[{button!r}]` must be float or int, got {type(window).__name__}")
+            if window <= 0:
+                raise ValueError(f"`coalesce[{button!r}]` must be greater than zero")
+
     def _validate_params(self) -> None:
         if not isinstance(self.params, dict):
             raise TypeError(f"must be dict, got {type(self.params).__name__}")
@@ -126,6 +226,8 @@ class ModuleSettings:
         """Create a module settings object from a dictionary representation."""
         if (on_click := data.get("on_click")) and isinstance(on_click, dict):
             data["on_click"] = {int(k): v for k, v in on_click.items()}
+        if (coalesce := data.get("coalesce")) and isinstance(coalesce, dict):
+            data["coalesce"] = {int(k): v for k, v in coalesce.items()}
         return cls(**data)
 
 
@@ -174,6 +276,18 @@ class Config:
 
     interval: Number | None = None
     click_events: bool = False
+    engine: str = "threads"
+    suppress_unchanged: bool = False
+    keepalive: Number | None = None
+    render_workers: int | None = None
+    render_timeout: Number | None = None
+    min_frame_interval: Number | None = None
+    watchdog_budget: Number | None = None
+    watchdog_strikes: int = 3
+    metrics_socket: Path | None = None
+    update_workers: int = 4
+    update_queue: int = 16
+    update_policy: str = "merge"
     env: EnvMapping = field(default_factory=dict)
     include: Sequence[Path] = field(default_factory=list)
     settings: Mapping[str, ModuleSettings] = field(default_factory=dict)
@@ -182,6 +296,18 @@ class Config:
     def __post_init__(self) -> None:
         self._validate_interval()
         self._validate_click_events()
+        self._validate_engine()
+        self._validate_suppress_unchanged()
+        self._validate_keepalive()
+        self._validate_render_workers()
+        self._validate_render_timeout()
+        self._validate_min_frame_interval()
+        self._validate_watchdog_budget()
+        self._validate_watchdog_strikes()
+        self._validate_metrics_socket()
+        self._validate_update_workers()
+        self._validate_update_queue()
+        self._validate_update_policy()
         self._validate_env()
         self._validate_include()
         self._validate_settings()
@@ -198,6 +324,84 @@ class Config:
         if not isinstance(self.click_events, bool):
             raise TypeError(f"`click_events` must be bool, got {type(self.click_events).__name__}")
 
+    def _validate_engine(self) -> None:
+        if not isinstance(self.engine, str):
+            raise TypeError(f"`engine` must be str, got {type(self.engine).__name__}")
+        if self.engine not in ENGINES:
+            raise ValueError(f"`engine` must be one of {', '.join(map(repr, ENGINES))}")
+
+    def _validate_suppress_unchanged(self) -> None:
+        if not isinstance(self.suppress_unchanged, bool):
+            raise TypeError(f"`suppress_unchanged` must be bool, got {type(self.suppress_unchanged).__name__}")
+
+    def _validate_keepalive(self) -> None:
+        if self.keepalive is not None:
+            if not isinstance(self.keepalive, float | int):
+                raise TypeError(f"`keepalive` must be float or int, got {type(self.keepalive).__name__}")
+            if self.keepalive <= 0:
+                raise ValueError("`keepalive` must be greater than zero")
+
+    def _validate_render_workers(self) -> None:
+        if self.render_workers is not None:
+            if not isinstance(self.render_workers, int) or isinstance(self.render_workers, bool):
+                raise TypeError(f"`render_workers` must be int, got {type(self.render_workers).__name__}")
+            if self.render_workers <= 0:
+                raise ValueError("`render_workers` must be greater than zero")
+
+    def _validate_render_timeout(self) -> None:
+        if self.render_timeout is not None:
+            if not isinstance(self.render_timeout, float | int):
+                raise TypeError(f"`render_timeout` must be float or int, got {type(self.render_timeout).__name__}")
+            if self.render_timeout <= 0:
+                raise ValueError("`render_timeout` must be greater than zero")
+
+    def _validate_min_frame_interval(self) -> None:
+        if self.min_frame_interval is not None:
+            if not isinstance(self.min_frame_interval, float | int):
+                raise TypeError(
+                    f"`min_frame_interval` must be float or int, got {type(self.min_frame_interval).__name__}"
+                )
+            if self.min_frame_interval <= 0:
+                raise ValueError("`min_frame_interval` must be greater than zero")
+
+    def _validate_watchdog_budget(self) -> None:
+        if self.watchdog_budget is not None:
+            if not isinstance(self.watchdog_budget, float | int):
+                raise TypeError(f"`watchdog_budget` must be float or int, got {type(self.watchdog_budget).__name__}")
+            if self.watchdog_budget <= 0:
+                raise ValueError("`watchdog_budget` must be greater than zero")
+
+    def _validate_watchdog_strikes(self) -> None:
+        if not isinstance(self.watchdog_strikes, int) or isinstance(self.watchdog_strikes, bool):
+            raise TypeError(f"`watchdog_strikes` must be int, got {type(self.watchdog_strikes).__name__}")
+        if self.watchdog_strikes <= 0:
+            raise ValueError("`watchdog_strikes` must be greater than zero")
+
+    def _validate_metrics_socket(self) -> None:
+        if self.metrics_socket is not None:
+            if not isinstance(self.metrics_socket, Path):
+                raise TypeError(f"`metrics_socket` must be Path, got {type(self.metrics_socket).__name__}")
+            if not self.metrics_socket.is_absolute():
+                raise ValueError("`metrics_socket` must be an absolute path")
+
+    def _validate_update_workers(self) -> None:
+        if not isinstance(self.update_workers, int) or isinstance(self.update_workers, bool):
+            raise TypeError(f"`update_workers` must be int, got {type(self.update_workers).__name__}")
+        if self.update_workers <= 0:
+            raise ValueError("`update_workers` must be greater than zero")
+
+    def _validate_update_queue(self) -> None:
+        if not isinstance(self.update_queue, int) or isinstance(self.update_queue, bool):
+            raise TypeError(f"`update_queue` must be int, got {type(self.update_queue).__name__}")
+        if self.update_queue <= 0:
+            raise ValueError("`update_queue` must be greater than zero")
+
+    def _validate_update_policy(self) -> None:
+        if not isinstance(self.update_policy, str):
+            raise TypeError(f"`update_policy` must be str, got {type(self.update_policy).__name__}")
+        if self.update_policy not in UPDATE_POLICIES:
+            raise ValueError(f"`update_policy` must be one of {', '.join(map(repr, UPDATE_POLICIES))}")
+
     def _validate_env(self) -> None:
         if not isinstance(self.env, dict):
             raise TypeError(f"`env` must be dict, got {type(self.env).__name__}")
@@ -244,8 +448,11 @@ class Config:
                 name=module.name,
                 instance=module.instance,
                 settings=ModuleSettings(
+                    interval=module.settings.interval if module.settings.interval is not None else settings.interval,
+                    align=module.settings.align if module.settings.align is not None else settings.align,
                     env={**self.env, **settings.env, **module.settings.env},
                     on_click={**settings.on_click, **module.settings.on_click},
+                    coalesce={**settings.coalesce, **module.settings.coalesce},
                     params={**settings.params, **module.settings.params},
                 ),
             )
@@ -255,6 +462,8 @@ class Config:
         """Create a configuration object from a dictionary representation."""
         if (include := data.get("include")) and isinstance(include, list):
             data["include"] = [Path(d).expanduser() for d in include]
+        if (metrics_socket := data.get("metrics_socket")) and isinstance(metrics_socket, str):
+            data["metrics_socket"] = Path(metrics_socket).expanduser()
         if (settings := data.get("settings")) and isinstance(settings, dict):
             data["settings"] = {k: ModuleSettings.parse(v) if isinstance(v, dict) else v for k, v in settings.items()}
         if (modules := data.get("modules")) and isinstance(modules, list):
@@ -10,24 +10,68 @@ SIGSTOP
     Suspend output (sent by swaybar when hidden).
 
 SIGCONT
-    Resume and immediately refresh output (sent by swaybar when unhidden).
+    Resume and immediately refresh every element (sent by swaybar when unhidden).
 
 SIGUSR1
-    Immediately refresh output.
+    Immediately refresh every element.
+
+SIGUSR2
+    Write timing statistics for every element's blocks and click handlers to
+    $XDG_RUNTIME_DIR/swaystatus/stats.<PID> (in milliseconds), and the profile
+    or trace so far if running with --profile or --trace.
+
+SIGPROF
+    Sample the stacks of every thread for 10 seconds, writing them as folded
+    stacks (for flame graphs) to $XDG_RUNTIME_DIR/swaystatus/samples.<PID>.
+    If running with --sample-control, sampling also starts when the file
+    $XDG_RUNTIME_DIR/swaystatus/sample.<PID> appears, sampling for the number
+    of seconds it contains (if any).
+
+There are two daemons to choose from (see `engine` in the configuration):
+
+Daemon
+    Dedicated threads for output, input, and every click handler update.
+
+AsyncDaemon
+    A single asyncio event loop for output, input, signals, click handlers,
+    and the shell commands they run.
 """
 
+import asyncio
+import os
+import signal
+import sys
+import threading
+import time
 from collections.abc import Callable, Sequence
-from signal import SIGCONT, SIGINT, SIGTERM, SIGUSR1, Signals, signal
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from pathlib import Path
+from select import select
+from signal import SIGCONT, SIGINT, SIGPROF, SIGTERM, SIGUSR1, SIGUSR2, Signals
+from threading import Lock, Thread
 from types import FrameType
 from typing import Any
 
+from .click_event import ClickEvent
+from .context import context_group
 from .element import BaseElement
-from .input import InputDriver, InputProcessor
+from .input import READ_SIZE, InputDriver, InputParser, InputProcessor, UpdatePool
 from .logger import logger
-from .output import OutputDriver, OutputProcessor
+from .metrics import Metrics, MetricsServer
+from .output import OutputDriver, OutputProcessor, Timer
+from .profiler import Profiler
+from .sampler import sampler_control
+from .startup import startup
+from .stats import stats, stats_path
+from .threads import WorkerPool
+from .trace import tracer
+from .writer import stdout_writer
 
 SIGNALS_UPDATE = [SIGCONT, SIGUSR1]
 SIGNALS_SHUTDOWN = [SIGINT, SIGTERM]
+SIGNALS_STATS = [SIGUSR2]
+SIGNALS_SAMPLE = [SIGPROF]
 
 
 type Number = float | int
@@ -37,17 +81,66 @@ type Callback = Callable[..., Any]
 class Daemon:
     """Manager of input and output streams."""
 
-    def __init__(self, elements: Sequence[BaseElement], interval: Number | None, click_events: bool) -> None:
-        self._output_driver = OutputDriver(OutputProcessor(elements, click_events), interval)
-        self._input_driver = InputDriver(InputProcessor(elements, self.update)) if click_events else None
+    def __init__(
+        self,
+        elements: Sequence[BaseElement],
+        interval: Number | None,
+        click_events: bool,
+        *,
+        suppress_unchanged: bool = False,
+        keepalive: Number | None = None,
+        render_workers: int | None = None,
+        render_timeout: Number | None = None,
+        min_frame_interval: Number | None = None,
+        watchdog_budget: Number | None = None,
+        watchdog_strikes: int = 3,
+        metrics_socket: Path | None = None,
+        update_workers: int = 4,
+        update_queue: int = 16,
+        update_policy: str = "merge",
+        sample_control: bool = False,
+    ) -> None:
+        self._output_processor = OutputProcessor(
+            elements,
+            click_events,
+            interval,
+            suppress_unchanged=suppress_unchanged,
+            keepalive=keepalive,
+            render_workers=render_workers,
+            render_timeout=render_timeout,
+            watchdog_budget=watchdog_budget,
+            watchdog_strikes=watchdog_strikes,
+            writer=stdout_writer(),
+        )
+        self._output_driver = OutputDriver(
+            self._output_processor,
+            self._output_processor.timeout,
+            min_frame_interval,
+        )
+        self._update_pool = UpdatePool(update_workers, update_queue, update_policy)
+        input_processor = (
+            InputProcessor(elements, self._output_driver.next, self._update_pool) if click_events else None
+        )
+        self._input_driver = InputDriver(input_processor) if input_processor else None
+        self._sampler_control = sampler_control(sample_control)
+        self._metrics_server = (
+            MetricsServer(metrics_socket, Metrics(self._output_processor, input_processor)) if metrics_socket else None
+        )
+        for element in elements:
+            element.updater = self._output_driver.next
 
     def _register_signals(self) -> None:
         for signum in SIGNALS_UPDATE:
             register_signal(signum, self.update)
         for signum in SIGNALS_SHUTDOWN:
             register_signal(signum, self.shutdown)
+        for signum in SIGNALS_STATS:
+            register_signal(signum, dump_stats)
+        for signum in SIGNALS_SAMPLE:
+            register_signal(signum, self._sampler_control.trigger)
 
     def update(self) -> None:
+        self._output_processor.refresh()
         self._output_driver.next()
 
     def start(self) -> None:
@@ -56,25 +149,310 @@ class Daemon:
         self._output_driver.start()
         if self._input_driver:
             self._input_driver.start()
+        self._sampler_control.start()
+        if self._metrics_server:
+            self._metrics_server.start()
 
     def stop(self) -> None:
         self._output_driver.stop()
+        self._update_pool.shutdown()
+        self._sampler_control.stop()
+        if self._metrics_server:
+            self._metrics_server.stop()
 
     def join(self, timeout: Number | None = None) -> None:
-        self._output_driver.join(timeout=timeout)
+        join_interruptibly(self._output_driver, timeout=timeout)
+        if not self._output_driver.is_alive():
+            self._output_processor.close(timeout=timeout)
+            logger.info("merged %d refresh request(s)", self._output_driver.requests_merged)
+            logger.info(
+                "merged %d and dropped %d update request(s)", self._update_pool.merged, self._update_pool.dropped
+            )
 
     def shutdown(self) -> None:
         self.stop()
         self.join(timeout=5.0)
 
 
+class AsyncDaemon:
+    """Manager of input and output streams on an asyncio event loop."""
+
+    def __init__(
+        self,
+        elements: Sequence[BaseElement],
+        interval: Number | None,
+        click_events: bool,
+        *,
+        suppress_unchanged: bool = False,
+        keepalive: Number | None = None,
+        render_workers: int | None = None,
+        render_timeout: Number | None = None,
+        min_frame_interval: Number | None = None,
+        watchdog_budget: Number | None = None,
+        watchdog_strikes: int = 3,
+        metrics_socket: Path | None = None,
+        update_workers: int = 4,
+        sample_control: bool = False,
+    ) -> None:
+        self._output_processor = OutputProcessor(
+            elements,
+            click_events,
+            interval,
+            suppress_unchanged=suppress_unchanged,
+            keepalive=keepalive,
+            render_workers=render_workers,
+            render_timeout=render_timeout,
+            watchdog_budget=watchdog_budget,
+            watchdog_strikes=watchdog_strikes,
+            writer=stdout_writer(),
+        )
+        self._input_processor = InputProcessor(elements, self.next) if click_events else None
+        self._min_frame_interval = min_frame_interval
+        self.requests_merged = 0
+        self._loop = asyncio.new_event_loop()
+        self._loop.set_default_executor(ThreadPoolExecutor(update_workers, thread_name_prefix="UpdateThread"))
+        self._next = asyncio.Event()
+        self._done = False
+        self._main: asyncio.Task | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self._coalesced: asyncio.TimerHandle | None = None
+        self._sampler_control = sampler_control(sample_control)
+        self._metrics_server = (
+            MetricsServer(metrics_socket, Metrics(self._output_processor, self._input_processor))
+            if metrics_socket
+            else None
+        )
+        for element in elements:
+            element.updater = self.next
+
+    def _register_signals(self) -> None:
+        for signum in SIGNALS_UPDATE:
+            self._loop.add_signal_handler(signum, handle_signal_async, signum, self.update)
+        for signum in SIGNALS_SHUTDOWN:
+            self._loop.add_signal_handler(signum, handle_signal_async, signum, self.shutdown)
+        for signum in SIGNALS_STATS:
+            self._loop.add_signal_handler(signum, handle_signal_async, signum, dump_stats)
+        for signum in SIGNALS_SAMPLE:
+            self._loop.add_signal_handler(signum, handle_signal_async, signum, self._sampler_control.trigger)
+
+    def next(self) -> None:
+        """Request a status line from any thread."""
+        with suppress(RuntimeError):  # the loop is already closed
+            self._loop.call_soon_threadsafe(self._request)
+
+    def _request(self) -> None:
+        if self._next.is_set():
+            self.requests_merged += 1
+        self._next.set()
+
+    def update(self) -> None:
+        self._output_processor.refresh()
+        self.next()
+
+    def start(self) -> None:
+        self._register_signals()
+        self._main = self._loop.create_task(self._run())
+        self._sampler_control.start()
+        if self._metrics_server:
+            self._metrics_server.start()
+
+    def stop(self) -> None:
+        self._done = True
+        self.next()
+        self._sampler_control.stop()
+        if self._metrics_server:
+            self._metrics_server.stop()
+
+    def join(self, timeout: Number | None = None) -> None:
+        assert self._main
+        if self._loop.is_running():
+            return
+        with suppress(TimeoutError):
+            self._loop.run_until_complete(asyncio.wait_for(asyncio.shield(self._main), timeout))
+        if self._main.done():
+            self._loop.close()
+
+    def shutdown(self) -> None:
+        self.stop()
+        self.join(timeout=5.0)
+
+    async def _run(self) -> None:
+        input_task = asyncio.create_task(self._input()) if self._input_processor else None
+        try:
+            await self._output()
+        finally:
+            if input_task:
+                input_task.cancel()
+            close_pool = WorkerPool(1, name="CloseThread")  # update requests may be stuck on the default executor
+            await asyncio.wrap_future(close_pool.submit(self._output_processor.close, 5.0))
+            close_pool.shutdown()
+            logger.info("merged %d refresh request(s)", self.requests_merged)
+
+    async def _output(self) -> None:
+        timer = Timer()
+        ticked = float("-inf")
+        self._output_processor.send_header()
+        self._next.set()
+        while not self._done:
+            requested = False
+            with suppress(TimeoutError):
+                requested = await asyncio.wait_for(self._next.wait(), self._output_processor.timeout())
+            if (
+                requested
+                and self._min_frame_interval
+                and not self._done
+                and (settle := ticked + self._min_frame_interval - self._loop.time()) > 0
+            ):
+                await asyncio.sleep(settle)  # let a burst of requests following the last status line settle
+            self._next.clear()
+            if self._done:
+                break
+            ticked = self._loop.time()
+            with timer:
+                blocks = await self._output_processor.status_line_async()
+            logger.info("generated status line in %f seconds", timer.seconds)
+            stats.record("status line", "all elements", timer.seconds)
+            logger.debug("status line %r", blocks)
+            self._output_processor.send_status_line()
+            if not startup.finished:
+                startup.record("first status line", timer.start, timer.start + timer.seconds)
+                startup.finish()
+
+    async def _input(self) -> None:
+        assert self._input_processor
+        reader = asyncio.StreamReader()
+        transport, _ = await self._loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        parser = InputParser()
+        coalescer = self._input_processor.coalescer
+        try:
+            while data := await reader.read(READ_SIZE):
+                for click_fields in parser.feed(data):
+                    with context_group("click event"):
+                        routed = self._input_processor.route(click_fields)
+                        if routed and not coalescer.add(*routed, self._loop.time()):
+                            self._start_click(*routed)
+                self._schedule_coalesced()
+            if self._coalesced:  # no more clicks to merge with at the end of input
+                self._coalesced.cancel()
+                self._coalesced = None
+            for element, click_event in coalescer.due():
+                with context_group("click event"):
+                    self._start_click(element, click_event)
+        finally:
+            transport.close()
+
+    def _start_click(self, element: BaseElement, click_event: ClickEvent) -> None:
+        task = asyncio.create_task(self._click(element, click_event))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _schedule_coalesced(self) -> None:
+        assert self._input_processor
+        now = self._loop.time()
+        if (timeout := self._input_processor.coalescer.timeout(now)) is None:
+            return
+        if self._coalesced:
+            if self._coalesced.when() <= now + timeout:
+                return
+            self._coalesced.cancel()
+        self._coalesced = self._loop.call_at(now + timeout, self._click_coalesced)
+
+    def _click_coalesced(self) -> None:
+        assert self._input_processor
+        self._coalesced = None
+        for element, click_event in self._input_processor.coalescer.due(self._loop.time()):
+            with context_group("click event"):
+                self._start_click(element, click_event)
+        self._schedule_coalesced()
+
+    async def _click(self, element: BaseElement, click_event: ClickEvent) -> None:
+        assert self._input_processor
+        try:
+            name = str(element)
+            with stats.timed("click", name), tracer.span("click", name):
+                update = await element.on_click_async(click_event)
+        except Exception:
+            logger.exception("unhandled exception in click handler")
+            return
+        if update:
+            self._input_processor.update(element)
+
+
+def dump_stats() -> None:
+    path = stats_path()
+    try:
+        stats.dump(path)
+    except OSError:
+        logger.exception("unable to write stats")
+    else:
+        logger.info("wrote stats to %s", path)
+    if profiler := Profiler.running:
+        try:
+            profiler.dump()
+        except OSError:
+            logger.exception("unable to write profile")
+    try:
+        tracer.dump()
+    except OSError:
+        logger.exception("unable to write trace")
+
+
+def handle_signal_async(signum: int, callback: Callback) -> None:
+    logger.info("received signal %s (%d)", Signals(signum).name, signum)
+    callback()
+
+
 def register_signal(signum: int, callback: Callback) -> None:
     def handle_signal(sig: int, frame: FrameType | None) -> None:  # pragma: no cover
         logger.info("received signal %s (%d)", Signals(sig).name, sig)
         logger.debug("current stack frame %r", frame)
         callback()
 
-    signal(signum, handle_signal)
+    signal.signal(signum, handle_signal)
+
+
+def join_interruptibly(thread: Thread, timeout: Number | None = None) -> None:
+    """
+    Wait for a thread to finish, while handling signals as soon as they arrive.
+
+    A signal may be delivered to any thread, but its handler only runs on the
+    main thread, which doesn't notice while it's blocked joining a thread. So
+    the main thread waits on a signal wakeup file descriptor instead, which a
+    helper thread also writes to once the thread finishes.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        thread.join(timeout=timeout)
+        return
+    reader, writer = os.pipe()
+    os.set_blocking(writer, False)
+    lock = Lock()
+    closed = False
+
+    def notify() -> None:
+        thread.join()
+        with lock:
+            if not closed:
+                os.write(writer, b"\0")
+
+    Thread(target=notify, name="JoinThread", daemon=True).start()
+    previous = signal.set_wakeup_fd(writer, warn_on_full_buffer=False)
+    try:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while thread.is_alive():
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            if select([reader], [], [], remaining)[0]:
+                os.read(reader, 1024)  # any signal handlers run once this returns
+    finally:
+        signal.set_wakeup_fd(previous)
+        with lock:
+            closed = True
+            os.close(reader)
+            os.close(writer)
 
 
-__all__ = [Daemon.__name__]
+__all__ = [
+    Daemon.__name__,
+    AsyncDaemon.__name__,
+]
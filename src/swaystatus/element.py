@@ -1,27 +1,38 @@
 """An element produces blocks of content to display in the status bar."""
 
-from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
-from contextvars import copy_context
+import asyncio
+import os
+import shutil
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator, Mapping, Sequence
+from contextvars import ContextVar
 from dataclasses import asdict
-from subprocess import PIPE, Popen
-from threading import Thread
-from types import MethodType
-from typing import Self
+from inspect import isawaitable, iscoroutine, iscoroutinefunction
+from subprocess import PIPE, Popen, TimeoutExpired
+from types import MappingProxyType, MethodType
+from typing import Any, ClassVar, Self
 
 from .block import Block
 from .click_event import ClickEvent
-from .env import environ_update
+from .env import environ_copy, environ_update
 from .logger import logger
+from .reaper import reaper
+from .trace import tracer
 
 type Number = float | int
 type EnvMapping = Mapping[str, str | None]
 type ShellCommand = str | Sequence[str]
-type UpdateHandler = Callable[..., bool]
+type Blocks = Iterator[Block] | AsyncIterator[Block]
+type UpdateHandler = Callable[..., bool | Awaitable[bool]]
 type UpdateRequest = UpdateHandler | bool
 type ClickHandlerResult = ShellCommand | Popen | UpdateRequest | None
-type ClickHandler[Element] = Callable[[Element, ClickEvent], ClickHandlerResult]
+type ClickHandler[Element] = Callable[[Element, ClickEvent], ClickHandlerResult | Awaitable[ClickHandlerResult]]
 type ClickHandlerMapping[Element] = Mapping[int, ClickHandler[Element] | ShellCommand | None]
 
+COMMAND_NOT_RUN = 127  # the exit status of a command that couldn't be run, as the shell reports it
+
+process_updater: ContextVar[Callable[[], Any] | None] = ContextVar("process_updater", default=None)
+
 
 class BaseElement:
     """
@@ -55,14 +66,65 @@ class BaseElement:
 
     This assumes that the module file `clock.py` is in a directory where
     swaystatus can find it (see documentation for `swaystatus.modules`).
+
+    By default, an element is refreshed at the global `interval` from the
+    configuration. An element that changes more or less often than that can
+    declare its own refresh interval (in seconds) on the class:
+
+        >>> class Element(BaseElement):
+        >>>     interval = 60.0
+
+    Refreshes keep to the interval's schedule, no matter how late one of them
+    happens. To refresh at multiples of the interval on the wall clock (e.g.
+    a clock refreshing at the top of every minute), align it:
+
+        >>> class Element(BaseElement):
+        >>>     interval = 60.0
+        >>>     align = True
+
+    Between refreshes, the blocks from the previous refresh are reused. An
+    element without any interval is only refreshed when the whole status bar
+    is refreshed (e.g. on SIGUSR1) or when it has been invalidated (see the
+    `invalidate` and `request_update` methods).
+
+    When elements are refreshed concurrently (see `render_workers` in the
+    configuration), an element that takes longer than `render_timeout`
+    seconds keeps showing its previous blocks until the refresh finishes. An
+    element that is known to be slow can declare its own time budget:
+
+        >>> class Element(BaseElement):
+        >>>     timeout = 2.0
+
+    Scrolling over a block sends a burst of clicks by buttons 4 and 5. An
+    element can coalesce the clicks of a button within a time window (in
+    seconds) into a single handler call. The click event handled is the last
+    one, with its `count` set to the number of clicks coalesced:
+
+        >>> class Element(BaseElement):
+        >>>     coalesce = {4: 0.1, 5: 0.1}
+        >>>     def on_click_4(self, click_event: ClickEvent) -> list[str]:
+        >>>         return ["pactl", "set-sink-volume", "@DEFAULT_SINK@", f"+{click_event.count}%"]
+
+    Coalescing the first button instead makes a double click arrive as a
+    single click with a count of 2.
     """
 
+    interval: Number | None = None
+    align: bool = False
+    timeout: Number | None = None
+    coalesce: Mapping[int, Number] = MappingProxyType({})
+    invalidated: bool = False
+    updater: Callable[[], None] | None = None
+
     def __init__(
         self,
         name: str,
         instance: str | None = None,
         env: EnvMapping | None = None,
         on_click: ClickHandlerMapping[Self] | None = None,
+        interval: Number | None = None,
+        align: bool | None = None,
+        coalesce: Mapping[int, Number] | None = None,
     ) -> None:
         """
         Intialize a new status bar content producer, i.e. an element.
@@ -83,6 +145,11 @@ class BaseElement:
         (i.e. functions or shell commands) which take precedence over any
         already defined on the class.
 
+        The optional `interval` parameter will be provided if the configuration
+        sets it for the module, and takes precedence over the one defined on
+        the class. The same goes for the optional `align` parameter, and the
+        windows in the optional `coalesce` mapping (for their buttons).
+
         Any extra parameters from the `params` mapping in the configuration
         will be passed as keyword arguments to the element subclass and should
         be handled there.
@@ -123,6 +190,12 @@ class BaseElement:
         self.name = name
         self.instance = instance
         self.env = dict(env or {})
+        if interval is not None:
+            self.interval = interval
+        if align is not None:
+            self.align = align
+        if coalesce:
+            self.coalesce = {**self.coalesce, **coalesce}
         if on_click:
             for button, handler in on_click.items():
                 self.set_click_handler(button, handler)
@@ -130,7 +203,7 @@ class BaseElement:
     def __str__(self) -> str:
         return f"element name={self.name!r} instance={self.instance!r}"
 
-    def blocks(self) -> Iterator[Block]:
+    def blocks(self) -> Blocks:
         """
         Yield blocks of content to display on the status bar.
 
@@ -146,9 +219,61 @@ class BaseElement:
         You could, of course, create and yield a similar block without using
         the `block` method, but using it reduces boilerplate and the chance of
         misconfiguration (see `block` documentation for a full explanation).
+
+        Elements that spend most of their time waiting on I/O can implement
+        this method as an asynchronous generator instead:
+
+            >>> import asyncio
+            >>> from collections.abc import AsyncIterator
+            >>> from swaystatus import BaseElement, Block
+            >>> class Element(BaseElement):
+            >>>     async def blocks(self) -> AsyncIterator[Block]:
+            >>>         reader, writer = await asyncio.open_connection("localhost", 6600)
+            >>>         yield self.block((await reader.readline()).decode().strip())
+            >>>         writer.close()
+
+        With the asyncio engine (see `engine` in the configuration), these
+        elements are refreshed concurrently on the event loop. Otherwise, each
+        refresh is run to completion in its own event loop.
         """
         raise NotImplementedError
 
+    def invalidate(self) -> None:
+        """
+        Mark the blocks from the last refresh as outdated.
+
+        The element will be refreshed the next time the status line is
+        generated, whether or not its interval has elapsed. Other elements are
+        unaffected and keep their blocks until they are due.
+        """
+        self.invalidated = True
+
+    def request_update(self) -> None:
+        """
+        Invalidate the element and generate a new status line immediately.
+
+        This is useful for elements whose content is driven by something other
+        than the passage of time, e.g. a background thread watching a socket:
+
+            >>> from threading import Thread
+            >>> from collections.abc import Iterator
+            >>> from swaystatus import BaseElement, Block
+            >>> class Element(BaseElement):
+            >>>     def __init__(self, *args, **kwargs) -> None:
+            >>>         super().__init__(*args, **kwargs)
+            >>>         self.events = 0
+            >>>         Thread(target=self.watch, daemon=True).start()
+            >>>     def watch(self) -> None:
+            >>>         for _ in wait_for_events():
+            >>>             self.events += 1
+            >>>             self.request_update()
+            >>>     def blocks(self) -> Iterator[Block]:
+            >>>         yield self.block(f"events: {self.events}")
+        """
+        self.invalidate()
+        if self.updater:
+            self.updater()
+
     def block(self, full_text: str) -> Block:
         """
         Return a block of content associated with this element.
@@ -209,25 +334,35 @@ class BaseElement:
             - A function that accepts two positional arguments (this element
               instance and a ClickEvent) and returns one of the following:
 
-                - A shell command compatible with Popen. The stdout and stderr
-                  streams will be logged at the DEBUG and ERROR levels,
-                  respectively. If the exit status is zero, the status bar will
-                  be updated.
+                - A shell command, either a string run by the shell, or a
+                  sequence of a program and its arguments, run directly. The
+                  stdout and stderr streams will be logged at the DEBUG and
+                  ERROR levels, respectively. If the exit status is zero, the
+                  element will be refreshed. A command that can't be run at
+                  all (e.g. a program that doesn't exist) is logged as an
+                  error, like one that fails.
 
-                - A Popen object. If the exit status is zero, the status bar
-                  will be updated.
+                - A Popen object. If the exit status is zero, the element will
+                  be refreshed.
 
                 - A function that returns a bool. If it returns True, the
-                  status bar will be updated.
+                  element will be refreshed.
+
+                - A bool. If True, the element will be refreshed.
 
-                - A bool. If True, the status bar will be updated.
+                - Nothing or None. The element will not be refreshed.
 
-                - Nothing or None. The status bar will not be updated.
+              Only the clicked element is refreshed. Other elements keep their
+              blocks until they are due or are invalidated themselves.
 
             - A shell command. It will be handled as described above.
 
             - None. Clicks events will not be handled for `button`. This will
               override any methods defined in the element subclass.
+
+        A function can also be a coroutine function, as can any function that
+        it returns. The environment is only altered while the function itself
+        runs, but shell commands it returns are always run with it.
         """
 
         method: ClickHandler[Self]
@@ -248,31 +383,62 @@ class BaseElement:
 
         setattr(self, method_attr, MethodType(method, self))
 
-    def on_click(self, click_event: ClickEvent) -> UpdateRequest:
-        """Delegate a click event to the handler corresponding to its button."""
+    def _click_handler(self, click_event: ClickEvent) -> tuple[Callable[[ClickEvent], Any], EnvMapping] | None:
         method_attr = f"on_click_{click_event.button}"
 
         try:
             handler = getattr(self, method_attr)
             logger.debug("click handler method %r", handler)
         except AttributeError:
-            return False
+            return None
 
         env = self.env | asdict(click_event)
         logger.debug("click handler environment %r", env)
 
+        return handler, env
+
+    def on_click(self, click_event: ClickEvent) -> UpdateRequest | Popen:
+        """
+        Delegate a click event to the handler corresponding to its button.
+
+        A process that the handler starts is waited for by the update handler
+        returned. If an updater is set in `process_updater`, the process is
+        returned instead, and the updater is called once it exits with status
+        0, so that nothing has to wait for it.
+        """
+        if not (click_handler := self._click_handler(click_event)):
+            return False
+
+        handler, env = click_handler
+        updater = process_updater.get()
+
         with environ_update(**env):
-            result: ClickHandlerResult = handler(click_event)
+            result: ClickHandlerResult = resolved(handler(click_event))
             logger.debug("click handler result %r", result)
 
             if result is None:
                 return False
 
-            if isinstance(result, bool) or callable(result):
+            if isinstance(result, bool):
+                return result
+
+            if callable(result):
+                if iscoroutinefunction(result):
+                    update_handler = result
+                    return lambda: resolved(update_handler())
                 return result
 
             if isinstance(result, str | Sequence):
-                result = LoggedProcess(result)
+                try:
+                    result = LoggedProcess(result, updater)
+                except OSError:
+                    logger.exception("unable to run %r", result)
+                    return False
+            elif updater:
+                reaper.watch(result, [], updater)
+
+            if updater:
+                return result
 
             def update_request() -> bool:
                 result.wait()
@@ -280,46 +446,120 @@ class BaseElement:
 
             return update_request
 
+    async def on_click_async(self, click_event: ClickEvent) -> bool:
+        """
+        Delegate a click event to the handler corresponding to its button.
+
+        Unlike `on_click`, this awaits the handler and whatever it requests,
+        and returns whether the element should be refreshed.
+        """
+        if not (click_handler := self._click_handler(click_event)):
+            return False
+
+        handler, env = click_handler
+
+        with environ_update(**env):
+            result = handler(click_event)
+            if isawaitable(result):
+                result = await result
+
+        logger.debug("click handler result %r", result)
+
+        if result is None:
+            return False
+
+        if isinstance(result, bool):
+            return result
+
+        if callable(result):
+            if iscoroutinefunction(result):
+                return bool(await result())
+            return bool(await asyncio.to_thread(result))
+
+        if isinstance(result, Popen):
+            return await asyncio.to_thread(result.wait) == 0
+
+        return await run_logged_process(result, environ_copy(env)) == 0
+
+
+def resolved(result: Any) -> Any:
+    """Run a coroutine to completion and return its result, or return anything else as is."""
+    return asyncio.run(result) if iscoroutine(result) else result
+
 
 class LoggedProcess(Popen):
-    """Run a shell command, logging stdout and stderr."""
+    """
+    Run a shell command, logging stdout and stderr.
 
-    def __init__(self, args: ShellCommand) -> None:
-        super().__init__(args, stdout=PIPE, stderr=PIPE, shell=True, text=True)
-        assert self.stdout and self.stderr
+    A string is run by the shell. A sequence is the program and its arguments,
+    which are run directly (without a shell), so that it can be spawned with
+    `posix_spawn` where possible.
 
-        def wrap(log: Callable[[str], None]) -> Callable[[str], None]:
-            def wrapped(line: str) -> None:
-                log(line.rstrip("\n"))
+    The output is logged, and the process is reaped, by the shared `reaper`
+    thread, so waiting only blocks the caller. If `updater` is given, the
+    reaper calls it once the process exits with status 0.
 
-            return wrapped
+    The number of processes spawned, including those by `run_logged_process`,
+    is counted in `spawned`.
+    """
 
-        self._stdout_thread = MapDriver(self.stdout, wrap(logger.debug), name=f"LoggerThread.{self.pid}.stdout")
-        self._stdout_thread.start()
-        self._stderr_thread = MapDriver(self.stderr, wrap(logger.error), name=f"LoggerThread.{self.pid}.stderr")
-        self._stderr_thread.start()
+    spawned: ClassVar[int] = 0
 
-    def wait(self, timeout: Number | None = None) -> int:
-        result = super().wait(timeout=timeout)
-        self._stdout_thread.join(timeout=timeout)
-        self._stderr_thread.join(timeout=timeout)
+    def __init__(self, args: ShellCommand, updater: Callable[[], Any] | None = None) -> None:
+        if isinstance(args, str):
+            super().__init__(args, stdout=PIPE, stderr=PIPE, shell=True)
+        else:
+            super().__init__(resolve_command(args), stdout=PIPE, stderr=PIPE)
+        LoggedProcess.spawned += 1
         assert self.stdout and self.stderr
-        self.stdout.close()
-        self.stderr.close()
-        return result
+        self._done = reaper.watch(self, [(self.stdout, logger.debug), (self.stderr, logger.error)], updater)
 
+    def wait(self, timeout: Number | None = None) -> int:
+        if not self._done.wait(timeout=timeout):
+            assert timeout is not None
+            raise TimeoutExpired(self.args, timeout)
+        return super().wait()
 
-class MapDriver[T](Thread):
-    """Eagerly drive items from an iterable into a function."""
 
-    def __init__(self, iterable: Iterable[T], handler: Callable[[T], None], name: str | None = None) -> None:
-        super().__init__(name=name, daemon=True, context=copy_context())
-        self._iterator = iter(iterable)
-        self._handler = handler
+async def run_logged_process(args: ShellCommand, env: Mapping[str, str]) -> int:
+    """
+    Run a shell command on the event loop, logging stdout and stderr, and
+    return its exit status (or `COMMAND_NOT_RUN` if it couldn't be run).
+    """
+    started = time.perf_counter_ns()
+    try:
+        if isinstance(args, str):
+            process = await asyncio.create_subprocess_shell(args, stdout=PIPE, stderr=PIPE, env=env)
+        else:
+            process = await asyncio.create_subprocess_exec(
+                *resolve_command(args, env), stdout=PIPE, stderr=PIPE, env=env
+            )
+    except OSError:
+        logger.exception("unable to run %r", args)
+        return COMMAND_NOT_RUN
+    LoggedProcess.spawned += 1
+    assert process.stdout and process.stderr
+
+    async def log_lines(stream: asyncio.StreamReader, log: Callable[[str], None]) -> None:
+        async for line in stream:
+            log(line.decode(errors="replace").rstrip("\n"))
+
+    await asyncio.gather(log_lines(process.stdout, logger.debug), log_lines(process.stderr, logger.error))
+    returncode = await process.wait()
+    tracer.record("process", f"process {process.pid}", started, time.perf_counter_ns(), args=args)
+    return returncode
+
+
+def resolve_command(args: Sequence[str], env: Mapping[str, str | None] | None = None) -> list[str]:
+    """
+    Return a command with its program resolved to an absolute path, if found.
 
-    def run(self) -> None:
-        for item in self._iterator:
-            self._handler(item)
+    Popen only takes its `posix_spawn` fast path for a program with a path.
+    The program is searched for in the PATH from `env`, or the current one.
+    """
+    program, *arguments = args
+    path = (env if env is not None else os.environ).get("PATH")
+    return [shutil.which(program, path=path) or program, *arguments]
 
 
 __all__ = [BaseElement.__name__]
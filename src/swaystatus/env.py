@@ -24,6 +24,17 @@ def environ_alter(updates: Mapping[str, str | None]) -> None:
             os.environ[name] = str(value)
 
 
+def environ_copy(updates: Mapping[str, object | None]) -> dict[str, str]:
+    """Return a copy of the environment altered like `environ_alter` would."""
+    environ = dict(os.environ)
+    for name, value in updates.items():
+        if value is None:
+            environ.pop(name, None)
+        else:
+            environ[name] = str(value)
+    return environ
+
+
 @contextmanager
 def environ_update(**kwargs: str | None) -> Iterator:
     """Alter the environment during execution of a block."""
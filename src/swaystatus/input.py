@@ -1,67 +1,195 @@
 """Input is described in the CLICK EVENTS section of swaybar-protocol(7)."""
 
+import codecs
+import os
+import re
 import sys
-from collections.abc import Callable, Iterable, Iterator, Sequence
-from contextvars import copy_context
-from functools import cached_property
-from json import JSONDecoder
-from threading import Thread
-from typing import Any
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from contextvars import Context, copy_context
+from dataclasses import fields, replace
+from functools import cached_property, partial
+from json import JSONDecodeError, JSONDecoder
+from select import select
+from subprocess import Popen
+from threading import Condition, Thread
+from typing import Any, TextIO
 
 from .click_event import ClickEvent
 from .context import context_group
-from .element import BaseElement, UpdateHandler
+from .element import BaseElement, UpdateHandler, process_updater
 from .logger import logger
+from .stats import stats
+from .trace import tracer
 
 type Callback = Callable[..., Any]
 type ElementKey = tuple[str, str | None]
+type UpdateKey = tuple[BaseElement, int]
+type Fields = Mapping[str, Any]
+
+READ_SIZE = 65536
+CLICK_EVENT_FIELDS = frozenset(f.name for f in fields(ClickEvent))
+MAX_PENDING = 65536  # characters of an incomplete object to hold while waiting for the rest
+CONTENT = re.compile(r"[^\s,\[\]]")  # anything but what separates objects
+PARTIAL_TOKEN = re.compile(r"[\w.+-]*")  # what a literal or number cut short could look like
 
 
 class InputProcessor:
-    """Iterate handled click events received from stdin."""
+    """
+    Iterate handled click events received from stdin.
+
+    The number of click events received, and of those routed to an element,
+    are counted in `clicks_received` and `clicks_routed`, respectively.
+
+    Clicks that an element coalesces are held back by `coalescer` until their
+    window ends. Update handlers returned by click handlers are run by
+    `update_pool`. Processes started by click handlers aren't waited for by
+    any thread but the reaper's, which updates the element once one exits
+    successfully.
+    """
 
-    def __init__(self, elements: Sequence[BaseElement], updater: Callback) -> None:
+    def __init__(
+        self,
+        elements: Sequence[BaseElement],
+        updater: Callback,
+        update_pool: UpdatePool | None = None,
+    ) -> None:
         self._elements = elements
         self._updater = updater
+        self.update_pool = update_pool or UpdatePool()
+        self.coalescer = ClickCoalescer()
+        self.clicks_received = 0
+        self.clicks_routed = 0
 
     @cached_property
     def _element_lookup(self) -> dict[ElementKey, BaseElement]:
         return {(e.name, e.instance): e for e in self._elements}
 
-    def click_target(self, name: str, instance: str | None = None) -> BaseElement:
-        try:
-            return self._element_lookup[(name, instance)]
-        except KeyError:
-            return self._element_lookup[(name, None)]
+    def click_target(self, name: str, instance: str | None = None) -> BaseElement | None:
+        """Return the element with a name and instance, or else the one with just the name, if any."""
+        lookup = self._element_lookup
+        return lookup.get((name, instance)) or lookup.get((name, None))
 
-    def update(self) -> None:
+    def update(self, element: BaseElement) -> None:
         logger.info("updating")
+        element.invalidate()
         self._updater()
 
+    def route(self, click_fields: Fields) -> tuple[BaseElement, ClickEvent] | None:
+        """
+        Return the element that should handle a decoded click event, and the
+        click event itself, if there is one.
+
+        The element is looked up before the click event is built, so events
+        that can't be routed cost as little as possible. Unknown fields are
+        ignored.
+        """
+        with tracer.span("click", "route"):
+            self.clicks_received += 1
+            name, instance = click_fields.get("name"), click_fields.get("instance")
+            if not name:
+                logger.debug("%r", click_fields)
+                logger.warning("click event missing element name")
+                return None
+            element = None
+            if isinstance(name, str) and isinstance(instance, str | None):
+                element = self.click_target(name, instance)
+            if element is None:
+                logger.debug("%r", click_fields)
+                logger.warning("target element not found")
+                return None
+            try:
+                click_event = ClickEvent(**{k: v for k, v in click_fields.items() if k in CLICK_EVENT_FIELDS})
+            except TypeError:
+                logger.warning("invalid click event %r", click_fields)
+                return None
+            logger.info("received %s", click_event)
+            logger.debug("%r", click_event)
+            logger.info("sending to %s", element)
+            self.clicks_routed += 1
+            return element, click_event
+
     def __iter__(self) -> Iterator[ClickEvent]:
-        decoder = InputDecoder()
-        lines = iter(sys.stdin)
-        assert next(lines).strip() == "["
-        for line in lines:
+        parser = InputParser()
+        for data in read_chunks(sys.stdin, lambda: self.coalescer.timeout(time.monotonic())):
+            for click_fields in parser.feed(data):
+                with context_group("click event"):
+                    if (routed := self.route(click_fields)) and not self.coalescer.add(*routed, time.monotonic()):
+                        yield self._handle(*routed)
+            yield from self._handle_coalesced(time.monotonic())
+        yield from self._handle_coalesced()
+
+    def _handle_coalesced(self, now: float | None = None) -> Iterator[ClickEvent]:
+        for element, click_event in self.coalescer.due(now):
             with context_group("click event"):
-                click_event = decoder.decode(line.strip().lstrip(","))
-                logger.info("received %s", click_event)
-                logger.debug("%r", click_event)
-                if not click_event.name:
-                    logger.warning("click event missing element name")
-                    continue
-                try:
-                    element = self.click_target(click_event.name, click_event.instance)
-                except KeyError:
-                    logger.warning("target element not found")
-                    continue
-                logger.info("sending to %s", element)
-                update_request = element.on_click(click_event)
-                if callable(update_request):
-                    UpdateDriver(update_request, self.update).start()
-                elif update_request:
-                    self.update()
-                yield click_event
+                yield self._handle(element, click_event)
+
+    def _handle(self, element: BaseElement, click_event: ClickEvent) -> ClickEvent:
+        name = str(element)
+        start = time.perf_counter()
+        with tracer.span("click", name), process_updater.set(partial(self._process_exited, element, name, start)):
+            update_request = element.on_click(click_event)
+        if isinstance(update_request, Popen):
+            return click_event  # the reaper updates the element once the process exits
+        if callable(update_request):
+            update_handler = partial(timed_update, update_request, name, start)
+            self.update_pool.submit((element, click_event.button), update_handler, partial(self.update, element))
+            return click_event
+        stats.record("click", name, time.perf_counter() - start)
+        if update_request:
+            self.update(element)
+        return click_event
+
+    def _process_exited(self, element: BaseElement, name: str, start: float) -> None:
+        stats.record("click", name, time.perf_counter() - start)
+        self.update(element)
+
+
+class ClickCoalescer:
+    """
+    Merge the clicks of an element's button within the element's window for it.
+
+    A window starts at the first click held back, and every click within it
+    is merged into the last one, with its `count` set to the number of clicks
+    merged. The number of clicks merged into another is counted in
+    `coalesced`.
+    """
+
+    def __init__(self) -> None:
+        self._pending: dict[UpdateKey, tuple[float, BaseElement, ClickEvent, int]] = {}
+        self.coalesced = 0
+
+    def add(self, element: BaseElement, click_event: ClickEvent, now: float) -> bool:
+        """Hold a click back if its element coalesces clicks of its button, and return whether it was."""
+        if (window := element.coalesce.get(click_event.button)) is None:
+            return False
+        key = (element, click_event.button)
+        if pending := self._pending.get(key):
+            deadline, _, _, count = pending
+            self._pending[key] = (deadline, element, click_event, count + 1)
+            self.coalesced += 1
+        else:
+            self._pending[key] = (now + window, element, click_event, 1)
+        logger.debug("holding %s for %s", click_event, element)
+        return True
+
+    def due(self, now: float | None = None) -> list[tuple[BaseElement, ClickEvent]]:
+        """Remove and return the merged clicks whose windows have ended at `now` (or all of them)."""
+        result = []
+        for key, (deadline, element, click_event, count) in list(self._pending.items()):
+            if now is None or deadline <= now:
+                del self._pending[key]
+                if count > 1:
+                    logger.info("coalesced %d clicks for %s", count, element)
+                result.append((element, replace(click_event, count=count)))
+        return result
+
+    def timeout(self, now: float) -> float | None:
+        """Return how long until the next window ends, if any are open."""
+        if not self._pending:
+            return None
+        return max(min(deadline for deadline, *_ in self._pending.values()) - now, 0.0)
 
 
 class InputDriver(Thread):
@@ -76,27 +204,200 @@ class InputDriver(Thread):
             logger.debug("processed input %s", click_event)
 
 
-class InputDecoder(JSONDecoder):
-    """Deserialize a click event object from a JSON-encoded dictionary."""
+class InputParser:
+    """
+    Incrementally parse click event objects from the raw bytes of the input stream.
+
+    The stream is a JSON array of objects, but nothing is assumed about how
+    it's split into lines or reads. Whatever separates the objects (brackets,
+    commas, and whitespace) is skipped, and each object is decoded as soon as
+    it's complete. A malformed object is skipped with a warning, up to the
+    next object. An incomplete object is held for at most `MAX_PENDING`
+    characters.
+    """
 
     def __init__(self) -> None:
-        super().__init__(object_hook=lambda kwargs: ClickEvent(**kwargs))
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._json_decoder = JSONDecoder()
+        self._buffer = ""
 
+    def feed(self, data: bytes) -> Iterator[Fields]:
+        """Yield the objects completed by another chunk of the stream."""
+        buffer = self._buffer + self._text_decoder.decode(data)
+        pos = 0
+        while match := CONTENT.search(buffer, pos):
+            pos = match.start()
+            try:
+                with tracer.span("click", "decode"):
+                    obj, end = self._json_decoder.raw_decode(buffer, pos)
+            except JSONDecodeError as e:
+                if incomplete(e):
+                    break  # wait for more
+                if (end := buffer.find("{", max(e.pos, pos + 1))) < 0:
+                    end = len(buffer)
+                logger.warning("invalid click event %r", buffer[pos:end].rstrip(", \t\r\n"))
+            else:
+                if isinstance(obj, dict):
+                    yield obj
+                else:
+                    logger.warning("invalid click event %r", obj)
+            pos = end
+        else:
+            pos = len(buffer)
+        if len(buffer) - pos > MAX_PENDING:
+            logger.warning("discarded %d characters of an incomplete click event", len(buffer) - pos)
+            pos = len(buffer)
+        self._buffer = buffer[pos:]
 
-class UpdateDriver(Thread):
-    """Handle an update request concurrently with processing."""
 
-    def __init__(self, update_handler: UpdateHandler, updater: Callback) -> None:
-        super().__init__(name="UpdateThread", daemon=True, context=copy_context())
-        self._update_handler = update_handler
-        self._updater = updater
+def incomplete(error: JSONDecodeError) -> bool:
+    """Return whether decoding failed only because the document ends too soon."""
+    doc, pos = error.doc, error.pos
+    if pos >= len(doc) or error.msg.startswith("Unterminated string"):
+        return True
+    if error.msg.startswith("Invalid \\uXXXX escape"):
+        return len(doc) - pos < 6
+    return PARTIAL_TOKEN.fullmatch(doc, pos) is not None
 
-    def run(self) -> None:
-        if self._update_handler():
-            self._updater()
+
+def timed_update(update_handler: UpdateHandler, name: str, start: float) -> Any:
+    """
+    Handle an update request, recording the time since its click started to
+    be handled, as the asyncio engine does for the click and its request.
+    """
+    try:
+        return update_handler()
+    finally:
+        stats.record("click", name, time.perf_counter() - start)
+
+
+def read_chunks(stream: TextIO, timeout: Callable[[], float | None] = lambda: None) -> Iterator[bytes]:
+    """
+    Yield raw chunks read from a stream until it ends, straight from its file
+    descriptor if it has one. While waiting longer than `timeout` seconds
+    (if set) for a chunk, an empty one is yielded.
+    """
+    try:
+        fd = stream.fileno()
+    except AttributeError, OSError:
+        yield from iter(lambda: stream.read(READ_SIZE).encode(), b"")
+        return
+    while True:
+        try:
+            ready = select([fd], [], [], timeout())[0]
+            data = os.read(fd, READ_SIZE) if ready else b""
+        except OSError as e:  # closed under us, e.g. while shutting down
+            logger.debug("stopped reading input: %s", e)
+            return
+        if ready and not data:
+            return
+        yield data
+
+
+class UpdatePool:
+    """
+    Handle update requests concurrently with processing, on at most `size` threads.
+
+    Threads are started as needed and reused. Processes started by click
+    handlers never get here (see `Reaper`), so only update handlers that
+    block themselves can keep a thread busy. Requests are keyed by element
+    and button, and at most `max_queue` of them wait for a thread. When a
+    request arrives while another with the same key is still waiting, the
+    `policy` decides what happens: "merge" replaces the waiting request with
+    the new one, and "drop" ignores the new one (as it also does while one
+    with the same key is running). A request that doesn't fit in the queue
+    is dropped.
+
+    The number of requests submitted, merged, dropped, and completed are
+    counted in the attributes of the same names.
+    """
+
+    def __init__(self, size: int = 4, max_queue: int = 16, policy: str = "merge") -> None:
+        self.size = size
+        self.max_queue = max_queue
+        self.policy = policy
+        self.submitted = 0
+        self.merged = 0
+        self.dropped = 0
+        self.completed = 0
+        self._queue: OrderedDict[UpdateKey, tuple[UpdateHandler, Callback, Context]] = OrderedDict()
+        self._running: Counter[UpdateKey] = Counter()
+        self._threads: list[Thread] = []
+        self._idle = 0
+        self._closed = False
+        self._condition = Condition()
+
+    def submit(self, key: UpdateKey, update_handler: UpdateHandler, updater: Callback) -> bool:
+        """Call `updater` if `update_handler` returns true, unless the request is dropped."""
+        with self._condition:
+            self.submitted += 1
+            if key in self._queue and self.policy == "merge":
+                self._queue[key] = (update_handler, updater, copy_context())
+                self.merged += 1
+                logger.info("merged update request for %s", key[0])
+                return True
+            if key in self._queue or (self.policy == "drop" and key in self._running):
+                self.dropped += 1
+                logger.info("dropped update request for %s", key[0])
+                return False
+            if len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                logger.warning("dropped update request for %s, queue is full", key[0])
+                return False
+            self._queue[key] = (update_handler, updater, copy_context())
+            if not self._idle and len(self._threads) < self.size:
+                thread = Thread(target=self._work, name=f"UpdateThread.{len(self._threads)}", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            self._condition.notify()
+            return True
+
+    def shutdown(self) -> None:
+        """Stop the threads after they finish the requests already waiting."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    @property
+    def threads(self) -> int:
+        return len(self._threads)
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                self._idle += 1
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                self._idle -= 1
+                if not self._queue:
+                    return
+                key, (update_handler, updater, context) = self._queue.popitem(last=False)
+                self._running[key] += 1
+            try:
+                context.run(self._handle, update_handler, updater)
+            finally:
+                with self._condition:
+                    self._running[key] -= 1
+                    if not self._running[key]:
+                        del self._running[key]
+                    self.completed += 1
+
+    @staticmethod
+    def _handle(update_handler: UpdateHandler, updater: Callback) -> None:
+        try:
+            if update_handler():
+                updater()
+        except Exception:
+            logger.exception("unhandled exception in update handler")
 
 
 __all__ = [
+    ClickCoalescer.__name__,
     InputProcessor.__name__,
+    UpdatePool.__name__,
     InputDriver.__name__,
 ]
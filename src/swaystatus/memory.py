@@ -0,0 +1,111 @@
+"""Tracking of memory use over the life of a long running daemon."""
+
+import gc
+import os
+import sys
+import threading
+import tracemalloc
+from pathlib import Path
+
+from .logger import logger
+from .threads import Ticker
+
+type Number = float | int
+
+TRACEBACK_LIMIT = 10
+TOP_SITES = 10
+
+PACKAGE_DIR = str(Path(__file__).parent)
+
+
+class MemoryMonitor(Ticker):
+    """
+    Log what has been allocating memory every `interval` seconds.
+
+    Memory allocations are traced from the time the monitor starts. Each
+    tick, a snapshot of them is compared with the previous one, and the
+    `top` allocation sites that grew the most are logged, along with how
+    much of the growth was allocated by swaystatus itself or elsewhere (e.g.
+    by element modules or the libraries they use). The resident set size,
+    number of threads, number of modules loaded, and number of objects
+    tracked by the garbage collector are logged too.
+    """
+
+    def __init__(self, interval: Number, top: int = TOP_SITES) -> None:
+        super().__init__(interval=interval, name="MemoryThread", daemon=True)
+        self.top = top
+        self.snapshot: tracemalloc.Snapshot | None = None
+
+    def run(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEBACK_LIMIT)
+        self.tick()
+        super().run()
+
+    def tick(self) -> None:
+        snapshot = take_snapshot()
+        logger.info(
+            "memory: rss %s, traced %s, %d thread(s), %d module(s), %d object(s)",
+            format_size(resident_memory()),
+            format_size(tracemalloc.get_traced_memory()[0]),
+            threading.active_count(),
+            len(sys.modules),
+            len(gc.get_objects()),
+        )
+        if self.snapshot:
+            stats = snapshot.compare_to(self.snapshot, "lineno")
+            own = sum(stat.size_diff for stat in stats if is_own(stat.traceback))
+            other = sum(stat.size_diff for stat in stats) - own
+            logger.info("memory growth: %s in swaystatus, %s elsewhere", format_size(own), format_size(other))
+            for stat in stats[: self.top]:
+                if stat.size_diff > 0:
+                    logger.info("memory growth: %s", stat)
+        self.snapshot = snapshot
+
+    def stop(self) -> None:
+        super().stop()
+        if self.is_alive():
+            self.join()  # let a snapshot in progress finish before tracing stops
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def take_snapshot() -> tracemalloc.Snapshot:
+    """Take a snapshot of traced memory, ignoring what tracing itself allocated."""
+    return tracemalloc.take_snapshot().filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+    )
+
+
+def is_own(traceback: tracemalloc.Traceback) -> bool:
+    """Return whether an allocation was made by swaystatus itself."""
+    return traceback[0].filename.startswith(PACKAGE_DIR)
+
+
+def format_size(size: int | None) -> str:
+    """Return a number of bytes in the largest binary unit that keeps it above one."""
+    if size is None:
+        return "unknown"
+    if abs(size) < 1024:
+        return f"{size} B"
+    value = size / 1024
+    for unit in ["KiB", "MiB"]:
+        if abs(value) < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GiB"
+
+
+def resident_memory() -> int | None:
+    """Return the resident set size of this process in bytes, if it can be determined."""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError, ValueError, IndexError:
+        return None
+
+
+__all__ = [MemoryMonitor.__name__]
@@ -0,0 +1,178 @@
+"""Metrics about a running daemon in the Prometheus text exposition format."""
+
+import threading
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from socketserver import ThreadingMixIn, UnixStreamServer
+from threading import Thread
+from typing import Any
+
+from .element import LoggedProcess
+from .input import InputProcessor
+from .logger import logger
+from .memory import resident_memory
+from .output import OutputProcessor
+from .reaper import reaper
+from .stats import Histogram, stats
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+QUANTILES = [0.5, 0.9, 0.99]
+
+
+class Metrics:
+    """Collect metrics from the processors of a daemon, and from the process itself."""
+
+    def __init__(self, output_processor: OutputProcessor, input_processor: InputProcessor | None = None) -> None:
+        self.output_processor = output_processor
+        self.input_processor = input_processor
+
+    def collect(self) -> str:
+        return "".join(f"{line}\n" for line in self._lines())
+
+    def _lines(self) -> Iterator[str]:
+        output = self.output_processor
+        yield from counter("status_lines_sent", "Status lines sent to swaybar.", output.lines_sent)
+        yield from counter(
+            "status_lines_suppressed", "Status lines not sent for being unchanged.", output.lines_suppressed
+        )
+        yield from counter(
+            "status_lines_coalesced", "Status lines replaced by a newer one before being sent.", output.lines_coalesced
+        )
+        yield from counter(
+            "status_lines_dropped", "Status lines abandoned because swaybar went away.", output.lines_dropped
+        )
+        yield from summary(
+            "status_line_seconds",
+            "Time taken to generate a status line.",
+            [({}, h)] if (h := stats.histogram("status line", "all elements")) else [],
+        )
+        yield from summary(
+            "blocks_seconds",
+            "Time taken by an element to produce its blocks.",
+            [({"element": name}, h) for name, h in stats.histograms("blocks")],
+        )
+        if input_processor := self.input_processor:
+            yield from counter(
+                "click_events_received", "Click events received from swaybar.", input_processor.clicks_received
+            )
+            yield from counter("click_events_routed", "Click events sent to an element.", input_processor.clicks_routed)
+            yield from counter(
+                "click_events_coalesced",
+                "Click events merged into a later one.",
+                input_processor.coalescer.coalesced,
+            )
+            yield from summary(
+                "click_handler_seconds",
+                "Time taken by an element to handle a click event.",
+                [({"element": name}, h) for name, h in stats.histograms("click")],
+            )
+            pool = input_processor.update_pool
+            yield from counter("update_requests_submitted", "Update requests made by click handlers.", pool.submitted)
+            yield from counter("update_requests_merged", "Update requests replacing a waiting one.", pool.merged)
+            yield from counter("update_requests_dropped", "Update requests ignored or not fitting.", pool.dropped)
+            yield from counter("update_requests_completed", "Update requests run to completion.", pool.completed)
+            yield from gauge("update_requests_queued", "Update requests waiting for a thread.", pool.queued)
+            yield from gauge("update_threads", "Threads started to run update requests.", pool.threads)
+        yield from counter("processes_spawned", "Shell commands started.", LoggedProcess.spawned)
+        yield from gauge("processes_running", "Shell commands not done yet.", reaper.watching)
+        yield from gauge("threads", "Threads currently alive.", threading.active_count())
+        if (rss := resident_memory()) is not None:
+            yield from gauge("resident_memory_bytes", "Resident set size of the process.", rss)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    server: UnixHTTPServer
+
+    def do_GET(self) -> None:
+        body = self.server.metrics.collect().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self) -> str:
+        return str(self.server.server_address)  # clients of a Unix socket have no address of their own
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"metrics request from %s: {format}", self.address_string(), *args)
+
+
+class UnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: Path, metrics: Metrics) -> None:
+        super().__init__(str(path), MetricsHandler)
+        self.metrics = metrics
+
+
+class MetricsServer:
+    """
+    Serve metrics over HTTP on a Unix socket at `path`, for example:
+
+        curl --unix-socket /path/to/socket http://localhost/metrics
+
+    Any stale socket left at `path` is replaced, and the socket is removed
+    when the server stops.
+    """
+
+    def __init__(self, path: Path, metrics: Metrics) -> None:
+        self.path = path
+        self.metrics = metrics
+        self._server: UnixHTTPServer | None = None
+
+    def start(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.unlink(missing_ok=True)
+            self._server = UnixHTTPServer(self.path, self.metrics)
+        except OSError:
+            logger.exception("unable to serve metrics")
+            return
+        Thread(target=self._server.serve_forever, name="MetricsThread", daemon=True).start()
+        logger.info("serving metrics on %s", self.path)
+
+    def stop(self) -> None:
+        if server := self._server:
+            self._server = None
+            server.shutdown()
+            server.server_close()
+            self.path.unlink(missing_ok=True)
+
+
+def counter(name: str, help: str, value: int) -> Iterator[str]:
+    yield from header(f"{name}_total", help, "counter")
+    yield f"swaystatus_{name}_total {value}"
+
+
+def gauge(name: str, help: str, value: int | float) -> Iterator[str]:
+    yield from header(name, help, "gauge")
+    yield f"swaystatus_{name} {value}"
+
+
+def summary(name: str, help: str, histograms: list[tuple[dict[str, str], Histogram]]) -> Iterator[str]:
+    yield from header(name, help, "summary")
+    for labels, h in histograms:
+        for q in QUANTILES:
+            yield f"swaystatus_{name}{format_labels({**labels, 'quantile': str(q)})} {h.percentile(q * 100)}"
+        yield f"swaystatus_{name}_sum{format_labels(labels)} {h.total}"
+        yield f"swaystatus_{name}_count{format_labels(labels)} {h.count}"
+
+
+def header(name: str, help: str, type: str) -> Iterator[str]:
+    yield f"# HELP swaystatus_{name} {help}"
+    yield f"# TYPE swaystatus_{name} {type}"
+
+
+def format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in labels.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped, strict=True)) + "}"
+
+
+__all__ = [
+    Metrics.__name__,
+    MetricsServer.__name__,
+]
@@ -38,6 +38,7 @@ from uuid import uuid4
 
 from .element import BaseElement
 from .logger import logger
+from .startup import startup
 
 
 class ModuleNotFound(Exception):
@@ -59,17 +60,19 @@ class Registry:
     def packages(self) -> list[str]:
         """Return recognized package names in order of preference."""
         result = []
-        for package_dir in self.include:
-            if (init_file := package_dir / "__init__.py").is_file():
-                package_name = str(uuid4()).replace("-", "")
-                if spec := spec_from_file_location(package_name, init_file):
-                    package = module_from_spec(spec)
-                    sys.modules[package_name] = package
-                    if spec.loader:
-                        spec.loader.exec_module(package)
-                        result.append(package_name)
-        for entry_point in metadata.entry_points(group="swaystatus.modules"):
-            result.append(entry_point.load().__name__)
+        with startup.phase("packages"):
+            for package_dir in self.include:
+                if (init_file := package_dir / "__init__.py").is_file():
+                    package_name = str(uuid4()).replace("-", "")
+                    if spec := spec_from_file_location(package_name, init_file):
+                        package = module_from_spec(spec)
+                        sys.modules[package_name] = package
+                        if spec.loader:
+                            spec.loader.exec_module(package)
+                            result.append(package_name)
+        with startup.phase("entry points"):
+            for entry_point in metadata.entry_points(group="swaystatus.modules"):
+                result.append(entry_point.load().__name__)
         return result
 
     def find(self, name: str) -> type[BaseElement]:
@@ -1,8 +1,9 @@
 """Output is described in the HEADER and BODY sections of swaybar-protocol(7)."""
 
-import sys
+import asyncio
 import time
-from collections.abc import Iterable, Iterator, Sequence
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable, Iterator, Sequence
+from concurrent.futures import Future
 from functools import cached_property
 from json import JSONEncoder
 from signal import SIGCONT, SIGSTOP
@@ -11,17 +12,82 @@ from typing import Any
 from .block import Block
 from .element import BaseElement
 from .logger import logger
-from .threads import Ticker
+from .scheduler import Scheduler
+from .startup import startup
+from .stats import stats
+from .threads import Interval, Ticker, WorkerPool
+from .trace import tracer
+from .writer import PipeWriter, StdoutWriter
 
 type Number = float | int
+type Rendered = tuple[list[Block], float]
 
 
 class OutputProcessor:
-    """Iterate status lines sent to stdout."""
+    """
+    Iterate status lines sent to stdout.
 
-    def __init__(self, elements: Sequence[BaseElement], click_events: bool) -> None:
+    If `suppress_unchanged` is set, a status line that is identical to the
+    previous one is not sent, unless `keepalive` seconds have passed since the
+    last one was sent. A status line is generated at least that often, even if
+    no element is due to refresh. The number of lines sent and suppressed are
+    counted in `lines_sent` and `lines_suppressed`, respectively.
+
+    If `render_workers` is set, elements are refreshed concurrently by that
+    many threads. An element that doesn't finish within its time budget (its
+    own `timeout` or `render_timeout`) keeps its previous blocks, and the
+    result is used once it's ready.
+
+    If `watchdog_budget` is set, an element whose blocks take longer than that
+    many seconds to produce `watchdog_strikes` times in a row is moved to a
+    background lane. It keeps its previous blocks until each refresh finishes
+    on a thread of its own, so it never holds up the status line. It moves
+    back once it has been within budget as many times in a row.
+
+    Lines are written to stdout by `writer`, which defaults to writing them
+    synchronously. A `PipeWriter` never blocks status line generation, and
+    only delivers the latest status line to a reader that falls behind.
+    """
+
+    def __init__(
+        self,
+        elements: Sequence[BaseElement],
+        click_events: bool,
+        interval: Number | None = None,
+        *,
+        suppress_unchanged: bool = False,
+        keepalive: Number | None = None,
+        render_workers: int | None = None,
+        render_timeout: Number | None = None,
+        watchdog_budget: Number | None = None,
+        watchdog_strikes: int = 3,
+        writer: StdoutWriter | PipeWriter | None = None,
+    ) -> None:
         self._elements = elements
         self._click_events = click_events
+        self._suppress_unchanged = suppress_unchanged
+        self._keepalive = keepalive
+        self._render_pool = WorkerPool(render_workers, name="RenderThread") if render_workers else None
+        self._render_timeout = render_timeout
+        self._watchdog_budget = watchdog_budget
+        self._watchdog_strikes = watchdog_strikes
+        self._background_pool: WorkerPool | None = None
+        self._demoted: set[int] = set()
+        self._demoted_before: set[int] = set()
+        self._strikes = [0] * len(elements)
+        self._scheduler = Scheduler([e.interval or interval for e in elements], [e.align for e in elements])
+        self._blocks: list[Sequence[Block]] = [[] for _ in elements]
+        self._fragments: list[tuple[tuple, str]] = [((), "")] * len(elements)
+        self._changed: set[int] = set()
+        self._pending: dict[int, tuple[float, Future[Rendered] | asyncio.Future[Rendered]]] = {}
+        self._late: set[int] = set()
+        self._encoder = OutputEncoder()
+        self._writer = writer or StdoutWriter()
+        self._closed = False
+        self._line_last: str | None = None
+        self._sent_last = float("-inf")
+        self.lines_sent = 0
+        self.lines_suppressed = 0
 
     @cached_property
     def header(self) -> dict[str, Any]:
@@ -32,31 +98,222 @@ class OutputProcessor:
             "click_events": self._click_events,
         }
 
+    def refresh(self) -> None:
+        """Make every element refresh its blocks for the next status line."""
+        self._scheduler.expire()
+
+    def timeout(self) -> float | None:
+        """Return the seconds until an element is next due to refresh, or a keepalive is due, if ever."""
+        now = time.monotonic()
+        timeout = self._scheduler.timeout(now)
+        if self._keepalive is not None:
+            keepalive = max(self._sent_last + self._keepalive - now, 0.0)
+            timeout = keepalive if timeout is None else min(timeout, keepalive)
+        return timeout
+
+    def _due(self) -> Iterator[tuple[int, BaseElement]]:
+        due = self._scheduler.due(time.monotonic())
+        for i, element in enumerate(self._elements):
+            if i in self._pending:
+                continue  # stays invalidated, if it is, until the refresh in progress is done
+            if i in due or element.invalidated:
+                element.invalidated = False
+                yield i, element
+
     def status_line(self) -> Sequence[Block]:
-        return [b for e in self._elements for b in e.blocks()]
+        for i, element in self._due():
+            if pool := self._pool(i):
+                self._pending[i] = (time.monotonic(), pool.submit(timed, render, element))
+            else:
+                self._set_rendered(i, timed(render, element))
+        for i in sorted(self._pending):
+            started, future = self._pending[i]
+            assert isinstance(future, Future)  # only `status_line_async` leaves asyncio futures pending
+            try:
+                self._set_rendered(i, future.result(timeout=self._remaining(i, started)))
+            except TimeoutError:
+                self._late_notice(i, future)
+                continue
+            del self._pending[i]
+            self._late.discard(i)
+        return [b for blocks in self._blocks for b in blocks]
 
-    def __iter__(self) -> Iterator[Sequence[Block]]:
-        def send(line: str) -> None:
-            print(line, file=sys.stdout, flush=True)
+    async def status_line_async(self) -> Sequence[Block]:
+        """Like `status_line`, but refresh asynchronous elements concurrently on the running event loop."""
+        for i, element in self._due():
+            future: asyncio.Future[Rendered]
+            if isinstance(blocks := element.blocks(), AsyncIterator):
+                future = asyncio.ensure_future(timed_async(collect_timed(element, blocks)))
+            elif pool := self._pool(i):
+                future = asyncio.wrap_future(pool.submit(timed, list_timed, element, blocks))
+            else:
+                self._set_rendered(i, timed(list_timed, element, blocks))
+                continue
+            self._pending[i] = (time.monotonic(), future)
+        for i in sorted(self._pending):
+            started, pending = self._pending[i]
+            assert isinstance(pending, asyncio.Future)  # only `status_line` leaves concurrent futures pending
+            try:
+                rendered = await asyncio.wait_for(asyncio.shield(pending), self._remaining(i, started))
+            except TimeoutError:
+                self._late_notice(i, pending)
+                continue
+            self._set_rendered(i, rendered)
+            del self._pending[i]
+            self._late.discard(i)
+        return [b for blocks in self._blocks for b in blocks]
+
+    def _pool(self, i: int) -> WorkerPool | None:
+        return self._background_pool if i in self._demoted else self._render_pool
+
+    def _set_rendered(self, i: int, rendered: Rendered) -> None:
+        blocks, seconds = rendered
+        self._blocks[i] = blocks
+        self._changed.add(i)
+        if self._watchdog_budget is not None:
+            self._watch(i, seconds)
+
+    def _watch(self, i: int, seconds: float) -> None:
+        """Move an element between lanes once it has been consistently slow or fast."""
+        assert self._watchdog_budget is not None
+        if (seconds > self._watchdog_budget) == (i in self._demoted):
+            self._strikes[i] = 0
+            return
+        self._strikes[i] += 1
+        if self._strikes[i] < self._watchdog_strikes:
+            return
+        self._strikes[i] = 0
+        element = self._elements[i]
+        if i in self._demoted:
+            self._demoted.remove(i)
+            self._resize_background_pool()
+            logger.info("%s is within its budget again, refreshing it in the foreground", element)
+            return
+        self._demoted.add(i)
+        self._resize_background_pool()
+        log = logger.info if i in self._demoted_before else logger.warning
+        self._demoted_before.add(i)
+        log(
+            "%s took %f seconds to produce blocks (budget: %s), refreshing it in the background",
+            element,
+            seconds,
+            self._watchdog_budget,
+        )
+
+    def _resize_background_pool(self) -> None:
+        """Allow a background thread for every element currently demoted."""
+        if self._background_pool:
+            self._background_pool.size = max(len(self._demoted), 1)
+        elif self._demoted:
+            self._background_pool = WorkerPool(len(self._demoted), name="BackgroundThread")
+
+    def _remaining(self, i: int, started: float) -> float | None:
+        if i in self._demoted:
+            return 0.0
+        budget = self._elements[i].timeout or self._render_timeout
+        return None if budget is None else max(started + budget - time.monotonic(), 0.0)
+
+    def _late_notice(self, i: int, future: Future[Rendered] | asyncio.Future[Rendered]) -> None:
+        if i in self._late:
+            return
+        self._late.add(i)
+        element = self._elements[i]
+        if i not in self._demoted:
+            logger.warning("%s exceeded its time budget, using previous blocks", element)
+        if updater := element.updater:
+
+            def update(_: object) -> None:
+                updater()
+
+            future.add_done_callback(update)
+
+    def send_header(self) -> None:
+        """Send the header and the opening of the infinite array of status lines."""
+        self._writer.open()
+        self._writer.write(self._encoder.encode(self.header))
+        self._writer.write("[[]")
+
+    def encode_status_line(self) -> str:
+        """
+        Return the encoding of the blocks from the last status line.
+
+        The encoding of each element's blocks is cached, and only elements
+        whose blocks changed since the last time are encoded again.
+        """
+        with tracer.span("output", "encode"):
+            for i in self._changed:
+                key = tuple(block.values() for block in self._blocks[i])
+                if key != self._fragments[i][0]:
+                    self._fragments[i] = (key, self._encoder.encode_fragment(self._blocks[i]))
+            self._changed.clear()
+            return f"[{', '.join([fragment for _, fragment in self._fragments if fragment])}]"
+
+    def send_status_line(self) -> None:
+        """Send the last status line, unless it's suppressed for being unchanged."""
+        line = f",{self.encode_status_line()}"
+        now = time.monotonic()
+        if (
+            self._suppress_unchanged
+            and line == self._line_last
+            and (self._keepalive is None or now - self._sent_last < self._keepalive)
+        ):
+            self.lines_suppressed += 1
+            logger.info("suppressed unchanged status line (%d so far)", self.lines_suppressed)
+        else:
+            with tracer.span("output", "send"):
+                self._writer.write(line, droppable=True)
+            self._line_last = line
+            self._sent_last = now
+            self.lines_sent += 1
 
+    @property
+    def lines_coalesced(self) -> int:
+        return self._writer.lines_coalesced
+
+    @property
+    def lines_dropped(self) -> int:
+        return self._writer.lines_dropped
+
+    def close(self, timeout: Number | None = None) -> None:
+        """Finish writing status lines and log how many of them were delivered."""
+        if self._closed:
+            return
+        self._closed = True
+        self._writer.close(timeout=timeout)
+        logger.info(
+            "sent %d status line(s), suppressed %d unchanged, coalesced %d, dropped %d",
+            self.lines_sent,
+            self.lines_suppressed,
+            self.lines_coalesced,
+            self.lines_dropped,
+        )
+
+    def __iter__(self) -> Iterator[Sequence[Block]]:
         timer = Timer()
-        encoder = OutputEncoder()
-        send(encoder.encode(self.header))
-        send("[[]")
+        self.send_header()
         while True:
             with timer:
                 blocks = list(self.status_line())
-            send(f",{encoder.encode(blocks)}")
             logger.info("generated status line in %f seconds", timer.seconds)
+            stats.record("status line", "all elements", timer.seconds)
             logger.debug("status line %r", blocks)
+            self.send_status_line()
+            if not startup.finished:
+                startup.record("first status line", timer.start, timer.start + timer.seconds)
+                startup.finish()
             yield blocks
 
 
 class OutputDriver(Ticker):
     """Steadily drive status line generation."""
 
-    def __init__(self, iterable: Iterable[Sequence[Block]], interval: Number | None) -> None:
-        super().__init__(interval=interval, name="OutputThread")
+    def __init__(
+        self,
+        iterable: Iterable[Sequence[Block]],
+        interval: Interval | None,
+        min_interval: Number | None = None,
+    ) -> None:
+        super().__init__(interval=interval, min_interval=min_interval, name="OutputThread")
         self._iterator = iter(iterable)
 
     def tick(self) -> None:
@@ -66,9 +323,60 @@ class OutputDriver(Ticker):
 class OutputEncoder(JSONEncoder):
     """Serialize a block as a compact JSON-encoded dictionary."""
 
+    def __init__(self) -> None:
+        super().__init__(ensure_ascii=False)
+
     def default(self, o):
         return o.min_dict()
 
+    def encode_blocks(self, blocks: Iterable[Block]) -> str:
+        """Serialize a status line, skipping the generic encoder's dispatch for every block."""
+        return f"[{self.encode_fragment(blocks)}]"
+
+    def encode_fragment(self, blocks: Iterable[Block]) -> str:
+        """Serialize blocks as a part of a status line, i.e. without the enclosing brackets."""
+        return ", ".join([block.encode() for block in blocks])
+
+
+def render(element: BaseElement) -> list[Block]:
+    """Return the blocks currently produced by an element."""
+    if isinstance(blocks := element.blocks(), AsyncIterator):
+        return asyncio.run(collect_timed(element, blocks))
+    return list_timed(element, blocks)
+
+
+def timed[T](function: Callable[..., T], /, *args: Any) -> tuple[T, float]:
+    """Return the result of calling a function and how many seconds it took."""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+async def timed_async[T](awaitable: Awaitable[T]) -> tuple[T, float]:
+    """Like `timed`, but for an awaitable."""
+    start = time.perf_counter()
+    result = await awaitable
+    return result, time.perf_counter() - start
+
+
+def list_timed(element: BaseElement, blocks: Iterator[Block]) -> list[Block]:
+    """Return the blocks from an element, recording how long it took to produce them."""
+    name = str(element)
+    with stats.timed("blocks", name), tracer.span("blocks", name):
+        return list(blocks)
+
+
+async def collect_timed(element: BaseElement, blocks: AsyncIterator[Block]) -> list[Block]:
+    """Like `list_timed`, but for an element producing blocks asynchronously."""
+    name = str(element)
+    with stats.timed("blocks", name), tracer.span("blocks", name):
+        return await collect(blocks)
+
+
+async def collect[T](iterator: AsyncIterator[T]) -> list[T]:
+    """Return the items from an asynchronous iterator."""
+    return [item async for item in iterator]
+
 
 class Timer:
     """Context manager to time the execution of the body."""
@@ -0,0 +1,110 @@
+"""Deterministic profiling of every thread in the daemon."""
+
+import pstats
+import sys
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from profile import Profile
+from threading import Lock
+from types import FrameType
+from typing import Any, ClassVar
+
+from .logger import logger
+
+type Function = tuple[str, int, str]  # filename, line number, and name
+
+
+class ThreadProfile(Profile):
+    """
+    A profile of a single thread, which can be taken while the thread runs.
+
+    Profiling may start in the middle of a call stack, so returns from frames
+    older than the first one profiled are ignored.
+    """
+
+    # Internals of `Profile` that its type stubs leave out.
+    cur: tuple[Any, ...] | None
+    timings: dict[Function, tuple[int, int, float, float, dict[Function, int]]]
+    dispatcher: Callable[[FrameType, str, Any], int]
+
+    def trace_dispatch_return(self, frame: FrameType, t: float) -> int:
+        if self.cur is None or self.cur[-1] is None:  # returning from a frame older than the profile
+            return 0
+        return super().trace_dispatch_return(frame, t)  # type: ignore[misc]  # missing from the stubs
+
+    dispatch = {
+        **Profile.dispatch,  # type: ignore[attr-defined]  # missing from the stubs
+        "return": trace_dispatch_return,
+        "c_return": trace_dispatch_return,
+    }
+
+    def create_stats(self) -> None:
+        self.snapshot_stats()
+
+    def snapshot_stats(self) -> None:
+        """Convert timings for the calls that have returned so far, leaving the ones in progress alone."""
+        self.stats = {}
+        for func, (cc, _, tt, ct, callers) in self.timings.copy().items():
+            callers = callers.copy()
+            # The stubs describe cProfile's stats, whose callers map to tuples rather than call counts.
+            self.stats[func] = cc, sum(callers.values()), tt, ct, callers  # type: ignore[assignment]
+
+
+class Profiler:
+    """
+    Profile the calling thread and every thread started after it, and merge
+    the results into a single pstats file at `path`.
+
+    The standard `cProfile` can only profile one thread at a time, so every
+    thread gets its own pure Python profile instead. That's much slower, but
+    it's accurate for each thread.
+    """
+
+    running: ClassVar[Profiler | None] = None
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._profiles: list[ThreadProfile] = []
+        self._lock = Lock()
+
+    def _new_profile(self) -> ThreadProfile:
+        profile = ThreadProfile()
+        with self._lock:
+            self._profiles.append(profile)
+        return profile
+
+    def _start_thread(self, frame: FrameType, event: str, arg: Any) -> None:
+        profile = self._new_profile()
+        sys.setprofile(profile.dispatcher)
+        profile.dispatcher(frame, event, arg)
+
+    def runcall[T](self, function: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+        """Call a function while profiling it, along with any threads it starts."""
+        threading.setprofile(self._start_thread)
+        Profiler.running = self
+        try:
+            return self._new_profile().runcall(function, *args, **kwargs)
+        finally:
+            threading.setprofile(None)
+            Profiler.running = None
+
+    def stats(self) -> pstats.Stats | None:
+        with self._lock:
+            profiles = list(self._profiles)
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+    def dump(self) -> None:
+        """Write the calls profiled so far."""
+        if stats := self.stats():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            stats.dump_stats(self.path)
+            logger.info("wrote profile to %s", self.path)
+
+
+__all__ = [Profiler.__name__]
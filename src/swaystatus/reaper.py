@@ -0,0 +1,197 @@
+"""Logging the output of shell commands, and waiting for them to exit, on a single thread."""
+
+import os
+import selectors
+import time
+from collections.abc import Callable
+from contextlib import suppress
+from contextvars import Context, copy_context
+from subprocess import Popen
+from threading import Event, Lock, Thread
+from typing import IO, Any
+
+from .logger import logger
+from .trace import tracer
+
+type LineHandler = Callable[[str], None]
+type Updater = Callable[[], Any]
+
+POLL_INTERVAL = 0.1  # seconds, only used when a process can't be watched with a pidfd
+READ_SIZE = 65536
+
+
+class Watch:
+    """The state of a process being watched by the reaper."""
+
+    def __init__(self, process: Popen, context: Context, updater: Updater | None = None) -> None:
+        self.process = process
+        self.context = context
+        self.updater = updater
+        self.started = time.perf_counter_ns()
+        self.open_streams = 0
+        self.exited = False
+        self.done = Event()
+
+
+class Stream:
+    """A pipe from a process being watched, split into lines as they are read."""
+
+    def __init__(self, watch: Watch, file: IO, handler: LineHandler) -> None:
+        self.watch = watch
+        self.file = file
+        self.handler = handler
+        self.buffer = b""
+
+    def feed(self, data: bytes) -> None:
+        self.buffer += data
+        *lines, self.buffer = self.buffer.split(b"\n")
+        for line in lines:
+            self.emit(line)
+
+    def flush(self) -> None:
+        if self.buffer:
+            self.emit(self.buffer)
+            self.buffer = b""
+
+    def emit(self, line: bytes) -> None:
+        self.watch.context.run(self.handler, line.decode(errors="replace"))
+
+
+class Reaper:
+    """
+    Log the output of processes, and reap them when they exit, all on one thread.
+
+    Every pipe of every watched process is multiplexed with a selector, along
+    with a pidfd for each process that notifies when it exits (or, where
+    pidfds aren't available, the process is polled). A process is done once
+    it has exited and its pipes are closed. Lines are handled, the lifetime
+    of a process is traced, and a process that exits successfully is
+    followed by a call to its updater (if any), in the context in which the
+    process was watched. So nothing but this thread waits for a process to
+    finish.
+
+    The thread is started when the first process is watched, and stays idle
+    while there are none.
+    """
+
+    def __init__(self) -> None:
+        self._selector: selectors.BaseSelector | None = None
+        self._wakeup_read, self._wakeup_write = -1, -1
+        self._watches: set[Watch] = set()
+        self._polled: set[Watch] = set()
+        self._pending: list[tuple[Watch, list[tuple[IO, LineHandler]]]] = []
+        self._thread: Thread | None = None
+        self._lock = Lock()
+
+    @property
+    def watching(self) -> int:
+        """The number of processes not done yet."""
+        return len(self._watches) + len(self._pending)
+
+    def watch(
+        self,
+        process: Popen,
+        streams: list[tuple[IO, LineHandler]],
+        updater: Updater | None = None,
+    ) -> Event:
+        """
+        Watch a process, passing each line read from a stream to its handler,
+        and return an event set when done. Once done, `updater` is called if
+        the process exited with status 0.
+        """
+        watch = Watch(process, copy_context(), updater)
+        with self._lock:
+            self._pending.append((watch, streams))
+            if not self._thread:
+                self._selector = selectors.DefaultSelector()
+                self._wakeup_read, self._wakeup_write = os.pipe()
+                os.set_blocking(self._wakeup_write, False)
+                self._selector.register(self._wakeup_read, selectors.EVENT_READ, None)
+                self._thread = Thread(target=self._run, name="ReaperThread", daemon=True)
+                self._thread.start()
+        self._wakeup()
+        return watch.done
+
+    def _wakeup(self) -> None:
+        with suppress(BlockingIOError):  # already awake
+            os.write(self._wakeup_write, b"\0")
+
+    def _register(self) -> None:
+        assert self._selector
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for watch, streams in pending:
+            self._watches.add(watch)
+            for file, handler in streams:
+                self._selector.register(file, selectors.EVENT_READ, Stream(watch, file, handler))
+                watch.open_streams += 1
+            try:
+                pidfd = os.pidfd_open(watch.process.pid)
+            except AttributeError, OSError:
+                self._polled.add(watch)
+            else:
+                self._selector.register(pidfd, selectors.EVENT_READ, watch)
+
+    def _run(self) -> None:
+        assert self._selector
+        while True:
+            for key, _ in self._selector.select(POLL_INTERVAL if self._polled else None):
+                if key.data is None:
+                    os.read(self._wakeup_read, READ_SIZE)
+                    self._register()
+                elif isinstance(key.data, Stream):
+                    self._read(key.data)
+                else:
+                    self._selector.unregister(key.fd)
+                    os.close(key.fd)
+                    self._exit(key.data)
+            for watch in list(self._polled):
+                if watch.process.poll() is not None:
+                    self._polled.discard(watch)
+                    self._exit(watch)
+
+    def _read(self, stream: Stream) -> None:
+        assert self._selector
+        try:
+            data = os.read(stream.file.fileno(), READ_SIZE)
+        except OSError:
+            logger.exception("unable to read output of process %d", stream.watch.process.pid)
+            data = b""
+        if data:
+            stream.feed(data)
+            return
+        stream.flush()
+        self._selector.unregister(stream.file)
+        stream.file.close()
+        stream.watch.open_streams -= 1
+        self._check(stream.watch)
+
+    def _exit(self, watch: Watch) -> None:
+        watch.process.poll()
+        watch.exited = True
+        self._check(watch)
+
+    def _check(self, watch: Watch) -> None:
+        if watch.exited and not watch.open_streams:
+            self._watches.discard(watch)
+            process = watch.process
+            end = time.perf_counter_ns()
+            watch.context.run(tracer.record, "process", f"process {process.pid}", watch.started, end, args=process.args)
+            watch.done.set()
+            if watch.updater and process.returncode == 0:
+                watch.context.run(self._update, watch.updater)
+
+    @staticmethod
+    def _update(updater: Updater) -> None:
+        try:
+            updater()
+        except Exception:
+            logger.exception("unhandled exception in updater")
+
+
+reaper = Reaper()
+
+__all__ = [
+    Reaper.__name__,
+    "reaper",
+]
@@ -0,0 +1,150 @@
+"""Statistical profiling of a running daemon by sampling the stacks of its threads."""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from threading import Event, RLock, Thread
+from types import FrameType
+
+from .logger import logger
+from .stats import runtime_dir
+from .threads import Ticker
+
+type Number = float | int
+
+SAMPLE_DURATION = 10.0  # seconds
+SAMPLE_INTERVAL = 0.01  # seconds
+POLL_INTERVAL = 1.0  # seconds
+
+
+class Sampler(Thread):
+    """
+    Sample the stacks of every other thread for `duration` seconds.
+
+    The stacks are written to `path` as folded stacks (one line per distinct
+    stack, with frames separated by semicolons and followed by the number of
+    times it was seen), which most flame graph tools accept. The first frame
+    of each stack is the name of its thread.
+    """
+
+    def __init__(self, duration: Number, path: Path, interval: Number = SAMPLE_INTERVAL) -> None:
+        super().__init__(name="SamplerThread", daemon=True)
+        self.duration = duration
+        self.path = path
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._done = Event()
+
+    def sample(self) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident != self.ident:
+                self.samples[fold_stack(names.get(ident, f"Thread-{ident}"), frame)] += 1
+
+    def run(self) -> None:
+        logger.info("sampling threads for %s seconds", self.duration)
+        deadline = time.monotonic() + self.duration
+        while time.monotonic() < deadline and not self._done.wait(timeout=self.interval):
+            self.sample()
+        self.write()
+
+    def write(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text("".join(f"{stack} {count}\n" for stack, count in self.samples.most_common()))
+        except OSError:
+            logger.exception("unable to write samples")
+        else:
+            logger.info("wrote %d samples to %s", self.samples.total(), self.path)
+
+    def stop(self) -> None:
+        """Stop sampling early, still writing the samples taken."""
+        self._done.set()
+
+
+class SamplerControl(Ticker):
+    """
+    Start a sampler on request, or when a control file appears.
+
+    If `poll_interval` is set, the control file is checked for every that
+    many seconds. It may contain the number of seconds to sample for, and is
+    removed once read. Otherwise, no thread is started, and sampling only
+    starts on request. Only one sampler runs at a time.
+
+    A request can be made from a signal handler, even one interrupting
+    `stop` on the same thread.
+    """
+
+    def __init__(self, control_path: Path, samples_path: Path, poll_interval: Number | None = None) -> None:
+        super().__init__(interval=poll_interval, name="SamplerControlThread", daemon=True)
+        self.control_path = control_path
+        self.samples_path = samples_path
+        self.sampler: Sampler | None = None
+        self._sampler_lock = RLock()
+
+    def start(self) -> None:
+        if self.interval is not None:
+            super().start()
+
+    def tick(self) -> None:
+        try:
+            text = self.control_path.read_text().strip()
+        except FileNotFoundError:
+            return
+        except OSError:
+            logger.exception("unable to read sampler control file")
+            return
+        self.control_path.unlink(missing_ok=True)
+        try:
+            duration = float(text) if text else SAMPLE_DURATION
+        except ValueError:
+            logger.warning("invalid sampling duration in %s: %r", self.control_path, text)
+            return
+        self.trigger(duration)
+
+    def trigger(self, duration: Number = SAMPLE_DURATION) -> None:
+        """Start sampling for `duration` seconds, unless already sampling or stopped."""
+        with self._sampler_lock:
+            if self._done.is_set():
+                return
+            if self.sampler and self.sampler.is_alive():
+                logger.warning("already sampling threads")
+                return
+            self.sampler = Sampler(duration, self.samples_path)
+            self.sampler.start()
+
+    def stop(self) -> None:
+        super().stop()
+        with self._sampler_lock:
+            if self.sampler:
+                self.sampler.stop()
+
+
+def fold_stack(root: str, frame: FrameType | None) -> str:
+    """Return a stack as a single line of semicolon-separated frames, from oldest to newest."""
+    frames = []
+    while frame:
+        code = frame.f_code
+        frames.append(f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    frames.append(root)
+    return ";".join(reversed(frames))
+
+
+def sampler_control(watch: bool = False) -> SamplerControl:
+    """Return the control of this process's sampler, watching for its control file if `watch` is set."""
+    pid = os.getpid()
+    return SamplerControl(
+        runtime_dir() / f"sample.{pid}",
+        runtime_dir() / f"samples.{pid}",
+        POLL_INTERVAL if watch else None,
+    )
+
+
+__all__ = [
+    Sampler.__name__,
+    SamplerControl.__name__,
+]
@@ -0,0 +1,70 @@
+"""A scheduler decides which elements are due to refresh their blocks."""
+
+import heapq
+import math
+import time
+from collections.abc import Iterable, Sequence
+from threading import Lock
+
+type Number = float | int
+
+
+class Scheduler:
+    """
+    Track refresh deadlines for a sequence of intervals.
+
+    Deadlines are kept in a heap, so finding the intervals that are due only
+    touches the ones that actually expired. An index with no interval is only
+    due after it has been explicitly expired.
+
+    Each deadline follows from the previous one rather than from when it was
+    noticed, so late checks don't make the schedule drift. Deadlines missed
+    entirely are skipped instead of being caught up on.
+
+    An index marked in `align` has its deadlines aligned to multiples of its
+    interval on the wall clock, e.g. the top of every second or minute.
+    """
+
+    def __init__(self, intervals: Sequence[Number | None], align: Sequence[bool] = ()) -> None:
+        self._intervals = intervals
+        self._align = {i for i, aligned in enumerate(align) if aligned}
+        self._deadlines = [(float("-inf"), i) for i, interval in enumerate(intervals) if interval is not None]
+        self._expired = set(range(len(intervals)))
+        self._lock = Lock()
+
+    def expire(self, indices: Iterable[int] | None = None) -> None:
+        """Make the given indices (or every index) due at the next check."""
+        with self._lock:
+            self._expired.update(range(len(self._intervals)) if indices is None else indices)
+
+    def due(self, now: float) -> set[int]:
+        """Return the indices that are due at `now` and schedule their next deadlines."""
+        with self._lock:
+            result, self._expired = self._expired, set()
+            while self._deadlines and self._deadlines[0][0] <= now:
+                deadline, i = self._deadlines[0]
+                heapq.heapreplace(self._deadlines, (self._next_deadline(i, deadline, now), i))
+                result.add(i)
+        return result
+
+    def _next_deadline(self, i: int, deadline: float, now: float) -> float:
+        interval = self._intervals[i]
+        assert interval is not None
+        if i in self._align:
+            offset = time.time() - time.monotonic()
+            return (math.floor((now + offset) / interval) + 1) * interval - offset
+        if deadline == float("-inf"):
+            return now + interval
+        return deadline + (math.floor((now - deadline) / interval) + 1) * interval
+
+    def timeout(self, now: float) -> float | None:
+        """Return the seconds from `now` until the next index is due, if any."""
+        with self._lock:
+            if self._expired:
+                return 0.0
+            if not self._deadlines:
+                return None
+            return max(self._deadlines[0][0] - now, 0.0)
+
+
+__all__ = [Scheduler.__name__]
@@ -0,0 +1,100 @@
+"""Timing of the phases of starting up, until the first status line is sent."""
+
+import os
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from threading import Lock
+from typing import NamedTuple, TextIO
+
+from .logger import logger
+
+
+class Phase(NamedTuple):
+    name: str
+    depth: int
+    start: float
+    seconds: float
+
+
+class Startup:
+    """
+    Record how long each phase of starting up takes.
+
+    Times are relative to when the process started, if that can be
+    determined, or else to when this module was imported. Phases can be
+    nested, and are ignored once startup is finished. When it finishes, the
+    report is logged at the DEBUG level, and also written to `output` (if
+    set).
+    """
+
+    def __init__(self) -> None:
+        self.origin = time.perf_counter() - (process_uptime() or 0.0)
+        self.phases: list[Phase] = []
+        self.finished = False
+        self.total = 0.0
+        self.output: TextIO | None = None
+        self._depth = 0
+        self._lock = Lock()
+
+    def record(self, name: str, start: float, end: float, depth: int = 0) -> None:
+        """Record a phase between two values of `time.perf_counter`."""
+        with self._lock:
+            if not self.finished:
+                self.phases.append(Phase(name, depth, start - self.origin, end - start))
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator:
+        """Record the execution of the body as a phase."""
+        if self.finished:
+            yield
+            return
+        depth = self._depth
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth = depth
+            self.record(name, start, time.perf_counter(), depth)
+
+    def finish(self) -> None:
+        with self._lock:
+            if self.finished:
+                return
+            self.finished = True
+            self.total = time.perf_counter() - self.origin
+        report = self.report()
+        for line in report.splitlines():
+            logger.debug("startup: %s", line)
+        if self.output:
+            self.output.write(report)
+            self.output.flush()
+
+    def report(self) -> str:
+        """Return a table of phases (in milliseconds), in the order they started."""
+        lines = [f"{'start':>10} {'time':>10}  phase"]
+        for phase in sorted(self.phases, key=lambda p: (p.start, p.depth)):
+            lines.append(f"{1000 * phase.start:>10.1f} {1000 * phase.seconds:>10.1f}  {'  ' * phase.depth}{phase.name}")
+        if self.finished:
+            lines.append(f"{'':>10} {1000 * self.total:>10.1f}  total")
+        return "\n".join(lines) + "\n"
+
+
+def process_uptime() -> float | None:
+    """Return how many seconds this process has been running, if it can be determined."""
+    try:
+        with open("/proc/self/stat") as file:
+            fields = file.read().rpartition(")")[2].split()
+        start = int(fields[19]) / os.sysconf("SC_CLK_TCK")  # field 22, counting from the state (field 3)
+        return max(time.clock_gettime(time.CLOCK_BOOTTIME) - start, 0.0)
+    except OSError, ValueError, IndexError, AttributeError:
+        return None
+
+
+startup = Startup()
+
+__all__ = [
+    Startup.__name__,
+    "startup",
+]
@@ -0,0 +1,131 @@
+"""Timing statistics collected while the daemon runs."""
+
+import math
+import os
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import gettempdir
+from threading import Lock
+
+from .env import environ_path
+
+BUCKET_MIN = 1e-6  # seconds
+BUCKETS_PER_DECADE = 10
+BUCKET_COUNT = 9 * BUCKETS_PER_DECADE  # up to 1000 seconds
+
+
+class Histogram:
+    """
+    Summarize durations in a fixed number of logarithmic buckets.
+
+    Memory use doesn't grow with the number of durations added. Percentiles
+    are estimated from the upper bound of the bucket they fall in, so they
+    are accurate to about a quarter of their value.
+    """
+
+    __slots__ = ("count", "total", "last", "max", "_buckets")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.last = 0.0
+        self.max = 0.0
+        self._buckets = [0] * BUCKET_COUNT
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        self.max = max(self.max, seconds)
+        self._buckets[bucket_index(seconds)] += 1
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> float:
+        """Return the duration that `p` percent of durations are less than or equal to."""
+        rank = max(math.ceil(p / 100 * self.count), 1)
+        seen = 0
+        for i, n in enumerate(self._buckets):
+            seen += n
+            if seen >= rank:
+                return min(bucket_bound(i), self.max)
+        return self.max
+
+
+class Stats:
+    """Keep a histogram of durations for each kind of timed thing, by name."""
+
+    def __init__(self) -> None:
+        self._histograms: dict[tuple[str, str], Histogram] = {}
+        self._lock = Lock()
+
+    def record(self, kind: str, name: str, seconds: float) -> None:
+        with self._lock:
+            if (histogram := self._histograms.get((kind, name))) is None:
+                histogram = self._histograms[(kind, name)] = Histogram()
+            histogram.add(seconds)
+
+    @contextmanager
+    def timed(self, kind: str, name: str) -> Iterator:
+        """Record how long it takes to execute a block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(kind, name, time.perf_counter() - start)
+
+    def histogram(self, kind: str, name: str) -> Histogram | None:
+        return self._histograms.get((kind, name))
+
+    def histograms(self, kind: str) -> list[tuple[str, Histogram]]:
+        """Return the histograms of a kind, by name."""
+        with self._lock:
+            return [(name, h) for (k, name), h in self._histograms.items() if k == kind]
+
+    def report(self) -> str:
+        """Return a table of durations (in milliseconds), with the most time consuming first for each kind."""
+        with self._lock:
+            rows = sorted(self._histograms.items(), key=lambda item: (item[0][0], -item[1].total))
+            lines = [f"{'kind':<12} {'count':>8} {'last':>10} {'mean':>10} {'p50':>10} {'p99':>10} {'max':>10}  name"]
+            for (kind, name), h in rows:
+                ms = [1000 * s for s in (h.last, h.mean, h.percentile(50), h.percentile(99), h.max)]
+                lines.append(f"{kind:<12} {h.count:>8} {' '.join(f'{v:>10.3f}' for v in ms)}  {name}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.report())
+
+
+def bucket_index(seconds: float) -> int:
+    if seconds <= BUCKET_MIN:
+        return 0
+    return min(int(math.log10(seconds / BUCKET_MIN) * BUCKETS_PER_DECADE), BUCKET_COUNT - 1)
+
+
+def bucket_bound(index: int) -> float:
+    if index == BUCKET_COUNT - 1:
+        return float("inf")  # the last bucket also holds everything bigger
+    return BUCKET_MIN * 10 ** ((index + 1) / BUCKETS_PER_DECADE)
+
+
+def runtime_dir() -> Path:
+    """Return the directory for files that only matter while the daemon runs."""
+    return (environ_path("XDG_RUNTIME_DIR") or Path(gettempdir())) / "swaystatus"
+
+
+def stats_path() -> Path:
+    return runtime_dir() / f"stats.{os.getpid()}"
+
+
+stats = Stats()
+
+__all__ = [
+    Histogram.__name__,
+    Stats.__name__,
+    "stats",
+]
@@ -1,46 +1,150 @@
+import time
 from collections.abc import Callable
-from contextvars import Context
-from threading import Event, Thread
+from concurrent.futures import Future
+from contextvars import Context, copy_context
+from queue import SimpleQueue
+from threading import Event, Lock, Thread, current_thread
 from typing import Any
 
+from .trace import tracer
+
 type Number = float | int
 type Callback = Callable[..., Any]
+type Interval = Number | Callable[[], Number | None]
 
 
 class Ticker(Thread):
-    """Run a function at a regular interval or manually."""
+    """
+    Run a function at a regular interval or manually.
+
+    The `interval` can also be a function returning the seconds to wait until
+    the next tick, for schedules that change from one tick to the next.
+
+    If `min_interval` is set, a manual tick requested within that many seconds
+    of the previous tick waits until they have passed, so a burst of requests
+    results in a single tick. A request made after that ticks immediately.
+    Requests made while another is still waiting are counted in
+    `requests_merged`.
+    """
 
     def __init__(
         self,
         tick: Callback | None = None,
         /,
         *,
-        interval: Number | None = None,
+        interval: Interval | None = None,
+        min_interval: Number | None = None,
         name: str | None = None,
         daemon: bool | None = None,
         context: Context | None = None,
     ) -> None:
         super().__init__(name=name, daemon=daemon, context=context)
         self.interval = interval
+        self.min_interval = min_interval
+        self.requests_merged = 0
+        self._ticked = float("-inf")
         self._tick = tick
         self._next = Event()
         self._done = Event()
+        self._lock = Lock()
 
     def tick(self) -> None:
         if self._tick:
             self._tick()
 
     def next(self) -> None:
-        self._next.set()
+        with self._lock:
+            if self._next.is_set():
+                self.requests_merged += 1
+            self._next.set()
+
+    def timeout(self) -> Number | None:
+        return self.interval() if callable(self.interval) else self.interval
 
     def run(self) -> None:
         while not self._done.is_set():
-            self._next.wait(timeout=self.interval)
+            if (
+                self._next.wait(timeout=self.timeout())
+                and self.min_interval
+                and (settle := self._ticked + self.min_interval - time.monotonic()) > 0
+            ):
+                self._done.wait(timeout=settle)  # let a burst of requests following the last tick settle
             self._next.clear()
             if self._done.is_set():
                 break
-            self.tick()
+            self._ticked = time.monotonic()
+            with tracer.span("tick", self.name):
+                self.tick()
 
     def stop(self) -> None:
         self._done.set()
         self._next.set()
+
+
+class WorkerPool:
+    """
+    Run functions concurrently on a bounded number of threads.
+
+    Unlike `concurrent.futures.ThreadPoolExecutor`, the worker threads are
+    daemonic, so a function that never returns can't hold up shutdown.
+
+    The `size` can be changed at any time. When it shrinks, the surplus
+    threads exit once they finish what was submitted before.
+    """
+
+    def __init__(self, size: int, name: str | None = None) -> None:
+        self.name = name or self.__class__.__name__
+        self._size = size
+        self._queue: SimpleQueue[tuple[Future, Callback, Context] | None] = SimpleQueue()
+        self._threads: list[Thread] = []
+        self._retiring = 0
+        self._started = 0
+        self._lock = Lock()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @size.setter
+    def size(self, size: int) -> None:
+        with self._lock:
+            self._size = size
+            for _ in range(len(self._threads) - self._retiring - size):
+                self._queue.put(None)
+                self._retiring += 1
+
+    def submit[T](self, function: Callable[..., T], /, *args: Any) -> Future[T]:
+        """Schedule `function` to be called with `args` in the current context."""
+        future: Future[T] = Future()
+        self._queue.put((future, lambda: function(*args), copy_context()))
+        with self._lock:
+            if len(self._threads) - self._retiring < self._size:
+                thread = Thread(target=self._work, name=f"{self.name}.{self._started}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+                self._started += 1
+        return future
+
+    def shutdown(self) -> None:
+        """Stop the worker threads after they finish what has already been submitted."""
+        with self._lock:
+            for _ in range(len(self._threads) - self._retiring):
+                self._queue.put(None)
+            self._threads.clear()
+            self._retiring = 0
+
+    def _work(self) -> None:
+        while item := self._queue.get():
+            future, function, context = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = context.run(function)
+            except BaseException as exc:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+        with self._lock:
+            if (thread := current_thread()) in self._threads:  # retired, rather than shut down
+                self._threads.remove(thread)
+                self._retiring -= 1
@@ -0,0 +1,116 @@
+"""Tracing of what every thread in the daemon is doing, for viewing on a timeline."""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import AbstractContextManager, nullcontext
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+from .context import context_var
+from .logger import logger
+
+MAX_EVENTS = 1_000_000
+
+type Event = dict[str, Any]
+
+
+class Span:
+    """Context manager recording the execution of its body as a span."""
+
+    __slots__ = ("tracer", "category", "name", "start")
+
+    def __init__(self, tracer: Tracer, category: str, name: str) -> None:
+        self.tracer = tracer
+        self.category = category
+        self.name = name
+
+    def __enter__(self) -> Span:
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.tracer.record(self.category, self.name, self.start, time.perf_counter_ns())
+
+
+class Tracer:
+    """
+    Record spans of time, which can be written as a Chrome trace.
+
+    Spans are only recorded after `start`, and are written to `path` by
+    `dump` in the JSON format understood by Perfetto and chrome://tracing.
+    Each span is tagged with its thread and its logging context. Only the
+    most recent `max_events` spans are kept.
+    """
+
+    def __init__(self, max_events: int = MAX_EVENTS) -> None:
+        self.path: Path | None = None
+        self._events: deque[Event] = deque(maxlen=max_events)
+        self._thread_names: dict[int, str] = {}
+        self._lock = Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def start(self, path: Path) -> None:
+        self.path = path
+
+    def stop(self) -> None:
+        self.path = None
+
+    def span(self, category: str, name: str) -> AbstractContextManager:
+        """Return a context manager recording its body as a span, if tracing."""
+        return Span(self, category, name) if self.path else NO_SPAN
+
+    def record(self, category: str, name: str, start: int, end: int, **args: Any) -> None:
+        """Record a span between two values of `time.perf_counter_ns`, if tracing."""
+        if not self.path:
+            return
+        thread = threading.current_thread()
+        tid = thread.native_id or 0
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": start / 1000,
+            "dur": (end - start) / 1000,
+            "pid": os.getpid(),
+            "tid": tid,
+            "args": {"context": context_var.get(), **args},
+        }
+        with self._lock:
+            self._events.append(event)
+            self._thread_names[tid] = thread.name
+
+    def events(self) -> list[Event]:
+        """Return the recorded spans, preceded by the names of their threads."""
+        pid = os.getpid()
+        with self._lock:
+            names = [
+                {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                for tid, name in self._thread_names.items()
+            ]
+            return [*names, *self._events]
+
+    def dump(self) -> None:
+        """Write the spans recorded so far."""
+        if not (path := self.path):
+            return
+        events = self.events()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}))
+        logger.info("wrote %d trace event(s) to %s", len(events), path)
+
+
+NO_SPAN = nullcontext()
+
+tracer = Tracer()
+
+__all__ = [
+    Tracer.__name__,
+    "tracer",
+]
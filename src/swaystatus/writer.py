@@ -0,0 +1,145 @@
+"""Writers deliver encoded status lines to swaybar."""
+
+import os
+import stat
+import sys
+from collections import deque
+from io import TextIOWrapper, UnsupportedOperation
+from select import POLLERR, POLLOUT, poll
+from threading import Condition, Thread
+
+from .logger import logger
+from .trace import tracer
+
+type Number = float | int
+
+
+class StdoutWriter:
+    """Write lines to stdout, blocking until each one is written."""
+
+    lines_written = 0
+    lines_coalesced = 0
+    lines_dropped = 0
+
+    def open(self) -> None:
+        if isinstance(sys.stdout, TextIOWrapper):
+            sys.stdout.reconfigure(encoding="utf-8")  # the protocol is UTF-8, regardless of locale
+
+    def write(self, line: str, droppable: bool = False) -> None:
+        print(line, file=sys.stdout, flush=True)
+        self.lines_written += 1
+
+    def close(self, timeout: Number | None = None) -> None:
+        pass
+
+
+class PipeWriter(Thread):
+    """
+    Write lines to a pipe without ever blocking the caller.
+
+    Lines are written by a dedicated thread with non-blocking writes. Lines
+    that are not `droppable` (e.g. the header) are always written in order.
+    A droppable line (i.e. a status line) waiting to be written is replaced
+    by any newer one, so a stalled reader only ever gets the latest line when
+    it catches up.
+
+    The number of lines written, replaced while waiting (`lines_coalesced`),
+    and abandoned because the pipe closed (`lines_dropped`) are counted.
+    """
+
+    def __init__(self, fd: int, poll_interval: Number = 0.5) -> None:
+        super().__init__(name="WriterThread", daemon=True)
+        self._fd = fd
+        self._poll_interval = poll_interval
+        self._condition = Condition()
+        self._required: deque[bytes] = deque()
+        self._latest: bytes | None = None
+        self._closed = False
+        self.lines_written = 0
+        self.lines_coalesced = 0
+        self.lines_dropped = 0
+
+    def open(self) -> None:
+        os.set_blocking(self._fd, False)
+        self.start()
+
+    def write(self, line: str, droppable: bool = False) -> None:
+        data = f"{line}\n".encode()
+        with self._condition:
+            if droppable:
+                if self._latest is not None:
+                    self.lines_coalesced += 1
+                self._latest = data
+            else:
+                self._required.append(data)
+            self._condition.notify()
+
+    def close(self, timeout: Number | None = None) -> None:
+        """Stop after writing whatever is waiting, giving up after `timeout` seconds."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self.is_alive():
+            self.join(timeout=timeout)
+
+    def run(self) -> None:
+        while data := self._next():
+            try:
+                with tracer.span("output", "write"):
+                    self._write_all(data)
+            except (BrokenPipeError, TimeoutError) as exc:
+                with self._condition:
+                    self.lines_dropped += 1 + len(self._required) + (self._latest is not None)
+                    self._required.clear()
+                    self._latest = None
+                logger.error("abandoned output: %s", exc)
+                return
+            self.lines_written += 1
+
+    def _next(self) -> bytes | None:
+        with self._condition:
+            while not self._required and self._latest is None and not self._closed:
+                self._condition.wait()
+            if self._required:
+                return self._required.popleft()
+            data, self._latest = self._latest, None
+            return data
+
+    def _write_all(self, data: bytes) -> None:
+        poller = poll()
+        poller.register(self._fd, POLLOUT)
+        view = memoryview(data)
+        while view:
+            try:
+                view = view[os.write(self._fd, view) :]
+            except BlockingIOError:
+                events = poller.poll(self._poll_interval * 1000)
+                if any(event & POLLERR for _, event in events):
+                    raise BrokenPipeError("reader closed the pipe") from None
+                if not events and self._closed:
+                    raise TimeoutError("reader stopped reading during shutdown") from None
+
+
+def stdout_writer() -> StdoutWriter | PipeWriter:
+    """
+    Return a pipe writer if stdout is a pipe of its own, otherwise a stdout writer.
+
+    Non-blocking mode is a property of the open file shared by all of its
+    descriptors, so it's only used if stderr is not going to the same place.
+    """
+    try:
+        fd = sys.stdout.fileno()
+        stdout_stat = os.fstat(fd)
+        stderr_stat = os.fstat(sys.stderr.fileno())
+    except AttributeError, OSError, UnsupportedOperation:
+        return StdoutWriter()
+    if not stat.S_ISFIFO(stdout_stat.st_mode) or os.path.samestat(stdout_stat, stderr_stat):
+        return StdoutWriter()
+    sys.stdout.flush()
+    return PipeWriter(fd)
+
+
+__all__ = [
+    StdoutWriter.__name__,
+    PipeWriter.__name__,
+]
@@ -1,5 +1,6 @@
 import os
 import random
+import sys
 from pathlib import Path
 from string import ascii_letters
 from unittest import TestCase, main
@@ -29,6 +30,10 @@ class TestApp(TestCase):
         self.daemon_mock = daemon_patcher.start()
         self.addCleanup(daemon_patcher.stop)
 
+        async_daemon_patcher = patch("swaystatus.app.AsyncDaemon")
+        self.async_daemon_mock = async_daemon_patcher.start()
+        self.addCleanup(async_daemon_patcher.stop)
+
         registry_patcher = patch("swaystatus.app.Registry")
         self.registry_mock = registry_patcher.start()
         self.addCleanup(registry_patcher.stop)
@@ -128,6 +133,7 @@ class TestApp(TestCase):
         on_click2: OnClickMapping = {2: "true"}
         params1: ParamsMapping = {"text": "first"}
         params2: ParamsMapping = {"text": "second"}
+        coalesce2 = {4: 0.1, 5: 0.1}
         self.app.config.modules = [
             Module(
                 name="hostname",
@@ -136,7 +142,9 @@ class TestApp(TestCase):
             Module(
                 name="clock",
                 instance="home",
-                settings=ModuleSettings(env=env2, on_click=on_click2, params=params2),
+                settings=ModuleSettings(
+                    interval=5.0, align=True, env=env2, on_click=on_click2, coalesce=coalesce2, params=params2
+                ),
             ),
         ]
 
@@ -152,16 +160,60 @@ class TestApp(TestCase):
         self.assertEqual(
             self.element_mock.call_args_list,
             [
-                call("hostname", instance=None, env=env1, on_click=on_click1, **params1),
-                call("clock", instance="home", env=env2, on_click=on_click2, **params2),
+                call(
+                    "hostname",
+                    instance=None,
+                    env=env1,
+                    on_click=on_click1,
+                    **params1,
+                ),
+                call(
+                    "clock",
+                    instance="home",
+                    env=env2,
+                    on_click=on_click2,
+                    coalesce=coalesce2,
+                    interval=5.0,
+                    align=True,
+                    **params2,
+                ),
             ],
         )
 
+    def test_elements_without_optional_settings(self) -> None:
+        class Element(BaseElement):
+            def __init__(
+                self,
+                name: str,
+                instance: str | None = None,
+                env: EnvMapping | None = None,
+                on_click: OnClickMapping | None = None,
+            ) -> None:
+                super().__init__(name, instance, env, on_click)
+
+        self.registry_find_mock.return_value = Element
+        self.app.config.modules = [Module(name="clock")]
+        element = self.app.elements[0]
+        self.assertIsInstance(element, Element)
+        self.assertEqual(element.name, "clock")
+
     def test_daemon(self) -> None:
         self.app.elements = list(map(BaseElement, ascii_letters[: random.randint(2, 10)]))
         random.shuffle(self.app.elements)
         self.app.config.interval = random.randint(1, 5)
         self.app.config.click_events = random.choice([True, False])
+        self.app.config.suppress_unchanged = random.choice([True, False])
+        self.app.config.keepalive = random.randint(1, 5)
+        self.app.config.render_workers = random.randint(1, 5)
+        self.app.config.render_timeout = random.randint(1, 5)
+        self.app.config.min_frame_interval = random.randint(1, 5)
+        self.app.config.watchdog_budget = random.randint(1, 5)
+        self.app.config.watchdog_strikes = random.randint(1, 5)
+        self.app.config.metrics_socket = Path("/run/user/1000/swaystatus/metrics.sock")
+        self.app.config.update_workers = random.randint(1, 5)
+        self.app.config.update_queue = random.randint(1, 5)
+        self.app.config.update_policy = random.choice(["merge", "drop"])
+        self.app.args.sample_control = random.choice([True, False])
 
         self.assertIs(self.app.daemon, self.daemon_mock.return_value)
 
@@ -169,13 +221,67 @@ class TestApp(TestCase):
             self.app.elements,
             self.app.config.interval,
             self.app.config.click_events,
+            suppress_unchanged=self.app.config.suppress_unchanged,
+            keepalive=self.app.config.keepalive,
+            render_workers=self.app.config.render_workers,
+            render_timeout=self.app.config.render_timeout,
+            min_frame_interval=self.app.config.min_frame_interval,
+            watchdog_budget=self.app.config.watchdog_budget,
+            watchdog_strikes=self.app.config.watchdog_strikes,
+            metrics_socket=self.app.config.metrics_socket,
+            update_workers=self.app.config.update_workers,
+            sample_control=self.app.args.sample_control,
+            update_queue=self.app.config.update_queue,
+            update_policy=self.app.config.update_policy,
         )
 
+    def test_daemon_asyncio(self) -> None:
+        self.app.elements = [BaseElement("test")]
+        self.app.config.engine = "asyncio"
+        self.assertIs(self.app.daemon, self.async_daemon_mock.return_value)
+        self.daemon_mock.assert_not_called()
+        self.async_daemon_mock.assert_called_once()
+        self.assertNotIn("update_queue", self.async_daemon_mock.call_args.kwargs)
+        self.assertEqual(self.async_daemon_mock.call_args.kwargs["update_workers"], self.app.config.update_workers)
+
     def test_run_blocks_until_shutdown(self) -> None:
         self.app.run()
         self.daemon_mock.return_value.start.assert_called_once()
         self.daemon_mock.return_value.join.assert_called_once()
 
+    def test_run_profile(self) -> None:
+        self.app.args.profile = Path("/path/to/profile")
+        with patch("swaystatus.app.Profiler") as profiler_mock:
+            profiler_mock.return_value.runcall.side_effect = lambda function: function()
+            self.app.run()
+        profiler_mock.assert_called_once_with(self.app.args.profile)
+        self.daemon_mock.return_value.join.assert_called_once()
+        profiler_mock.return_value.dump.assert_called_once_with()
+
+    def test_run_startup_report(self) -> None:
+        self.app.args.startup_report = True
+        with patch("swaystatus.app.startup") as startup_mock:
+            self.app.run()
+        self.assertIs(startup_mock.output, sys.stderr)
+
+    def test_run_watch_memory(self) -> None:
+        self.app.args.watch_memory = 60.0
+        with patch("swaystatus.app.MemoryMonitor") as memory_monitor_mock:
+            self.app.run()
+        memory_monitor_mock.assert_called_once_with(self.app.args.watch_memory)
+        memory_monitor_mock.return_value.start.assert_called_once_with()
+        self.daemon_mock.return_value.join.assert_called_once()
+        memory_monitor_mock.return_value.stop.assert_called_once_with()
+
+    def test_run_trace(self) -> None:
+        self.app.args.trace = Path("/path/to/trace")
+        with patch("swaystatus.app.tracer") as tracer_mock:
+            self.app.run()
+        tracer_mock.start.assert_called_once_with(self.app.args.trace)
+        self.daemon_mock.return_value.join.assert_called_once()
+        tracer_mock.dump.assert_called_once_with()
+        tracer_mock.stop.assert_called_once_with()
+
     def test_run_log_level_default(self) -> None:
         self.app.run()
         self.log_level_mock.assert_not_called()
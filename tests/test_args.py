@@ -39,6 +39,29 @@ class TestArgs(TestCase):
             with self.subTest(option=option):
                 self.assert_arg([option, "dir1", option, "dir2"], "include", [Path("dir1"), Path("dir2")])
 
+    def test_profile(self) -> None:
+        self.assert_arg([], "profile", None)
+        self.assert_arg(["--profile", "file"], "profile", Path("file"))
+
+    def test_startup_report(self) -> None:
+        self.assert_arg([], "startup_report", False)
+        self.assert_arg(["--startup-report"], "startup_report", True)
+
+    def test_sample_control(self) -> None:
+        self.assert_arg([], "sample_control", False)
+        self.assert_arg(["--sample-control"], "sample_control", True)
+
+    def test_watch_memory(self) -> None:
+        self.assert_arg([], "watch_memory", None)
+        self.assert_arg(["--watch-memory", "60"], "watch_memory", 60.0)
+        for value in ["0", "-1", "never"]:
+            with self.subTest(value=value):
+                self.assert_arg_invalid(["--watch-memory", value])
+
+    def test_trace(self) -> None:
+        self.assert_arg([], "trace", None)
+        self.assert_arg(["--trace", "file"], "trace", Path("file"))
+
     def test_log_level(self) -> None:
         for option in ["--log-level", "-L"]:
             for level in logging.getLevelNamesMapping():
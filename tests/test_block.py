@@ -1,3 +1,4 @@
+import json
 import random
 from dataclasses import asdict
 from unittest import TestCase, main
@@ -52,6 +53,21 @@ class TestBlock(TestCase):
         )
         self.assertEqual(Block(**expected_dict).min_dict(), expected_dict)
 
+    def test_encode(self) -> None:
+        dummy_block_params = list(asdict(dummy_block).items())
+        for k in [0, 1, len(dummy_block_params) // 2, len(dummy_block_params)]:
+            params = dict(random.sample(dummy_block_params, k=k))
+            with self.subTest(params=params):
+                block = Block(**params)
+                self.assertEqual(block.encode(), json.dumps(block.min_dict(), ensure_ascii=False))
+
+    def test_encode_values(self) -> None:
+        block = Block(full_text='say "hi"\n', min_width="\uf017 00:00", urgent=True, separator=False, border_top=0)
+        self.assertEqual(json.loads(block.encode()), block.min_dict())
+
+    def test_encode_unescaped(self) -> None:
+        self.assertEqual(Block(full_text="\uf017 caf\u00e9").encode(), '{"full_text": "\uf017 caf\u00e9"}')
+
 
 if __name__ == "__main__":
     main()
@@ -24,6 +24,9 @@ class TestClickEvent(TestCase):
             "click event button=1 name='clock' instance='home'",
         )
 
+    def test_count(self) -> None:
+        self.assertEqual(dummy_click_event.count, 1)
+
 
 if __name__ == "__main__":
     main()
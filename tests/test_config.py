@@ -16,6 +16,30 @@ def random_string(min_length: int, max_length: int) -> str:
 
 
 class TestModuleSettings(TestCase):
+    def test_field_interval(self) -> None:
+        for value in [None, 1, 1.0]:
+            with self.subTest(value=value):
+                self.assertIs(ModuleSettings(interval=value).interval, value)
+
+    def test_field_interval_type(self) -> None:
+        with self.assertRaises(TypeError):
+            ModuleSettings(interval=INVALID_TYPE)  # type: ignore
+
+    def test_field_interval_positive(self) -> None:
+        for interval in [0.0, -1.0]:
+            with self.subTest(interval=interval), self.assertRaises(ValueError):
+                ModuleSettings(interval=interval)
+
+    def test_field_align(self) -> None:
+        for value in [None, True, False]:
+            with self.subTest(value=value):
+                self.assertIs(ModuleSettings(align=value).align, value)
+
+    def test_field_align_type(self) -> None:
+        for align in [1, INVALID_TYPE]:
+            with self.subTest(align=align), self.assertRaises(TypeError):
+                ModuleSettings(align=align)  # type: ignore
+
     def test_field_env(self) -> None:
         env = {"TZ": "America/Chicago", "DISABLED": None}
         self.assertIs(ModuleSettings(env=env).env, env)
@@ -58,7 +82,7 @@ class TestModuleSettings(TestCase):
                 ModuleSettings(on_click={1: value})  # type: ignore
 
     def test_field_on_click_value_empty(self) -> None:
-        for value in [EMPTY_STR, [EMPTY_STR]]:
+        for value in [EMPTY_STR, [EMPTY_STR], []]:
             with self.subTest(value=value), self.assertRaises(ValueError):
                 ModuleSettings(on_click={2: value})
 
@@ -81,6 +105,33 @@ class TestModuleSettings(TestCase):
         with self.assertRaises(ValueError):
             ModuleSettings(params={EMPTY_STR: "whatever"})
 
+    def test_field_coalesce(self) -> None:
+        coalesce = {4: 0.1, 5: 1}
+        self.assertIs(ModuleSettings(coalesce=coalesce).coalesce, coalesce)
+
+    def test_field_coalesce_type(self) -> None:
+        for coalesce in [None, INVALID_TYPE]:
+            with self.subTest(coalesce=coalesce), self.assertRaises(TypeError):
+                ModuleSettings(coalesce=coalesce)  # type: ignore
+
+    def test_field_coalesce_key_type(self) -> None:
+        for key in [None, "4"]:
+            with self.subTest(key=key), self.assertRaises(TypeError):
+                ModuleSettings(coalesce={key: 0.1})  # type: ignore
+
+    def test_field_coalesce_value_type(self) -> None:
+        for value in [None, True, "0.1"]:
+            with self.subTest(value=value), self.assertRaises(TypeError):
+                ModuleSettings(coalesce={4: value})  # type: ignore
+
+    def test_field_coalesce_value_positive(self) -> None:
+        for value in [0, -0.1]:
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                ModuleSettings(coalesce={4: value})
+
+    def test_parse_coalesce_key_coerce(self) -> None:
+        self.assertEqual(ModuleSettings.parse({"coalesce": {"4": 0.1}}).coalesce, {4: 0.1})
+
     def test_parse_on_click_key_coerce(self) -> None:
         for key in ["1", b"1"]:
             with self.subTest(key=key):
@@ -158,6 +209,18 @@ class TestConfig(TestCase):
         expected_fields = [
             "interval",
             "click_events",
+            "engine",
+            "suppress_unchanged",
+            "keepalive",
+            "render_workers",
+            "render_timeout",
+            "min_frame_interval",
+            "watchdog_budget",
+            "watchdog_strikes",
+            "metrics_socket",
+            "update_workers",
+            "update_queue",
+            "update_policy",
             "env",
             "include",
             "settings",
@@ -169,6 +232,18 @@ class TestConfig(TestCase):
         config = Config()
         self.assertIsNone(config.interval)
         self.assertIs(config.click_events, False)
+        self.assertEqual(config.engine, "threads")
+        self.assertIs(config.suppress_unchanged, False)
+        self.assertIsNone(config.keepalive)
+        self.assertIsNone(config.render_workers)
+        self.assertIsNone(config.render_timeout)
+        self.assertIsNone(config.min_frame_interval)
+        self.assertIsNone(config.watchdog_budget)
+        self.assertEqual(config.watchdog_strikes, 3)
+        self.assertIsNone(config.metrics_socket)
+        self.assertEqual(config.update_workers, 4)
+        self.assertEqual(config.update_queue, 16)
+        self.assertEqual(config.update_policy, "merge")
         self.assertEqual(config.env, {})
         self.assertEqual(config.include, [])
         self.assertEqual(config.settings, {})
@@ -198,6 +273,170 @@ class TestConfig(TestCase):
             with self.subTest(click_events=click_events), self.assertRaises(TypeError):
                 Config(click_events=click_events)  # type: ignore
 
+    def test_field_engine(self) -> None:
+        for value in ["threads", "asyncio"]:
+            with self.subTest(value=value):
+                self.assertEqual(Config(engine=value).engine, value)
+
+    def test_field_engine_type(self) -> None:
+        for engine in [None, INVALID_TYPE]:
+            with self.subTest(engine=engine), self.assertRaises(TypeError):
+                Config(engine=engine)  # type: ignore
+
+    def test_field_engine_unknown(self) -> None:
+        with self.assertRaises(ValueError):
+            Config(engine="processes")
+
+    def test_field_suppress_unchanged(self) -> None:
+        for value in [False, True]:
+            with self.subTest(value=value):
+                self.assertIs(Config(suppress_unchanged=value).suppress_unchanged, value)
+
+    def test_field_suppress_unchanged_type(self) -> None:
+        for suppress_unchanged in [None, INVALID_TYPE]:
+            with self.subTest(suppress_unchanged=suppress_unchanged), self.assertRaises(TypeError):
+                Config(suppress_unchanged=suppress_unchanged)  # type: ignore
+
+    def test_field_keepalive(self) -> None:
+        for value in [None, 1, 1.0]:
+            with self.subTest(value=value):
+                self.assertIs(Config(keepalive=value).keepalive, value)
+
+    def test_field_keepalive_type(self) -> None:
+        with self.assertRaises(TypeError):
+            Config(keepalive=INVALID_TYPE)  # type: ignore
+
+    def test_field_keepalive_positive(self) -> None:
+        for keepalive in [0.0, -1.0]:
+            with self.subTest(keepalive=keepalive), self.assertRaises(ValueError):
+                Config(keepalive=keepalive)
+
+    def test_field_render_workers(self) -> None:
+        for value in [None, 1, 8]:
+            with self.subTest(value=value):
+                self.assertIs(Config(render_workers=value).render_workers, value)
+
+    def test_field_render_workers_type(self) -> None:
+        for render_workers in [1.0, True, INVALID_TYPE]:
+            with self.subTest(render_workers=render_workers), self.assertRaises(TypeError):
+                Config(render_workers=render_workers)  # type: ignore
+
+    def test_field_render_workers_positive(self) -> None:
+        for render_workers in [0, -1]:
+            with self.subTest(render_workers=render_workers), self.assertRaises(ValueError):
+                Config(render_workers=render_workers)
+
+    def test_field_render_timeout(self) -> None:
+        for value in [None, 1, 1.0]:
+            with self.subTest(value=value):
+                self.assertIs(Config(render_timeout=value).render_timeout, value)
+
+    def test_field_render_timeout_type(self) -> None:
+        with self.assertRaises(TypeError):
+            Config(render_timeout=INVALID_TYPE)  # type: ignore
+
+    def test_field_render_timeout_positive(self) -> None:
+        for render_timeout in [0.0, -1.0]:
+            with self.subTest(render_timeout=render_timeout), self.assertRaises(ValueError):
+                Config(render_timeout=render_timeout)
+
+    def test_field_min_frame_interval(self) -> None:
+        for value in [None, 1, 0.05]:
+            with self.subTest(value=value):
+                self.assertIs(Config(min_frame_interval=value).min_frame_interval, value)
+
+    def test_field_min_frame_interval_type(self) -> None:
+        with self.assertRaises(TypeError):
+            Config(min_frame_interval=INVALID_TYPE)  # type: ignore
+
+    def test_field_min_frame_interval_positive(self) -> None:
+        for min_frame_interval in [0.0, -1.0]:
+            with self.subTest(min_frame_interval=min_frame_interval), self.assertRaises(ValueError):
+                Config(min_frame_interval=min_frame_interval)
+
+    def test_field_watchdog_budget(self) -> None:
+        for value in [None, 1, 0.05]:
+            with self.subTest(value=value):
+                self.assertIs(Config(watchdog_budget=value).watchdog_budget, value)
+
+    def test_field_watchdog_budget_type(self) -> None:
+        with self.assertRaises(TypeError):
+            Config(watchdog_budget=INVALID_TYPE)  # type: ignore
+
+    def test_field_watchdog_budget_positive(self) -> None:
+        for watchdog_budget in [0.0, -1.0]:
+            with self.subTest(watchdog_budget=watchdog_budget), self.assertRaises(ValueError):
+                Config(watchdog_budget=watchdog_budget)
+
+    def test_field_watchdog_strikes(self) -> None:
+        watchdog_strikes = random.randint(1, 10)
+        self.assertEqual(Config(watchdog_strikes=watchdog_strikes).watchdog_strikes, watchdog_strikes)
+
+    def test_field_watchdog_strikes_type(self) -> None:
+        for watchdog_strikes in [1.0, True, INVALID_TYPE]:
+            with self.subTest(watchdog_strikes=watchdog_strikes), self.assertRaises(TypeError):
+                Config(watchdog_strikes=watchdog_strikes)  # type: ignore
+
+    def test_field_watchdog_strikes_positive(self) -> None:
+        for watchdog_strikes in [0, -1]:
+            with self.subTest(watchdog_strikes=watchdog_strikes), self.assertRaises(ValueError):
+                Config(watchdog_strikes=watchdog_strikes)
+
+    def test_field_metrics_socket(self) -> None:
+        for value in [None, Path("/run/user/1000/swaystatus/metrics.sock")]:
+            with self.subTest(value=value):
+                self.assertIs(Config(metrics_socket=value).metrics_socket, value)
+
+    def test_field_metrics_socket_type(self) -> None:
+        with self.assertRaises(TypeError):
+            Config(metrics_socket=INVALID_TYPE)  # type: ignore
+
+    def test_field_metrics_socket_absolute_path(self) -> None:
+        with self.assertRaises(ValueError):
+            Config(metrics_socket=Path("relative"))
+
+    def test_field_update_workers(self) -> None:
+        update_workers = random.randint(1, 10)
+        self.assertEqual(Config(update_workers=update_workers).update_workers, update_workers)
+
+    def test_field_update_workers_type(self) -> None:
+        for update_workers in [1.0, True, INVALID_TYPE]:
+            with self.subTest(update_workers=update_workers), self.assertRaises(TypeError):
+                Config(update_workers=update_workers)  # type: ignore
+
+    def test_field_update_workers_positive(self) -> None:
+        for update_workers in [0, -1]:
+            with self.subTest(update_workers=update_workers), self.assertRaises(ValueError):
+                Config(update_workers=update_workers)
+
+    def test_field_update_queue(self) -> None:
+        update_queue = random.randint(1, 10)
+        self.assertEqual(Config(update_queue=update_queue).update_queue, update_queue)
+
+    def test_field_update_queue_type(self) -> None:
+        for update_queue in [1.0, True, INVALID_TYPE]:
+            with self.subTest(update_queue=update_queue), self.assertRaises(TypeError):
+                Config(update_queue=update_queue)  # type: ignore
+
+    def test_field_update_queue_positive(self) -> None:
+        for update_queue in [0, -1]:
+            with self.subTest(update_queue=update_queue), self.assertRaises(ValueError):
+                Config(update_queue=update_queue)
+
+    def test_field_update_policy(self) -> None:
+        for value in ["merge", "drop"]:
+            with self.subTest(value=value):
+                self.assertEqual(Config(update_policy=value).update_policy, value)
+
+    def test_field_update_policy_type(self) -> None:
+        for update_policy in [None, INVALID_TYPE]:
+            with self.subTest(update_policy=update_policy), self.assertRaises(TypeError):
+                Config(update_policy=update_policy)  # type: ignore
+
+    def test_field_update_policy_unknown(self) -> None:
+        with self.assertRaises(ValueError):
+            Config(update_policy="block")
+
     def test_field_env(self) -> None:
         env = {"TZ": "America/Chicago", "DISABLED": None}
         self.assertIs(Config(env=env).env, env)
@@ -283,6 +522,35 @@ class TestConfig(TestCase):
         config = Config(modules=modules)
         self.assertEqual(list(config.modules_merged()), modules)
 
+    def test_modules_merged_interval(self) -> None:
+        config = Config(
+            interval=1.0,
+            settings={"clock": ModuleSettings(interval=5.0), "disk": ModuleSettings(interval=60.0)},
+            modules=[
+                Module(name="clock", settings=ModuleSettings(interval=2.0)),
+                Module(name="disk"),
+                Module(name="hostname"),
+            ],
+        )
+        self.assertEqual(
+            [m.settings.interval for m in config.modules_merged()],
+            [2.0, 60.0, None],
+        )
+
+    def test_modules_merged_align(self) -> None:
+        config = Config(
+            settings={"clock": ModuleSettings(align=True), "disk": ModuleSettings(align=True)},
+            modules=[
+                Module(name="clock", settings=ModuleSettings(align=False)),
+                Module(name="disk"),
+                Module(name="hostname"),
+            ],
+        )
+        self.assertEqual(
+            [m.settings.align for m in config.modules_merged()],
+            [False, True, None],
+        )
+
     def test_modules_merged_env(self) -> None:
         config = Config(
             env={"LC_COLLATE": "C"},
@@ -299,6 +567,13 @@ class TestConfig(TestCase):
             ],
         )
 
+    def test_modules_merged_coalesce(self) -> None:
+        config = Config(
+            settings={"volume": ModuleSettings(coalesce={4: 0.1, 5: 0.1})},
+            modules=[Module(name="volume", settings=ModuleSettings(coalesce={5: 0.2, 1: 0.3}))],
+        )
+        self.assertEqual([m.settings.coalesce for m in config.modules_merged()], [{4: 0.1, 5: 0.2, 1: 0.3}])
+
     def test_modules_merged_on_click(self) -> None:
         config = Config(
             settings={"clock": ModuleSettings(on_click={1: "foot -H cal", 2: "date | wl-copy -n"})},
@@ -319,6 +594,10 @@ class TestConfig(TestCase):
             [Module(name="clock", settings=ModuleSettings(params={"full_text": "%c", "short_text": "%s"}))],
         )
 
+    def test_parse_metrics_socket(self) -> None:
+        config = Config.parse({"metrics_socket": "~/metrics.sock"})
+        self.assertEqual(config.metrics_socket, Path.home() / "metrics.sock")
+
     def test_parse_include(self) -> None:
         config = Config.parse({"include": ["/dir1", "/dir2", "/dir3"]})
         self.assertEqual(config.include, [Path("/dir1"), Path("/dir2"), Path("/dir3")])
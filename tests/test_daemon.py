@@ -1,17 +1,27 @@
+import asyncio
 import json
 import os
 import random
-from collections.abc import Iterator
-from dataclasses import asdict
+import time
+from collections.abc import AsyncIterator, Iterator
+from dataclasses import asdict, replace
 from io import StringIO
-from signal import SIGCONT, SIGSTOP, Signals, getsignal, signal
-from threading import Barrier
+from signal import SIGCONT, SIGSTOP, SIGTERM, SIGUSR1, Signals, getsignal, pthread_kill, signal
+from threading import Barrier, Event, Thread
 from unittest import TestCase, main
 from unittest.mock import Mock, patch
 
 from swaystatus.block import Block
 from swaystatus.click_event import ClickEvent
-from swaystatus.daemon import SIGNALS_SHUTDOWN, SIGNALS_UPDATE, Daemon
+from swaystatus.daemon import (
+    SIGNALS_SAMPLE,
+    SIGNALS_SHUTDOWN,
+    SIGNALS_STATS,
+    SIGNALS_UPDATE,
+    AsyncDaemon,
+    Daemon,
+    join_interruptibly,
+)
 from swaystatus.element import BaseElement
 from swaystatus.output import OutputDriver
 
@@ -22,12 +32,15 @@ class TestDaemon(TestCase):
             for signum, handler in signal_handlers_save:
                 signal(signum, handler)
 
-        signal_handlers_save = [(s, getsignal(s)) for s in (*SIGNALS_UPDATE, *SIGNALS_SHUTDOWN)]
+        signums = (*SIGNALS_UPDATE, *SIGNALS_SHUTDOWN, *SIGNALS_STATS, *SIGNALS_SAMPLE)
+        signal_handlers_save = [(s, getsignal(s)) for s in signums]
         self.addCleanup(restore_signal_handlers)
 
     def test_signals(self) -> None:
         self.assertTrue(SIGNALS_UPDATE, "no update signals defined")
         self.assertTrue(SIGNALS_SHUTDOWN, "no shutdown signals defined")
+        self.assertTrue(SIGNALS_STATS, "no stats signals defined")
+        self.assertTrue(SIGNALS_SAMPLE, "no sample signals defined")
 
         output_patcher = patch("swaystatus.daemon.OutputDriver")
         self.output_mock = output_patcher.start()
@@ -45,10 +58,20 @@ class TestDaemon(TestCase):
         update_mock = update_patcher.start()
         self.addCleanup(update_patcher.stop)
 
+        dump_stats_patcher = patch("swaystatus.daemon.dump_stats")
+        dump_stats_mock = dump_stats_patcher.start()
+        self.addCleanup(dump_stats_patcher.stop)
+
+        sampler_control_patcher = patch("swaystatus.daemon.sampler_control")
+        sampler_control_mock = sampler_control_patcher.start()
+        self.addCleanup(sampler_control_patcher.stop)
+
         pid = os.getpid()
         signal_mocks = [
             (SIGNALS_UPDATE, update_mock),
             (SIGNALS_SHUTDOWN, shutdown_mock),
+            (SIGNALS_STATS, dump_stats_mock),
+            (SIGNALS_SAMPLE, sampler_control_mock.return_value.trigger),
         ]
 
         Daemon([], None, False).start()
@@ -149,5 +172,232 @@ class TestDaemon(TestCase):
         click_mock.assert_called_once_with(element.name, click_event)
 
 
+class TestAsyncDaemon(TestCase):
+    def setUp(self) -> None:
+        def restore_signal_handlers() -> None:
+            for signum, handler in signal_handlers_save:
+                signal(signum, handler)
+
+        signums = (*SIGNALS_UPDATE, *SIGNALS_SHUTDOWN, *SIGNALS_STATS, *SIGNALS_SAMPLE)
+        signal_handlers_save = [(s, getsignal(s)) for s in signums]
+        self.addCleanup(restore_signal_handlers)
+
+    def test_io(self) -> None:
+        stdout = StringIO()
+        read_fd, write_fd = os.pipe()
+        stdin_read = os.fdopen(read_fd, "r")
+        stdin_write = os.fdopen(write_fd, "w")
+
+        def cleanup_pipe() -> None:
+            stdin_write.close()
+            stdin_read.close()
+
+        self.addCleanup(cleanup_pipe)
+
+        class Element(BaseElement):
+            async def blocks(self) -> AsyncIterator[Block]:
+                await asyncio.sleep(0)
+                yield self.block(self.name)
+
+            async def on_click_1(self, click_event: ClickEvent) -> bool:
+                click_mock(self.name, click_event)
+                return True
+
+        click_mock = Mock()
+        elements = [Element("a"), Element("b"), Element("c")]
+
+        element = random.choice(elements)
+        click_event = ClickEvent(
+            name=element.name,
+            instance=None,
+            x=1900,
+            y=10,
+            button=1,
+            event=274,
+            relative_x=100,
+            relative_y=8,
+            width=120,
+            height=18,
+            scale=0.0,
+        )
+
+        def wait_for_lines(count: int) -> None:
+            deadline = time.monotonic() + 1.0
+            while stdout.getvalue().count("\n") < count and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        def drive() -> None:
+            # initial output
+            wait_for_lines(3)
+
+            # update after click event handler returns true
+            stdin_write.write(f",{json.dumps(asdict(click_event))}\n")
+            stdin_write.flush()
+            wait_for_lines(4)
+
+            # update after signal
+            os.kill(os.getpid(), SIGUSR1)
+            wait_for_lines(5)
+
+            os.kill(os.getpid(), SIGTERM)
+
+        # start of input array
+        stdin_write.write("[\n")
+        stdin_write.flush()
+
+        with patch("sys.stdout", stdout), patch("sys.stdin", stdin_read):
+            daemon = AsyncDaemon(elements, None, True)
+            daemon.start()
+            driver = Thread(target=drive)
+            driver.start()
+            daemon.join(timeout=5.0)
+            driver.join(timeout=1.0)
+
+        stdout.seek(0)
+        self.assertEqual(
+            json.loads(stdout.readline().strip()),
+            {
+                "version": 1,
+                "stop_signal": SIGSTOP,
+                "cont_signal": SIGCONT,
+                "click_events": True,
+            },
+        )
+        self.assertEqual(stdout.readline(), "[[]\n")
+        output_line = f",{json.dumps([{'full_text': e.name, 'name': e.name} for e in elements])}\n"
+        self.assertEqual(stdout.readlines(), [output_line] * 3)
+        click_mock.assert_called_once_with(element.name, click_event)
+
+    def test_coalesce(self) -> None:
+        read_fd, write_fd = os.pipe()
+        stdin_read = os.fdopen(read_fd, "r")
+        stdin_write = os.fdopen(write_fd, "w")
+
+        def cleanup_pipe() -> None:
+            stdin_write.close()
+            stdin_read.close()
+
+        self.addCleanup(cleanup_pipe)
+
+        class Element(BaseElement):
+            coalesce = {4: 0.05}
+
+            def blocks(self) -> Iterator[Block]:
+                yield self.block(self.name)
+
+            def on_click_4(self, click_event: ClickEvent) -> bool:
+                click_mock(click_event)
+                clicked.set()
+                return False
+
+        click_mock = Mock()
+        clicked = Event()
+        click_event = ClickEvent(
+            name="volume",
+            x=1900,
+            y=10,
+            button=4,
+            event=276,
+            relative_x=100,
+            relative_y=8,
+            width=120,
+            height=18,
+            scale=0.0,
+        )
+
+        def drive() -> None:
+            stdin_write.write("[\n" + "".join(f",{json.dumps(asdict(click_event))}\n" for _ in range(5)))
+            stdin_write.flush()
+            clicked.wait(timeout=1.0)
+            os.kill(os.getpid(), SIGTERM)
+
+        with patch("sys.stdout", StringIO()), patch("sys.stdin", stdin_read):
+            daemon = AsyncDaemon([Element("volume")], None, True)
+            daemon.start()
+            driver = Thread(target=drive)
+            driver.start()
+            daemon.join(timeout=5.0)
+            driver.join(timeout=1.0)
+
+        click_mock.assert_called_once_with(replace(click_event, count=5))
+
+    def test_coalesce_eof(self) -> None:
+        read_fd, write_fd = os.pipe()
+        stdin_read = os.fdopen(read_fd, "r")
+        self.addCleanup(stdin_read.close)
+
+        class Element(BaseElement):
+            coalesce = {4: 60.0}
+
+            def blocks(self) -> Iterator[Block]:
+                yield self.block(self.name)
+
+            def on_click_4(self, click_event: ClickEvent) -> bool:
+                click_mock(click_event)
+                clicked.set()
+                return False
+
+        click_mock = Mock()
+        clicked = Event()
+        click_event = ClickEvent(
+            name="volume",
+            x=1900,
+            y=10,
+            button=4,
+            event=276,
+            relative_x=100,
+            relative_y=8,
+            width=120,
+            height=18,
+            scale=0.0,
+        )
+
+        def drive() -> None:
+            with os.fdopen(write_fd, "w") as stdin_write:
+                stdin_write.write("[\n" + "".join(f",{json.dumps(asdict(click_event))}\n" for _ in range(3)))
+            clicked.wait(timeout=1.0)
+            os.kill(os.getpid(), SIGTERM)
+
+        with patch("sys.stdout", StringIO()), patch("sys.stdin", stdin_read):
+            daemon = AsyncDaemon([Element("volume")], None, True)
+            daemon.start()
+            driver = Thread(target=drive)
+            driver.start()
+            daemon.join(timeout=5.0)
+            driver.join(timeout=1.0)
+
+        click_mock.assert_called_once_with(replace(click_event, count=3))
+        self.assertIsNone(daemon._coalesced)
+
+
+class TestJoinInterruptibly(TestCase):
+    def setUp(self) -> None:
+        self.done = Event()
+        self.thread = Thread(target=self.done.wait, daemon=True)
+        self.thread.start()
+        self.addCleanup(self.done.set)
+
+    def test_finished(self) -> None:
+        def finish() -> None:
+            time.sleep(0.01)
+            self.done.set()
+
+        Thread(target=finish).start()
+        join_interruptibly(self.thread, timeout=5.0)
+        self.assertFalse(self.thread.is_alive())
+
+    def test_timeout(self) -> None:
+        join_interruptibly(self.thread, timeout=0.01)
+        self.assertTrue(self.thread.is_alive())
+
+    def test_signal_to_other_thread(self) -> None:
+        previous = signal(SIGUSR1, lambda signum, frame: self.done.set())
+        self.addCleanup(signal, SIGUSR1, previous)
+        assert self.thread.ident
+        Thread(target=pthread_kill, args=(self.thread.ident, SIGUSR1)).start()
+        join_interruptibly(self.thread, timeout=5.0)
+        self.assertFalse(self.thread.is_alive())
+
+
 if __name__ == "__main__":
     main()
@@ -1,16 +1,19 @@
+import asyncio
 import dataclasses
 import logging
+import os
 import random
 from pathlib import Path
 from string import ascii_letters
 from subprocess import Popen
 from tempfile import TemporaryDirectory
+from threading import Event
 from unittest import TestCase, main
 from unittest.mock import Mock, patch
 
 from swaystatus.block import Block
 from swaystatus.click_event import ClickEvent
-from swaystatus.element import BaseElement, ShellCommand, UpdateHandler
+from swaystatus.element import BaseElement, ShellCommand, UpdateHandler, process_updater
 from swaystatus.logger import logger
 
 dummy_click_event = ClickEvent(
@@ -43,6 +46,48 @@ class TestElement(TestCase):
             "element name='test' instance='a'",
         )
 
+    def test_interval(self) -> None:
+        class Element(BaseElement):
+            interval = 60.0
+
+        self.assertIsNone(BaseElement("clock").interval)
+        self.assertEqual(BaseElement("clock", interval=5.0).interval, 5.0)
+        self.assertEqual(Element("clock").interval, 60.0)
+        self.assertEqual(Element("clock", interval=5.0).interval, 5.0)
+
+    def test_align(self) -> None:
+        class Element(BaseElement):
+            align = True
+
+        self.assertIs(BaseElement("clock").align, False)
+        self.assertIs(BaseElement("clock", align=True).align, True)
+        self.assertIs(Element("clock").align, True)
+        self.assertIs(Element("clock", align=False).align, False)
+
+    def test_coalesce(self) -> None:
+        class Element(BaseElement):
+            coalesce = {4: 0.1, 5: 0.1}
+
+        self.assertEqual(BaseElement("volume").coalesce, {})
+        self.assertEqual(BaseElement("volume", coalesce={1: 0.3}).coalesce, {1: 0.3})
+        self.assertEqual(Element("volume").coalesce, {4: 0.1, 5: 0.1})
+        self.assertEqual(Element("volume", coalesce={5: 0.2}).coalesce, {4: 0.1, 5: 0.2})
+        self.assertEqual(Element.coalesce, {4: 0.1, 5: 0.1})
+
+    def test_invalidate(self) -> None:
+        element = BaseElement("clock")
+        self.assertFalse(element.invalidated)
+        element.invalidate()
+        self.assertTrue(element.invalidated)
+
+    def test_request_update(self) -> None:
+        element = BaseElement("clock")
+        element.request_update()
+        self.assertTrue(element.invalidated)
+        element.updater = Mock()
+        element.request_update()
+        element.updater.assert_called_once_with()
+
     def test_blocks_must_be_implemented(self) -> None:
         with self.assertRaises(NotImplementedError):
             BaseElement("clock").blocks()
@@ -161,6 +206,44 @@ class TestElement(TestCase):
                 assert callable(update_handler)
                 self.assertEqual(update_handler(), update)
 
+    def test_click_handler_result_updater(self) -> None:
+        class Element(BaseElement):
+            def on_click_1(self, *args) -> ShellCommand | Popen:
+                return Popen(command) if popen else command
+
+        for command, popen, update in [
+            ("true", False, True),
+            (["false"], False, False),
+            ("true", True, True),
+            ("false", True, False),
+        ]:
+            with self.subTest(command=command, popen=popen):
+                updated = Event()
+                with process_updater.set(updated.set):
+                    process = Element("clock").on_click(dummy_click_event)
+                assert isinstance(process, Popen)
+                self.assertEqual(updated.wait(timeout=5.0 if update else 0.2), update)
+
+    def test_click_handler_result_command_direct(self) -> None:
+        class Element(BaseElement):
+            def on_click_1(self, *args) -> ShellCommand:
+                return ["echo", "a  b", "$HOME"]
+
+        with self.assertLogs(logger, logging.DEBUG) as logged:
+            update_handler = Element("clock").on_click(dummy_click_event)
+            assert callable(update_handler)
+            self.assertTrue(update_handler())
+        self.assertEqual(logged.records[-1].message, "a  b $HOME")
+
+    def test_click_handler_result_command_not_found(self) -> None:
+        class Element(BaseElement):
+            def on_click_1(self, *args) -> ShellCommand:
+                return ["swaystatus-no-such-command"]
+
+        with self.assertLogs(logger, logging.ERROR) as logged:
+            self.assertIs(Element("clock").on_click(dummy_click_event), False)
+        self.assertEqual(logged.records[-1].message, "unable to run ['swaystatus-no-such-command']")
+
     def test_click_handler_result_command_logged(self) -> None:
         class Element(BaseElement):
             def on_click_1(self, *args) -> ShellCommand:
@@ -189,6 +272,121 @@ class TestElement(TestCase):
         )
         self.assertEqual(error, ["BOOM", "BANG"])
 
+    def test_click_handler_async(self) -> None:
+        class Element(BaseElement):
+            async def on_click_1(self, click_event: ClickEvent) -> bool:
+                await asyncio.sleep(0)
+                return update
+
+        for update in [False, True]:
+            with self.subTest(update=update):
+                self.assertEqual(Element("clock").on_click(dummy_click_event), update)
+
+    def test_click_handler_async_update_handler(self) -> None:
+        async def update_handler_inner() -> bool:
+            await asyncio.sleep(0)
+            return update
+
+        class Element(BaseElement):
+            def on_click_1(self, *args) -> UpdateHandler:
+                return update_handler_inner
+
+        for update in [False, True]:
+            with self.subTest(update=update):
+                update_handler = Element("clock").on_click(dummy_click_event)
+                assert callable(update_handler)
+                self.assertEqual(update_handler(), update)
+
+
+class TestElementAsync(TestCase):
+    def on_click(self, element: BaseElement) -> bool:
+        return asyncio.run(element.on_click_async(dummy_click_event))
+
+    def test_click_handler_missing(self) -> None:
+        self.assertFalse(self.on_click(BaseElement("clock")))
+
+    def test_click_handler_result_none(self) -> None:
+        click_handler = Mock(return_value=None)
+        element = BaseElement("clock", on_click={dummy_click_event.button: click_handler})
+        self.assertFalse(self.on_click(element))
+        click_handler.assert_called_once_with(element, dummy_click_event)
+
+    def test_click_handler_result_update(self) -> None:
+        class Element(BaseElement):
+            async def on_click_1(self, *args) -> bool:
+                return update
+
+        for update in [False, True]:
+            with self.subTest(update=update):
+                self.assertIs(self.on_click(Element("clock")), update)
+
+    def test_click_handler_result_update_handler(self) -> None:
+        def update_handler_inner() -> bool:
+            return update
+
+        async def update_handler_inner_async() -> bool:
+            return update
+
+        update_handlers: list[UpdateHandler] = [update_handler_inner, update_handler_inner_async]
+        for update in [False, True]:
+            for update_handler in update_handlers:
+                with self.subTest(update=update, update_handler=update_handler):
+                    element = BaseElement("clock", on_click={1: lambda *args: update_handler})  # noqa: B023
+                    self.assertIs(self.on_click(element), update)
+
+    def test_click_handler_result_process(self) -> None:
+        for command, update in [("true", True), ("false", False)]:
+            with self.subTest(command=command, update=update):
+                element = BaseElement("clock", on_click={1: lambda *args: Popen(command)})  # noqa: B023
+                self.assertIs(self.on_click(element), update)
+
+    def test_click_handler_result_command(self) -> None:
+        for command, update in [("true", True), (["true"], True), ("false", False), (["false"], False)]:
+            with self.subTest(command=command, update=update):
+                self.assertIs(self.on_click(BaseElement("clock", on_click={1: command})), update)
+
+    def test_click_handler_command_direct(self) -> None:
+        with self.assertLogs(logger, logging.DEBUG) as logged:
+            self.assertTrue(self.on_click(BaseElement("clock", on_click={1: ["echo", "a  b", "$HOME"]})))
+        self.assertEqual(logged.records[-1].message, "a  b $HOME")
+
+    def test_click_handler_env(self) -> None:
+        async def click_handler(element: BaseElement, click_event: ClickEvent) -> bool:
+            await asyncio.sleep(0)
+            seen.extend(os.environ.get(name) for name in ["foo", "button"])
+            return True
+
+        seen: list[str | None] = []
+        text = random_string(10, 30)
+        element = BaseElement("clock", env={"foo": text}, on_click={dummy_click_event.button: click_handler})
+        with patch.dict(os.environ):
+            os.environ.pop("foo", None)
+            self.assertTrue(self.on_click(element))
+            self.assertNotIn("foo", os.environ)
+        self.assertEqual(seen, [text, str(dummy_click_event.button)])
+
+    def test_click_handler_command_not_found(self) -> None:
+        element = BaseElement("clock", on_click={1: ["swaystatus-no-such-command"]})
+        with self.assertLogs(logger, logging.ERROR) as logged:
+            self.assertIs(self.on_click(element), False)
+        self.assertEqual(logged.records[-1].message, "unable to run ['swaystatus-no-such-command']")
+
+    def test_click_handler_command_env(self) -> None:
+        text = random_string(10, 30)
+        with TemporaryDirectory() as temp_dir:
+            output_file = Path(temp_dir) / "output"
+            command = f"echo $foo $button >{output_file}"
+            element = BaseElement("clock", env={"foo": text}, on_click={dummy_click_event.button: command})
+            self.assertTrue(self.on_click(element))
+            self.assertEqual(output_file.read_text().strip(), f"{text} {dummy_click_event.button}")
+
+    def test_click_handler_command_logged(self) -> None:
+        command = "echo line1; echo BOOM >&2; echo line2"
+        with self.assertLogs(logger, logging.DEBUG) as logged:
+            self.assertTrue(self.on_click(BaseElement("clock", on_click={1: command})))
+        self.assertEqual([r.message for r in logged.records if r.levelno == logging.DEBUG][-2:], ["line1", "line2"])
+        self.assertEqual([r.message for r in logged.records if r.levelno == logging.ERROR], ["BOOM"])
+
 
 if __name__ == "__main__":
     main()
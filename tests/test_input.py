@@ -1,18 +1,22 @@
 import json
 import logging
+import os
 import random
+import time
 from collections.abc import Iterable, Iterator, Sequence
-from dataclasses import asdict
+from dataclasses import asdict, replace
 from io import StringIO
 from itertools import batched, repeat
-from threading import Event
+from queue import SimpleQueue
+from threading import Event, Semaphore
 from unittest import TestCase, main
 from unittest.mock import MagicMock, Mock, patch
 
 from swaystatus.click_event import ClickEvent
 from swaystatus.element import BaseElement, UpdateHandler
-from swaystatus.input import InputDriver, InputProcessor
+from swaystatus.input import MAX_PENDING, ClickCoalescer, InputDriver, InputParser, InputProcessor, UpdatePool
 from swaystatus.logger import logger
+from swaystatus.stats import Stats
 
 
 def dummy_click_event(name: str | None, instance: str | None) -> ClickEvent:
@@ -66,6 +70,7 @@ class TestInputProcessor(TestCase):
         self.assertIs(input_processor.click_target("test"), element)
         self.assertIs(input_processor.click_target("test", "a"), element_a)
         self.assertIs(input_processor.click_target("test", "b"), element)
+        self.assertIsNone(input_processor.click_target("other"))
 
     def test_element_delegation(self) -> None:
         class Element(BaseElement):
@@ -114,27 +119,130 @@ class TestInputProcessor(TestCase):
         self.assertEqual(logged.records[0].levelno, logging.WARNING)
         self.assertEqual(logged.records[0].message, "target element not found")
 
+    def test_click_event_unknown_fields(self) -> None:
+        click_event = dummy_click_event("test", None)
+        self.stdin.write(f"[\n{json.dumps({**asdict(click_event), 'modifiers': ['Shift']})}\n")
+        self.stdin.seek(0)
+        self.assertEqual(list(InputProcessor([BaseElement("test")], lambda: None)), [click_event])
+
+    def test_click_event_invalid(self) -> None:
+        self.stdin.write('[\n{"name": "test", "button": 1}\n')
+        self.stdin.seek(0)
+        with self.assertLogs(logger, logging.WARNING) as logged:
+            self.assertEqual(list(InputProcessor([BaseElement("test")], lambda: None)), [])
+        self.assertEqual(logged.records[0].message, "invalid click event {'name': 'test', 'button': 1}")
+
+    def test_click_event_unrouted_not_built(self) -> None:
+        self.push_input([dummy_click_event("missing", None)])
+        with (
+            patch("swaystatus.input.ClickEvent") as click_event_mock,
+            self.assertLogs(logger, logging.WARNING),
+        ):
+            self.assertEqual(list(InputProcessor([BaseElement("test")], lambda: None)), [])
+        click_event_mock.assert_not_called()
+
+    def test_coalesce(self) -> None:
+        class Element(BaseElement):
+            coalesce = {4: 10.0}
+
+            def on_click_4(self, click_event: ClickEvent) -> bool:
+                return on_click_mock(click_event)
+
+            def on_click_1(self, click_event: ClickEvent) -> bool:
+                return on_click_mock(click_event)
+
+        on_click_mock = Mock(return_value=False)
+        scrolls = [replace(dummy_click_event("volume", None), button=4, x=i) for i in range(random.randint(2, 10))]
+        click = dummy_click_event("volume", None)
+        self.push_input([*scrolls, click])
+        input_processor = InputProcessor([Element("volume")], lambda: None)
+        self.assertEqual(list(input_processor), [click, replace(scrolls[-1], count=len(scrolls))])
+        self.assertEqual(on_click_mock.call_count, 2)
+        self.assertEqual(input_processor.coalescer.coalesced, len(scrolls) - 1)
+
+    def test_coalesce_window(self) -> None:
+        class Element(BaseElement):
+            coalesce = {4: 0.05}
+
+            def on_click_4(self, click_event: ClickEvent) -> bool:
+                handled.put(click_event)
+                return False
+
+        read_fd, write_fd = os.pipe()
+        with os.fdopen(read_fd) as stdin_read, os.fdopen(write_fd, "w") as stdin_write, patch("sys.stdin", stdin_read):
+            handled: SimpleQueue[ClickEvent] = SimpleQueue()
+            input_driver = InputDriver(InputProcessor([Element("volume")], lambda: None))
+            input_driver.start()
+            scroll = replace(dummy_click_event("volume", None), button=4)
+            stdin_write.writelines(fake_input_lines([scroll] * 3))
+            stdin_write.flush()
+            self.assertEqual(handled.get(timeout=1.0), replace(scroll, count=3))
+            stdin_write.write(f",{json.dumps(asdict(scroll))}\n")
+            stdin_write.flush()
+            self.assertEqual(handled.get(timeout=1.0), scroll)
+            stdin_write.close()
+            input_driver.join(timeout=1.0)
+
+    def test_click_counts(self) -> None:
+        elements = [BaseElement("test")]
+        input_processor = InputProcessor(elements, lambda: None)
+        self.push_input([dummy_click_event("test", None), dummy_click_event("missing", None)])
+        with self.assertLogs(logger, logging.WARNING):
+            list(input_processor)
+        self.assertEqual(input_processor.clicks_received, 2)
+        self.assertEqual(input_processor.clicks_routed, 1)
+
     def test_update(self) -> None:
         class Element(BaseElement):
             def on_click_1(self, click_event: ClickEvent) -> bool:
                 return update
 
-        elements = [Element("clock")]
         click_events = [dummy_click_event("clock", None)]
 
         for update in [True, False]:
             with self.subTest(update=update):
+                elements = [Element("clock"), Element("other")]
                 updater_mock = Mock()
                 self.push_input(click_events)
                 with self.assertLogs(logger, level=logging.INFO) as logged:
                     self.assertEqual(list(InputProcessor(elements, updater_mock)), click_events)
                 self.assert_click_context(logged.records)
+                self.assertIs(elements[0].invalidated, update)
+                self.assertFalse(elements[1].invalidated)
                 if update:
                     self.assertEqual(logged.records[-1].message, "updating")
                     updater_mock.assert_called_once()
                 else:
                     updater_mock.assert_not_called()
 
+    def test_on_click_override(self) -> None:
+        class Element(BaseElement):
+            def on_click(self, click_event: ClickEvent) -> bool:
+                return True
+
+        element = Element("clock")
+        updater_mock = Mock()
+        click_events = [dummy_click_event("clock", None)]
+        self.push_input(click_events)
+        self.assertEqual(list(InputProcessor([element], updater_mock)), click_events)
+        self.assertTrue(element.invalidated)
+        updater_mock.assert_called_once()
+
+    def test_command_not_found(self) -> None:
+        elements = [
+            BaseElement("missing", on_click={1: ["swaystatus-no-such-command"]}),
+            BaseElement("clock", on_click={1: lambda *args: True}),
+        ]
+        click_events = [dummy_click_event("missing", None), dummy_click_event("clock", None)]
+        updater_mock = Mock()
+        self.push_input(click_events)
+        with self.assertLogs(logger, level=logging.ERROR) as logged:
+            self.assertEqual(list(InputProcessor(elements, updater_mock)), click_events)
+        self.assertEqual(logged.records[0].message, "unable to run ['swaystatus-no-such-command']")
+        self.assertFalse(elements[0].invalidated)
+        self.assertTrue(elements[1].invalidated)
+        updater_mock.assert_called_once()
+
     def test_update_handler(self) -> None:
         def update_handler_inner() -> bool:
             update_handler_called.set()
@@ -161,6 +269,243 @@ class TestInputProcessor(TestCase):
                 else:
                     updater_mock.assert_not_called()
 
+    def test_update_after_long_running_commands(self) -> None:
+        """Commands still running don't hold the update pool's threads, so a quick one still updates."""
+        size = random.randint(1, 4)
+        elements = [BaseElement("launcher", str(i), on_click={1: "exec sleep 2"}) for i in range(size)]
+        elements.append(BaseElement("launcher", "quick", on_click={1: "true"}))
+        updated = Event()
+        update_pool = UpdatePool(size, max_queue=1)
+        self.addCleanup(update_pool.shutdown)
+        self.push_input([dummy_click_event(e.name, e.instance) for e in elements])
+        list(InputProcessor(elements, updated.set, update_pool))
+        self.assertTrue(updated.wait(timeout=1.0))
+        self.assertTrue(elements[-1].invalidated)
+        self.assertFalse(any(e.invalidated for e in elements[:-1]))
+        self.assertEqual((update_pool.submitted, update_pool.dropped, update_pool.threads), (0, 0, 0))
+
+    def test_update_handler_timed(self) -> None:
+        def update_handler() -> bool:
+            time.sleep(0.05)
+            return True
+
+        class Element(BaseElement):
+            def on_click_1(self, click_event: ClickEvent) -> UpdateHandler:
+                return update_handler
+
+        element = Element("clock")
+        stats = Stats()
+        updated = Event()
+        self.push_input([dummy_click_event("clock", None)])
+        with patch("swaystatus.input.stats", stats):
+            list(InputProcessor([element], updated.set))
+            self.assertTrue(updated.wait(timeout=1.0))
+        histogram = stats.histogram("click", str(element))
+        assert histogram
+        self.assertEqual(histogram.count, 1)
+        self.assertGreaterEqual(histogram.total, 0.05)
+
+
+class TestClickCoalescer(TestCase):
+    def setUp(self) -> None:
+        class Element(BaseElement):
+            coalesce = {4: 1.0, 5: 2.0}
+
+        self.element = Element("volume")
+        self.coalescer = ClickCoalescer()
+
+    def click(self, button: int, x: int = 1) -> ClickEvent:
+        return replace(dummy_click_event("volume", None), button=button, x=x)
+
+    def test_not_coalesced(self) -> None:
+        self.assertFalse(self.coalescer.add(self.element, self.click(1), 0.0))
+        self.assertIsNone(self.coalescer.timeout(0.0))
+        self.assertEqual(self.coalescer.due(100.0), [])
+
+    def test_window(self) -> None:
+        for x in range(3):
+            self.assertTrue(self.coalescer.add(self.element, self.click(4, x), 0.25 * x))
+        self.assertTrue(self.coalescer.add(self.element, self.click(5), 0.5))
+        self.assertEqual(self.coalescer.timeout(0.5), 0.5)
+        self.assertEqual(self.coalescer.due(0.9), [])
+        self.assertEqual(self.coalescer.due(1.0), [(self.element, replace(self.click(4, 2), count=3))])
+        self.assertEqual(self.coalescer.timeout(1.0), 1.5)
+        self.assertEqual(self.coalescer.timeout(3.0), 0.0)
+        self.assertEqual(self.coalescer.coalesced, 2)
+
+    def test_new_window(self) -> None:
+        self.coalescer.add(self.element, self.click(4), 0.0)
+        self.assertEqual(len(self.coalescer.due(1.0)), 1)
+        self.coalescer.add(self.element, self.click(4), 1.5)
+        self.assertEqual(self.coalescer.due(2.0), [])
+        self.assertEqual(self.coalescer.due(2.5), [(self.element, self.click(4))])
+
+    def test_due_all(self) -> None:
+        self.coalescer.add(self.element, self.click(4), 0.0)
+        self.coalescer.add(self.element, self.click(5), 0.0)
+        self.assertEqual(len(self.coalescer.due()), 2)
+        self.assertIsNone(self.coalescer.timeout(0.0))
+
+
+class TestInputParser(TestCase):
+    def setUp(self) -> None:
+        self.click_events = [asdict(dummy_click_event(f"test{i}", "caf\u00e9")) for i in range(5)]
+
+    def feed(self, chunks: Iterable[bytes]) -> list:
+        parser = InputParser()
+        return [obj for chunk in chunks for obj in parser.feed(chunk)]
+
+    def test_lines(self) -> None:
+        data = "".join(fake_input_lines(ClickEvent(**e) for e in self.click_events)).encode()
+        self.assertEqual(self.feed([data]), self.click_events)
+
+    def test_framing(self) -> None:
+        data = ("[" + ",".join(map(json.dumps, self.click_events)) + "]").encode()
+        for size in [1, 2, 7, len(data)]:
+            with self.subTest(size=size):
+                self.assertEqual(self.feed(data[i : i + size] for i in range(0, len(data), size)), self.click_events)
+
+    def test_invalid(self) -> None:
+        data = f'[42,\n{{"name": }},\n{json.dumps(self.click_events[0])}\n'.encode()
+        with self.assertLogs(logger, logging.WARNING) as logged:
+            self.assertEqual(self.feed([data]), self.click_events[:1])
+        self.assertEqual(
+            [r.message for r in logged.records],
+            ["invalid click event 42", "invalid click event '{\"name\": }'"],
+        )
+
+    def test_invalid_unbalanced(self) -> None:
+        """An object with unbalanced braces doesn't hold up the objects after it."""
+        parser = InputParser()
+        with self.assertLogs(logger, logging.WARNING) as logged:
+            self.assertEqual(list(parser.feed(b'[{"name":"a","button":1, {"name":"b"}')), [{"name": "b"}])
+            for click_event in self.click_events:
+                self.assertEqual(list(parser.feed(f",{json.dumps(click_event)}\n".encode())), [click_event])
+        self.assertEqual(
+            [r.message for r in logged.records],
+            ['invalid click event \'{"name":"a","button":1\''],
+        )
+        self.assertEqual(parser._buffer, "")
+
+    def test_incomplete(self) -> None:
+        for text in ['{"name": "te', '{"name": tr', '{"x": -', '{"x": 1.', '{"name": "\\u00', '{"name"']:
+            with self.subTest(text=text), self.assertNoLogs(logger, logging.WARNING):
+                parser = InputParser()
+                self.assertEqual(list(parser.feed(text.encode())), [])
+                self.assertEqual(parser._buffer, text)
+
+    def test_incomplete_bounded(self) -> None:
+        parser = InputParser()
+        chunk = b"x" * 4096
+        with self.assertLogs(logger, logging.WARNING) as logged:
+            self.assertEqual(list(parser.feed(b'[{"name": "')), [])
+            for _ in range(MAX_PENDING // len(chunk) + 1):
+                self.assertEqual(list(parser.feed(chunk)), [])
+                self.assertLessEqual(len(parser._buffer), MAX_PENDING)
+            data = f'"}},\n{json.dumps(self.click_events[0])}\n'.encode()
+            self.assertEqual(list(parser.feed(data)), self.click_events[:1])
+        self.assertTrue(logged.records[0].message.startswith("discarded "))
+
+
+class TestUpdatePool(TestCase):
+    def setUp(self) -> None:
+        self.release = Event()
+        self.addCleanup(self.release.set)
+        self.started = Semaphore(0)
+
+    def blocking_handler(self) -> bool:
+        self.started.release()
+        return self.release.wait(timeout=5.0)
+
+    def occupy(self, pool: UpdatePool, keys: Iterable[tuple[BaseElement, int]]) -> None:
+        for key in keys:
+            pool.submit(key, self.blocking_handler, Mock())
+            self.assertTrue(self.started.acquire(timeout=1.0))
+
+    def test_bounded_threads(self) -> None:
+        size = random.randint(1, 4)
+        pool = UpdatePool(size, max_queue=10)
+        self.addCleanup(pool.shutdown)
+        elements = [BaseElement(f"test{i}") for i in range(size + 2)]
+        self.occupy(pool, [(element, 1) for element in elements[:size]])
+        for element in elements[size:]:
+            self.assertTrue(pool.submit((element, 1), self.blocking_handler, Mock()))
+        self.assertEqual(pool.threads, size)
+        self.assertEqual(pool.queued, 2)
+        self.release.set()
+        for _ in elements[size:]:
+            self.assertTrue(self.started.acquire(timeout=1.0))
+        self.assertEqual(pool.threads, size)
+
+    def test_reuses_threads(self) -> None:
+        pool = UpdatePool(4)
+        self.addCleanup(pool.shutdown)
+        done = Semaphore(0)
+        element = BaseElement("test")
+        for _ in range(10):
+            pool.submit((element, 1), lambda: True, done.release)
+            self.assertTrue(done.acquire(timeout=1.0))
+        self.assertEqual(pool.threads, 1)
+        self.assertEqual(pool.submitted, 10)
+
+    def test_merge(self) -> None:
+        pool = UpdatePool(1, policy="merge")
+        self.addCleanup(pool.shutdown)
+        element = BaseElement("test")
+        self.occupy(pool, [(BaseElement("other"), 1)])
+        done = Semaphore(0)
+        updaters = [Mock(side_effect=done.release) for _ in range(3)]
+        for updater in updaters[:2]:
+            self.assertTrue(pool.submit((element, 1), lambda: True, updater))
+        self.assertTrue(pool.submit((element, 3), lambda: True, updaters[2]))
+        self.assertEqual((pool.queued, pool.merged, pool.dropped), (2, 1, 0))
+        self.release.set()
+        for _ in range(2):
+            self.assertTrue(done.acquire(timeout=1.0))
+        updaters[0].assert_not_called()
+        updaters[1].assert_called_once_with()
+        updaters[2].assert_called_once_with()
+
+    def test_drop(self) -> None:
+        pool = UpdatePool(2, policy="drop")
+        self.addCleanup(pool.shutdown)
+        element = BaseElement("test")
+        self.occupy(pool, [(element, 1)])
+        self.assertFalse(pool.submit((element, 1), lambda: True, Mock()))
+        self.assertTrue(pool.submit((element, 2), self.blocking_handler, Mock()))
+        self.assertTrue(self.started.acquire(timeout=1.0))
+        self.assertEqual((pool.merged, pool.dropped), (0, 1))
+
+    def test_queue_full(self) -> None:
+        for policy in ["merge", "drop"]:
+            with self.subTest(policy=policy):
+                pool = UpdatePool(1, max_queue=1, policy=policy)
+                self.addCleanup(pool.shutdown)
+                self.occupy(pool, [(BaseElement("busy"), 1)])
+                self.assertTrue(pool.submit((BaseElement("first"), 1), lambda: True, Mock()))
+                with self.assertLogs(logger, level=logging.WARNING) as logged:
+                    self.assertFalse(pool.submit((BaseElement("second"), 1), lambda: True, Mock()))
+                self.assertIn("queue is full", logged.records[0].message)
+                self.assertEqual(pool.dropped, 1)
+
+    def test_exception(self) -> None:
+        pool = UpdatePool(1)
+        self.addCleanup(pool.shutdown)
+        done = Semaphore(0)
+        updater = Mock()
+
+        def failing_handler() -> bool:
+            done.release()
+            raise RuntimeError
+
+        with self.assertLogs(logger, level=logging.ERROR) as logged:
+            pool.submit((BaseElement("test"), 1), failing_handler, updater)
+            self.assertTrue(done.acquire(timeout=1.0))
+            pool.submit((BaseElement("test"), 1), lambda: True, done.release)
+            self.assertTrue(done.acquire(timeout=1.0))
+        self.assertEqual(logged.records[0].message, "unhandled exception in update handler")
+        updater.assert_not_called()
+
 
 class TestInputDriver(TestCase):
     def test_iterates_eagerly(self) -> None:
@@ -0,0 +1,102 @@
+import logging
+import tracemalloc
+from threading import Event, Thread
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from swaystatus.logger import logger
+from swaystatus.memory import MemoryMonitor, format_size, is_own, resident_memory, take_snapshot
+
+
+class TestMemoryMonitor(TestCase):
+    def setUp(self) -> None:
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+
+    def test_tick(self) -> None:
+        monitor = MemoryMonitor(60.0)
+        with self.assertLogs(logger, logging.INFO) as logged:
+            monitor.tick()
+        self.assertEqual(len(logged.records), 1)
+        self.assertRegex(logged.records[0].message, r"^memory: rss .+, traced .+, \d+ thread\(s\), \d+ module\(s\)")
+        self.assertIsNotNone(monitor.snapshot)
+
+    def test_tick_growth(self) -> None:
+        monitor = MemoryMonitor(60.0, top=3)
+        with self.assertLogs(logger, logging.INFO):
+            monitor.tick()
+        leak = [bytearray(1024) for _ in range(1000)]
+        with self.assertLogs(logger, logging.INFO) as logged:
+            monitor.tick()
+        messages = [r.message for r in logged.records]
+        self.assertTrue(messages[1].startswith("memory growth: "))
+        self.assertIn("elsewhere", messages[1])
+        self.assertIn(__file__, messages[2])
+        self.assertLessEqual(len(messages), 5)
+        del leak
+
+    def test_stop(self) -> None:
+        monitor = MemoryMonitor(60.0)
+        monitor.start()
+        monitor.stop()
+        monitor.join(timeout=1.0)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_stop_during_tick(self) -> None:
+        """Tracing stops only after a snapshot in progress is finished."""
+
+        def slow_snapshot() -> tracemalloc.Snapshot:
+            ticking.set()
+            release.wait(timeout=1.0)
+            return take_snapshot()
+
+        ticking, release = Event(), Event()
+        monitor = MemoryMonitor(60.0)
+        with patch("swaystatus.memory.take_snapshot", slow_snapshot), self.assertLogs(logger, logging.INFO) as logged:
+            monitor.start()
+            self.assertTrue(ticking.wait(timeout=1.0))
+            stopper = Thread(target=monitor.stop)
+            stopper.start()
+            stopper.join(timeout=0.05)
+            self.assertTrue(tracemalloc.is_tracing())
+            release.set()
+            stopper.join(timeout=1.0)
+        self.assertFalse(monitor.is_alive())
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertFalse([r for r in logged.records if r.levelno >= logging.ERROR])
+
+    def test_snapshot_ignores_tracing(self) -> None:
+        snapshot = take_snapshot()
+        filenames = {stat.traceback[0].filename for stat in snapshot.statistics("filename")}
+        self.assertNotIn(tracemalloc.__file__, filenames)
+
+    def test_is_own(self) -> None:
+        data = [bytearray(1024) for _ in range(10)]
+        snapshot = take_snapshot()
+        with patch("swaystatus.memory.PACKAGE_DIR", __file__):
+            self.assertTrue(any(is_own(stat.traceback) for stat in snapshot.statistics("filename")))
+        with patch("swaystatus.memory.PACKAGE_DIR", "/nonexistent"):
+            self.assertFalse(any(is_own(stat.traceback) for stat in snapshot.statistics("filename")))
+        del data
+
+
+class TestFormatSize(TestCase):
+    def test_format_size(self) -> None:
+        for size, expected in [
+            (None, "unknown"),
+            (0, "0 B"),
+            (1023, "1023 B"),
+            (-2048, "-2.0 KiB"),
+            (3 * 1024**2, "3.0 MiB"),
+            (5 * 1024**3, "5.0 GiB"),
+        ]:
+            with self.subTest(size=size):
+                self.assertEqual(format_size(size), expected)
+
+    def test_resident_memory(self) -> None:
+        with patch("builtins.open", side_effect=OSError):
+            self.assertIsNone(resident_memory())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import socket
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from swaystatus.element import BaseElement, LoggedProcess
+from swaystatus.input import InputProcessor
+from swaystatus.metrics import Metrics, MetricsServer, format_labels
+from swaystatus.output import OutputProcessor
+from swaystatus.stats import Stats
+
+
+def samples(text: str) -> dict[str, float]:
+    return {name: float(value) for name, value in (line.rsplit(" ", 1) for line in text.splitlines() if line[0] != "#")}
+
+
+class TestMetrics(TestCase):
+    def setUp(self) -> None:
+        self.stats = Stats()
+        stats_patcher = patch("swaystatus.metrics.stats", self.stats)
+        stats_patcher.start()
+        self.addCleanup(stats_patcher.stop)
+        self.elements = [BaseElement("clock"), BaseElement("disk")]
+        self.output_processor = OutputProcessor(self.elements, True)
+        self.input_processor = InputProcessor(self.elements, lambda: None)
+
+    def test_collect(self) -> None:
+        self.output_processor.lines_sent = 3
+        self.output_processor.lines_suppressed = 2
+        self.input_processor.clicks_received = 5
+        self.input_processor.clicks_routed = 4
+        self.input_processor.coalescer.coalesced = 6
+        self.input_processor.update_pool.submitted = 3
+        self.input_processor.update_pool.dropped = 1
+        self.stats.record("status line", "all elements", 0.5)
+        self.stats.record("blocks", "clock", 0.25)
+        self.stats.record("blocks", "clock", 0.75)
+        self.stats.record("click", "disk", 0.125)
+        with patch.object(LoggedProcess, "spawned", 7), patch("swaystatus.metrics.resident_memory", return_value=4096):
+            actual = samples(Metrics(self.output_processor, self.input_processor).collect())
+        expected = {
+            "swaystatus_status_lines_sent_total": 3,
+            "swaystatus_status_lines_suppressed_total": 2,
+            "swaystatus_status_lines_coalesced_total": 0,
+            "swaystatus_status_lines_dropped_total": 0,
+            "swaystatus_status_line_seconds_count": 1,
+            "swaystatus_status_line_seconds_sum": 0.5,
+            'swaystatus_blocks_seconds_count{element="clock"}': 2,
+            'swaystatus_blocks_seconds_sum{element="clock"}': 1.0,
+            "swaystatus_click_events_received_total": 5,
+            "swaystatus_click_events_routed_total": 4,
+            "swaystatus_click_events_coalesced_total": 6,
+            'swaystatus_click_handler_seconds_count{element="disk"}': 1,
+            "swaystatus_update_requests_submitted_total": 3,
+            "swaystatus_update_requests_dropped_total": 1,
+            "swaystatus_update_requests_queued": 0,
+            "swaystatus_processes_spawned_total": 7,
+            "swaystatus_resident_memory_bytes": 4096,
+        }
+        self.assertEqual({name: actual[name] for name in expected}, expected)
+        self.assertEqual(actual['swaystatus_blocks_seconds{element="clock",quantile="0.99"}'], 0.75)
+        self.assertGreaterEqual(actual["swaystatus_threads"], 1)
+
+    def test_collect_without_input(self) -> None:
+        text = Metrics(self.output_processor).collect()
+        self.assertNotIn("click", text)
+        self.assertIn("# TYPE swaystatus_status_lines_sent_total counter\n", text)
+
+    def test_format_labels(self) -> None:
+        self.assertEqual(format_labels({}), "")
+        self.assertEqual(format_labels({"element": 'a "b"\\c\n'}), '{element="a \\"b\\"\\\\c\\n"}')
+
+    def test_server(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "swaystatus" / "metrics.sock"
+            path.parent.mkdir()
+            path.touch()  # stale
+            server = MetricsServer(path, Metrics(self.output_processor))
+            server.start()
+            self.addCleanup(server.stop)
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.connect(str(path))
+                client.sendall(b"GET /metrics HTTP/1.0\r\n\r\n")
+                response = b"".join(iter(lambda: client.recv(4096), b"")).decode()
+            head, body = response.split("\r\n\r\n", 1)
+            self.assertTrue(head.startswith("HTTP/1.0 200"))
+            self.assertIn("Content-Type: text/plain; version=0.0.4; charset=utf-8", head)
+            self.assertIn("swaystatus_status_lines_sent_total 0\n", body)
+            server.stop()
+            self.assertFalse(path.exists())
+
+
+if __name__ == "__main__":
+    main()
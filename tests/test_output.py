@@ -1,19 +1,23 @@
+import asyncio
 import itertools
 import json
 import logging
 import random
-from collections.abc import Iterator, Sequence
+import time
+from collections.abc import AsyncIterator, Iterator, Sequence
 from io import StringIO
 from signal import SIGCONT, SIGSTOP
 from string import ascii_letters
-from threading import Barrier
+from threading import Barrier, Event
 from unittest import TestCase, main
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 from swaystatus.block import Block
 from swaystatus.element import BaseElement
 from swaystatus.logger import logger
 from swaystatus.output import OutputDriver, OutputProcessor
+from swaystatus.startup import Startup
+from swaystatus.stats import Stats
 
 
 class TestOutputProcessor(TestCase):
@@ -65,12 +69,321 @@ class TestOutputProcessor(TestCase):
             [Block(full_text=f"block {n}", name="test") for n in block_names],
         )
 
+    def test_status_line_interval(self) -> None:
+        class Element(BaseElement):
+            def blocks(self) -> Iterator[Block]:
+                yield self.block(f"{self.name} {next(counts[self.name])}")
+
+        counts = {name: itertools.count() for name in ["fast", "slow", "manual"]}
+        elements = [Element("fast", interval=1.0), Element("slow", interval=60.0), Element("manual")]
+        output_processor = OutputProcessor(elements, False)
+
+        def full_texts_at(now: float) -> list[str | None]:
+            with patch("swaystatus.output.time.monotonic", return_value=now):
+                return [b.full_text for b in output_processor.status_line()]
+
+        self.assertEqual(full_texts_at(0.0), ["fast 0", "slow 0", "manual 0"])
+        self.assertEqual(full_texts_at(0.5), ["fast 0", "slow 0", "manual 0"])
+        self.assertEqual(full_texts_at(1.0), ["fast 1", "slow 0", "manual 0"])
+        self.assertEqual(full_texts_at(60.0), ["fast 2", "slow 1", "manual 0"])
+        output_processor.refresh()
+        self.assertEqual(full_texts_at(60.5), ["fast 3", "slow 2", "manual 1"])
+
+    def test_status_line_invalidated(self) -> None:
+        class Element(BaseElement):
+            def blocks(self) -> Iterator[Block]:
+                yield self.block(f"{self.name} {next(counts[self.name])}")
+
+        counts = {name: itertools.count() for name in ascii_letters[:3]}
+        elements = [Element(name, interval=60.0) for name in counts]
+        output_processor = OutputProcessor(elements, False)
+
+        def full_texts_at(now: float) -> list[str | None]:
+            with patch("swaystatus.output.time.monotonic", return_value=now):
+                return [b.full_text for b in output_processor.status_line()]
+
+        self.assertEqual(full_texts_at(0.0), ["a 0", "b 0", "c 0"])
+        elements[1].invalidate()
+        self.assertEqual(full_texts_at(1.0), ["a 0", "b 1", "c 0"])
+        self.assertFalse(elements[1].invalidated)
+        self.assertEqual(full_texts_at(2.0), ["a 0", "b 1", "c 0"])
+
+    def test_status_line_default_interval(self) -> None:
+        class Element(BaseElement):
+            def blocks(self) -> Iterator[Block]:
+                yield self.block(f"{self.name} {next(counts[self.name])}")
+
+        counts = {name: itertools.count() for name in ["default", "own"]}
+        elements = [Element("default"), Element("own", interval=10.0)]
+        output_processor = OutputProcessor(elements, False, 2.0)
+
+        def full_texts_at(now: float) -> list[str | None]:
+            with patch("swaystatus.output.time.monotonic", return_value=now):
+                return [b.full_text for b in output_processor.status_line()]
+
+        self.assertEqual(full_texts_at(0.0), ["default 0", "own 0"])
+        with patch("swaystatus.output.time.monotonic", return_value=0.0):
+            self.assertEqual(output_processor.timeout(), 2.0)
+        self.assertEqual(full_texts_at(2.0), ["default 1", "own 0"])
+        self.assertEqual(full_texts_at(10.0), ["default 2", "own 1"])
+
+    def test_status_line_concurrent(self) -> None:
+        class Element(BaseElement):
+            def blocks(self) -> Iterator[Block]:
+                yield self.block(f"{self.name} {next(counts[self.name])}")
+
+        counts = {name: itertools.count() for name in ascii_letters[: random.randint(2, 10)]}
+        elements = [Element(name) for name in counts]
+        output_processor = OutputProcessor(elements, False, render_workers=3)
+        self.assertEqual(
+            [b.full_text for b in output_processor.status_line()],
+            [f"{name} 0" for name in counts],
+        )
+
+    def test_status_line_concurrent_timeout(self) -> None:
+        class Element(BaseElement):
+            def blocks(self) -> Iterator[Block]:
+                if self.name == "slow":
+                    release.wait(timeout=1.0)
+                yield self.block(f"{self.name} {next(counts[self.name])}")
+
+        release = Event()
+        updated = Event()
+        counts = {name: itertools.count() for name in ["fast", "slow"]}
+        elements = [Element("fast"), Element("slow")]
+        elements[1].updater = updater_mock = Mock(side_effect=lambda: updated.set())
+        output_processor = OutputProcessor(elements, False, render_workers=2, render_timeout=0.01)
+
+        with self.assertLogs(logger, logging.WARNING) as logged:
+            self.assertEqual([b.full_text for b in output_processor.status_line()], ["fast 0"])
+        self.assertEqual(
+            [r.message for r in logged.records],
+            [f"{elements[1]} exceeded its time budget, using previous blocks"],
+        )
+
+        elements[0].invalidate()
+        elements[1].invalidate()
+        self.assertEqual([b.full_text for b in output_processor.status_line()], ["fast 1"])
+
+        release.set()
+        self.assertTrue(updated.wait(timeout=1.0))
+        updater_mock.assert_called_once_with()
+        self.assertEqual([b.full_text for b in output_processor.status_line()], ["fast 1", "slow 0"])
+
+    def test_status_line_invalidated_while_pending(self) -> None:
+        class Element(BaseElement):
+            def blocks(self) -> Iterator[Block]:
+                release.wait(timeout=1.0)
+                yield self.block(f"slow {next(count)}")
+
+        def wait_for(text: str) -> None:
+            deadline = time.monotonic() + 1.0
+            while [b.full_text for b in output_processor.status_line()] != [text]:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.001)
+
+        for demoted in [False, True]:
+            with self.subTest(demoted=demoted):
+                count = itertools.count()
+                release = Event()
+                updated = Event()
+                element = Element("slow")
+                element.updater = updated.set
+                if demoted:
+                    output_processor = OutputProcessor([element], False, watchdog_budget=0.01, watchdog_strikes=1)
+                else:
+                    output_processor = OutputProcessor([element], False, render_workers=1, render_timeout=0.01)
+                with self.assertLogs(logger, logging.WARNING):
+                    if demoted:
+                        output_processor._watch(0, 1.0)
+                    self.assertEqual(output_processor.status_line(), [])
+                element.invalidate()
+                self.assertEqual(output_processor.status_line(), [])
+                self.assertTrue(element.invalidated)
+                release.set()
+                self.assertTrue(updated.wait(timeout=1.0))
+                self.assertEqual([b.full_text for b in output_processor.status_line()], ["slow 0"])
+                wait_for("slow 1")
+
+    def test_status_line_watchdog(self) -> None:
+        class Element(BaseElement):
+            def blocks(self) -> Iterator[Block]:
+                time.sleep(delay)
+                release.wait(timeout=1.0)
+                yield self.block(f"{self.name} {next(count)}")
+
+        def wait_for(text: str) -> None:
+            deadline = time.monotonic() + 1.0
+            while [b.full_text for b in output_processor.status_line()] != [text]:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.001)
+
+        count = itertools.count()
+        delay = 0.02
+        release = Event()
+        release.set()
+        updated = Event()
+        element = Element("slow")
+        element.updater = Mock(side_effect=lambda: updated.set())
+        output_processor = OutputProcessor([element], False, watchdog_budget=0.01, watchdog_strikes=2)
+
+        self.assertEqual([b.full_text for b in output_processor.status_line()], ["slow 0"])
+        element.invalidate()
+        with self.assertLogs(logger, logging.WARNING) as logged:
+            self.assertEqual([b.full_text for b in output_processor.status_line()], ["slow 1"])
+        args = logged.records[0].args
+        assert isinstance(args, tuple)
+        self.assertEqual(
+            [r.message for r in logged.records],
+            [f"{element} took {args[1]:f} seconds to produce blocks (budget: 0.01), refreshing it in the background"],
+        )
+
+        delay = 0.0
+        release.clear()
+        element.invalidate()
+        with self.assertNoLogs(logger, logging.WARNING):
+            self.assertEqual([b.full_text for b in output_processor.status_line()], ["slow 1"])
+        release.set()
+        self.assertTrue(updated.wait(timeout=1.0))
+        self.assertEqual([b.full_text for b in output_processor.status_line()], ["slow 2"])
+
+        with self.assertLogs(logger, logging.INFO) as logged:
+            for text in ["slow 3", "slow 4"]:
+                element.invalidate()
+                output_processor.status_line()
+                wait_for(text)
+        self.assertIn(f"{element} is within its budget again, refreshing it in the foreground", logged.output[-1])
+
+        element.invalidate()
+        self.assertEqual([b.full_text for b in output_processor.status_line()], ["slow 5"])
+
+    def test_status_line_watchdog_background_threads(self) -> None:
+        elements = [BaseElement("a"), BaseElement("b")]
+        output_processor = OutputProcessor(elements, False, watchdog_budget=0.01, watchdog_strikes=1)
+        with self.assertLogs(logger, logging.INFO):
+            for _ in range(5):
+                output_processor._watch(0, 1.0)
+                output_processor._watch(0, 0.0)
+            assert output_processor._background_pool
+            self.assertEqual(output_processor._background_pool.size, 1)
+            output_processor._watch(0, 1.0)
+            output_processor._watch(1, 1.0)
+            self.assertEqual(output_processor._background_pool.size, 2)
+            output_processor._watch(1, 0.0)
+            self.assertEqual(output_processor._background_pool.size, 1)
+
+    def test_status_line_async_element(self) -> None:
+        class Element(BaseElement):
+            async def blocks(self) -> AsyncIterator[Block]:
+                await asyncio.sleep(0)
+                yield self.block(f"async {self.name}")
+
+        elements = [Element("a"), Element("b")]
+        for render_workers in [None, 2]:
+            with self.subTest(render_workers=render_workers):
+                output_processor = OutputProcessor(elements, False, render_workers=render_workers)
+                self.assertEqual([b.full_text for b in output_processor.status_line()], ["async a", "async b"])
+
+    def test_status_line_async(self) -> None:
+        class SyncElement(BaseElement):
+            def blocks(self) -> Iterator[Block]:
+                yield self.block(f"sync {self.name}")
+
+        class AsyncElement(BaseElement):
+            async def blocks(self) -> AsyncIterator[Block]:
+                started.append(self.name)
+                await asyncio.sleep(0.01)
+                yield self.block(f"async {self.name}")
+
+        started: list[str] = []
+        elements = [AsyncElement("a"), SyncElement("b"), AsyncElement("c")]
+        for render_workers in [None, 2]:
+            with self.subTest(render_workers=render_workers):
+                started.clear()
+                output_processor = OutputProcessor(elements, False, render_workers=render_workers)
+                self.assertEqual(
+                    [b.full_text for b in asyncio.run(output_processor.status_line_async())],
+                    ["async a", "sync b", "async c"],
+                )
+                self.assertEqual(started, ["a", "c"])
+
+    def test_status_line_async_timeout(self) -> None:
+        class Element(BaseElement):
+            async def blocks(self) -> AsyncIterator[Block]:
+                if self.name == "slow":
+                    await release.wait()
+                yield self.block(f"{self.name} {next(counts[self.name])}")
+
+        async def run() -> None:
+            with self.assertLogs(logger, logging.WARNING) as logged:
+                self.assertEqual([b.full_text for b in await output_processor.status_line_async()], ["fast 0"])
+            self.assertEqual(
+                [r.message for r in logged.records],
+                [f"{elements[1]} exceeded its time budget, using previous blocks"],
+            )
+            release.set()
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+            updater_mock.assert_called_once_with()
+            self.assertEqual([b.full_text for b in await output_processor.status_line_async()], ["fast 0", "slow 0"])
+
+        release = asyncio.Event()
+        counts = {name: itertools.count() for name in ["fast", "slow"]}
+        elements = [Element("fast"), Element("slow")]
+        elements[1].updater = updater_mock = Mock()
+        output_processor = OutputProcessor(elements, False, render_timeout=0.01)
+        asyncio.run(run())
+
+    def test_encode_status_line(self) -> None:
+        class Element(BaseElement):
+            def blocks(self) -> Iterator[Block]:
+                for text in texts[self.name]:
+                    yield self.block(text)
+
+        texts = {"a": ["a1", "a2"], "b": [], "c": ["c1"]}
+        elements = [Element(name) for name in texts]
+        output_processor = OutputProcessor(elements, False)
+        output_processor.status_line()
+        self.assertEqual(
+            json.loads(output_processor.encode_status_line()),
+            [b.min_dict() for b in output_processor.status_line()],
+        )
+
+    def test_encode_status_line_cached(self) -> None:
+        class Element(BaseElement):
+            def blocks(self) -> Iterator[Block]:
+                yield self.block(texts[self.name])
+
+        texts = {name: name for name in ascii_letters[:10]}
+        elements = [Element(name) for name in texts]
+        output_processor = OutputProcessor(elements, False)
+
+        def encode_calls() -> int:
+            with patch.object(Block, "encode", autospec=True, side_effect=Block.encode) as encode_mock:
+                output_processor.status_line()
+                output_processor.encode_status_line()
+            return encode_mock.call_count
+
+        self.assertEqual(encode_calls(), len(elements))
+        self.assertEqual(encode_calls(), 0)
+        elements[0].invalidate()
+        self.assertEqual(encode_calls(), 0, "unchanged blocks should not be encoded again")
+        texts["b"] = "changed"
+        elements[1].invalidate()
+        elements[2].invalidate()
+        self.assertEqual(encode_calls(), 1)
+        self.assertEqual(
+            json.loads(output_processor.encode_status_line()),
+            [{"full_text": texts[n], "name": n} for n in texts],
+        )
+
     def test_iter_encoded(self) -> None:
         class Element(BaseElement):
             def blocks(self) -> Iterator[Block]:
                 yield self.block(f"i={next(iteration)}")
 
         def next_iteration() -> tuple[Sequence[Block], list[str]]:
+            element.invalidate()
             pos = self.stdout.tell()
             blocks = next(status_lines)
             self.stdout.seek(pos)
@@ -83,7 +396,8 @@ class TestOutputProcessor(TestCase):
             return f",[{json.dumps(block_ith(i).min_dict())}]\n"
 
         iteration = itertools.count(0)
-        output_processor = OutputProcessor([Element("clock")], False)
+        element = Element("clock")
+        output_processor = OutputProcessor([element], False)
         status_lines = iter(output_processor)
 
         blocks, output_lines = next_iteration()
@@ -101,6 +415,133 @@ class TestOutputProcessor(TestCase):
             self.assertEqual(blocks, [block_ith(i)])
             self.assertEqual(output_lines, [body_line_ith(i)])
 
+    def test_iter_encoded_unescaped(self) -> None:
+        class Element(BaseElement):
+            def blocks(self) -> Iterator[Block]:
+                yield self.block("\uf017 12:00")
+
+        next(iter(OutputProcessor([Element("clock")], False)))
+        self.stdout.seek(0)
+        self.assertEqual(self.stdout.readlines()[-1], ',[{"full_text": "\uf017 12:00", "name": "clock"}]\n')
+
+    def test_iter_suppress_unchanged(self) -> None:
+        class Element(BaseElement):
+            def blocks(self) -> Iterator[Block]:
+                yield self.block(text)
+
+        def next_output_lines(now: float) -> list[str]:
+            element.invalidate()
+            pos = self.stdout.tell()
+            with patch("swaystatus.output.time.monotonic", return_value=now):
+                next(status_lines)
+            self.stdout.seek(pos)
+            return self.stdout.readlines()
+
+        def body_line(text: str) -> str:
+            return f",[{json.dumps(Block(full_text=text, name='test').min_dict())}]\n"
+
+        element = Element("test")
+        output_processor = OutputProcessor([element], False, suppress_unchanged=True, keepalive=10.0)
+        status_lines = iter(output_processor)
+
+        text = "a"
+        self.assertEqual(next_output_lines(0.0)[-1], body_line("a"))
+        self.assertEqual(next_output_lines(1.0), [])
+        self.assertEqual(next_output_lines(2.0), [])
+        text = "b"
+        self.assertEqual(next_output_lines(3.0), [body_line("b")])
+        self.assertEqual(next_output_lines(12.0), [])
+        self.assertEqual(next_output_lines(13.0), [body_line("b")])
+        self.assertEqual(output_processor.lines_sent, 3)
+        self.assertEqual(output_processor.lines_suppressed, 3)
+
+    def test_iter_keepalive_idle(self) -> None:
+        class Element(BaseElement):
+            def blocks(self) -> Iterator[Block]:
+                yield self.block("same")
+
+        def timeout_at(now: float) -> float | None:
+            with patch("swaystatus.output.time.monotonic", return_value=now):
+                return output_processor.timeout()
+
+        output_processor = OutputProcessor([Element("idle")], False, suppress_unchanged=True)
+        next(iter(output_processor))
+        self.assertIsNone(timeout_at(4.0))
+        output_processor = OutputProcessor([Element("idle")], False, suppress_unchanged=True, keepalive=10.0)
+        status_lines = iter(output_processor)
+        with patch("swaystatus.output.time.monotonic", return_value=0.0):
+            next(status_lines)
+        self.assertEqual(timeout_at(4.0), 6.0)
+        self.assertEqual(timeout_at(12.0), 0.0)
+        with patch("swaystatus.output.time.monotonic", return_value=12.0):
+            next(status_lines)
+        self.assertEqual(output_processor.lines_sent, 2)
+        self.assertEqual(timeout_at(12.0), 10.0)
+
+    def test_iter_not_suppressed_by_default(self) -> None:
+        class Element(BaseElement):
+            def blocks(self) -> Iterator[Block]:
+                yield self.block("same")
+
+        output_processor = OutputProcessor([Element("test")], False)
+        status_lines = iter(output_processor)
+        for _ in range(random.randint(2, 10)):
+            output_processor.refresh()
+            next(status_lines)
+        self.stdout.seek(0)
+        self.assertEqual(len(set(self.stdout.readlines()[2:])), 1)
+        self.assertEqual(output_processor.lines_suppressed, 0)
+
+    def test_iter_stats(self) -> None:
+        """Producing blocks is timed for each element."""
+
+        class Element(BaseElement):
+            def blocks(self) -> Iterator[Block]:
+                yield self.block("test")
+
+        stats = Stats()
+        elements = [Element("a"), Element("b")]
+        with patch("swaystatus.output.stats", stats):
+            status_lines = iter(OutputProcessor(elements, False))
+            next(status_lines)
+        for element in elements:
+            histogram = stats.histogram("blocks", str(element))
+            assert histogram
+            self.assertEqual(histogram.count, 1)
+        self.assertIsNotNone(stats.histogram("status line", "all elements"))
+
+    def test_iter_startup(self) -> None:
+        """Startup finishes with the first status line."""
+
+        class Element(BaseElement):
+            def blocks(self) -> Iterator[Block]:
+                yield self.block("test")
+
+        startup = Startup()
+        with patch("swaystatus.output.startup", startup), self.assertLogs(logger, logging.DEBUG):
+            status_lines = iter(OutputProcessor([Element("test")], False))
+            next(status_lines)
+        self.assertTrue(startup.finished)
+        self.assertEqual([p.name for p in startup.phases], ["first status line"])
+        next(status_lines)
+        self.assertEqual(len(startup.phases), 1)
+
+    def test_iter_writer(self) -> None:
+        """Only status lines may be dropped by the writer."""
+
+        class Element(BaseElement):
+            def blocks(self) -> Iterator[Block]:
+                yield self.block("test")
+
+        writer = Mock()
+        output_processor = OutputProcessor([Element("test")], False, writer=writer)
+        next(iter(output_processor))
+        writer.open.assert_called_once_with()
+        self.assertEqual([c.kwargs.get("droppable", False) for c in writer.write.call_args_list], [False, False, True])
+        output_processor.close(timeout=1.0)
+        output_processor.close(timeout=1.0)
+        writer.close.assert_called_once_with(timeout=1.0)
+
 
 class TestOutputDriver(TestCase):
     def test_iterate_on_tick(self) -> None:
@@ -0,0 +1,71 @@
+import pstats
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Event, Thread
+from unittest import TestCase, main
+
+from swaystatus.profiler import Profiler
+
+
+def main_work() -> int:
+    return sum(range(100))
+
+
+def thread_work() -> int:
+    return sum(range(100))
+
+
+class TestProfiler(TestCase):
+    def setUp(self) -> None:
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = Path(temp_dir.name) / "profile" / "stats"
+
+    def function_names(self) -> set[str]:
+        return {name for _, _, name in pstats.Stats(str(self.path)).stats}  # type: ignore[attr-defined]
+
+    def test_runcall(self) -> None:
+        """The calling thread and the threads it starts are profiled together."""
+
+        def run() -> int:
+            thread = Thread(target=thread_work)
+            thread.start()
+            thread.join()
+            return main_work()
+
+        profiler = Profiler(self.path)
+        self.assertEqual(profiler.runcall(run), 4950)
+        self.assertIsNone(Profiler.running)
+        profiler.dump()
+        self.assertTrue({"run", "main_work", "thread_work"} <= self.function_names())
+
+    def test_dump_while_running(self) -> None:
+        """The calls that have returned are written while threads are still running."""
+        started = Event()
+        release = Event()
+
+        def wait() -> None:
+            thread_work()
+            started.set()
+            release.wait(timeout=1.0)
+
+        def run() -> None:
+            self.assertIs(Profiler.running, profiler)
+            thread = Thread(target=wait)
+            thread.start()
+            self.assertTrue(started.wait(timeout=1.0))
+            profiler.dump()
+            release.set()
+            thread.join()
+
+        profiler = Profiler(self.path)
+        profiler.runcall(run)
+        self.assertIn("thread_work", self.function_names())
+
+    def test_dump_nothing(self) -> None:
+        Profiler(self.path).dump()
+        self.assertFalse(self.path.exists())
+
+
+if __name__ == "__main__":
+    main()
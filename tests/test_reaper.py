@@ -0,0 +1,157 @@
+import logging
+import random
+import shutil
+import threading
+import time
+from pathlib import Path
+from subprocess import PIPE, Popen, TimeoutExpired
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+from unittest.mock import Mock, patch
+
+from swaystatus.context import context_group, context_var
+from swaystatus.element import LoggedProcess, resolve_command
+from swaystatus.logger import logger
+from swaystatus.reaper import Reaper
+from swaystatus.trace import Tracer
+
+
+class TestReaper(TestCase):
+    def popen(self, command: str) -> Popen:
+        process = Popen(command, shell=True, stdout=PIPE, stderr=PIPE)
+        self.addCleanup(process.kill)
+        return process
+
+    def watch(self, reaper: Reaper, process: Popen) -> tuple[threading.Event, Mock, Mock]:
+        stdout, stderr = Mock(), Mock()
+        assert process.stdout and process.stderr
+        return reaper.watch(process, [(process.stdout, stdout), (process.stderr, stderr)]), stdout, stderr
+
+    def test_lines(self) -> None:
+        reaper = Reaper()
+        process = self.popen("echo one; echo two >&2; printf 'three\\nfour'")
+        done, stdout, stderr = self.watch(reaper, process)
+        self.assertTrue(done.wait(timeout=5.0))
+        self.assertEqual([c.args for c in stdout.call_args_list], [("one",), ("three",), ("four",)])
+        self.assertEqual([c.args for c in stderr.call_args_list], [("two",)])
+        self.assertEqual(process.returncode, 0)
+        self.assertEqual(reaper.watching, 0)
+
+    def test_returncode(self) -> None:
+        reaper = Reaper()
+        returncode = random.randint(1, 100)
+        process = self.popen(f"exit {returncode}")
+        done, *_ = self.watch(reaper, process)
+        self.assertTrue(done.wait(timeout=5.0))
+        self.assertEqual(process.returncode, returncode)
+
+    def test_single_thread(self) -> None:
+        reaper = Reaper()
+        processes = [self.popen(f"sleep 0.1; echo {i}") for i in range(12)]
+        watches = [self.watch(reaper, process) for process in processes]
+        self.assertEqual(len([t for t in threading.enumerate() if t is reaper._thread]), 1)
+        for i, (done, stdout, _) in enumerate(watches):
+            self.assertTrue(done.wait(timeout=5.0))
+            stdout.assert_called_once_with(str(i))
+
+    def test_without_pidfd(self) -> None:
+        reaper = Reaper()
+        with patch("swaystatus.reaper.os.pidfd_open", side_effect=OSError, create=True):
+            process = self.popen("echo polled")
+            done, stdout, _ = self.watch(reaper, process)
+            self.assertTrue(done.wait(timeout=5.0))
+        stdout.assert_called_once_with("polled")
+        self.assertEqual(process.returncode, 0)
+
+    def test_updater(self) -> None:
+        for command, called in [("true", True), ("false", False)]:
+            with self.subTest(command=command):
+                reaper = Reaper()
+                updated = threading.Event()
+                contexts: list[str | None] = []
+
+                def update(updated: threading.Event = updated, contexts: list[str | None] = contexts) -> None:
+                    contexts.append(context_var.get())
+                    updated.set()
+
+                with context_group("click event"):
+                    done = reaper.watch(self.popen(command), [], update)
+                self.assertTrue(done.wait(timeout=5.0))
+                self.assertEqual(updated.wait(timeout=1.0 if called else 0.1), called)
+                if called:
+                    assert isinstance(contexts[0], str)
+                    self.assertTrue(contexts[0].startswith("click event"))
+
+    def test_updater_exception(self) -> None:
+        reaper = Reaper()
+        with self.assertLogs(logger, logging.ERROR) as logged:
+            done = reaper.watch(self.popen("true"), [], Mock(side_effect=RuntimeError))
+            self.assertTrue(done.wait(timeout=5.0))
+            for _ in range(100):
+                if logged.records:
+                    break
+                time.sleep(0.01)
+        self.assertEqual(logged.records[0].message, "unhandled exception in updater")
+        self.assertEqual(reaper.watching, 0)
+
+    def test_trace(self) -> None:
+        tracer = Tracer()
+        tracer.start(Path("trace.json"))
+        reaper = Reaper()
+        process = self.popen("true")
+        with patch("swaystatus.reaper.tracer", tracer), context_group("click event"):
+            self.assertTrue(reaper.watch(process, []).wait(timeout=5.0))
+        span = tracer.events()[-1]
+        self.assertEqual((span["cat"], span["name"]), ("process", f"process {process.pid}"))
+        self.assertEqual(span["args"]["args"], "true")
+        self.assertTrue(span["args"]["context"].startswith("click event"))
+
+    def test_context(self) -> None:
+        with self.assertLogs(logger, logging.DEBUG) as logged, context_group("click event"):
+            LoggedProcess("echo hello").wait(timeout=5.0)
+        record = next(r for r in logged.records if r.message == "hello")
+        assert hasattr(record, "context") and isinstance(record.context, str)
+        self.assertTrue(record.context.startswith("click event"))
+
+
+class TestLoggedProcess(TestCase):
+    def test_wait_timeout(self) -> None:
+        process = LoggedProcess("exec sleep 5")
+        self.addCleanup(process.wait)
+        self.addCleanup(process.kill)
+        with self.assertRaises(TimeoutExpired):
+            process.wait(timeout=0.01)
+        self.assertIsNone(process.returncode)
+
+    def test_direct(self) -> None:
+        with self.assertLogs(logger, logging.DEBUG) as logged:
+            process = LoggedProcess(["echo", "a  b", "$HOME"])
+            self.assertEqual(process.wait(timeout=5.0), 0)
+        self.assertEqual(process.args, [shutil.which("echo"), "a  b", "$HOME"])
+        self.assertEqual([r.message for r in logged.records], ["a  b $HOME"])
+
+    def test_shell(self) -> None:
+        with self.assertLogs(logger, logging.DEBUG) as logged:
+            process = LoggedProcess("echo $0")
+            self.assertEqual(process.wait(timeout=5.0), 0)
+        self.assertEqual(process.args, "echo $0")
+        self.assertEqual([r.message for r in logged.records], ["/bin/sh"])
+
+    def test_resolve_command(self) -> None:
+        with TemporaryDirectory() as temp_dir:
+            program = Path(temp_dir) / "program"
+            program.touch(mode=0o755)
+            self.assertEqual(resolve_command(["program", "-x"], {"PATH": temp_dir}), [str(program), "-x"])
+            self.assertEqual(resolve_command(["missing", "-x"], {"PATH": temp_dir}), ["missing", "-x"])
+
+    def test_no_thread_per_process(self) -> None:
+        processes = [LoggedProcess("sleep 0.1") for _ in range(12)]
+        names = [thread.name for thread in threading.enumerate()]
+        self.assertFalse([name for name in names if name.startswith("LoggerThread")])
+        self.assertLessEqual(names.count("ReaperThread"), 1)
+        for process in processes:
+            self.assertEqual(process.wait(timeout=5.0), 0)
+
+
+if __name__ == "__main__":
+    main()
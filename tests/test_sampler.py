@@ -0,0 +1,132 @@
+import sys
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Event, Thread
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from swaystatus.sampler import SAMPLE_DURATION, Sampler, SamplerControl, fold_stack
+
+
+def busy(release: Event) -> None:
+    release.wait(timeout=1.0)
+
+
+class TestFoldStack(TestCase):
+    def test_fold_stack(self) -> None:
+        frames = fold_stack("MainThread", sys._getframe()).split(";")
+        self.assertEqual(frames[0], "MainThread")
+        self.assertTrue(frames[-1].startswith("TestFoldStack.test_fold_stack (test_sampler.py:"))
+
+
+class TestSampler(TestCase):
+    def setUp(self) -> None:
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = Path(temp_dir.name) / "swaystatus" / "samples"
+
+    def test_samples(self) -> None:
+        """The stacks of other threads are counted and written as folded stacks."""
+        release = Event()
+        thread = Thread(target=busy, args=(release,), name="BusyThread")
+        thread.start()
+        sampler = Sampler(10.0, self.path, interval=0.001)
+        for _ in range(3):
+            sampler.sample()
+        sampler.write()
+        release.set()
+        thread.join()
+        lines = self.path.read_text().splitlines()
+        busy_lines = [line for line in lines if line.startswith("BusyThread;")]
+        self.assertEqual(len(busy_lines), 1)
+        stack, count = busy_lines[0].rsplit(" ", 1)
+        self.assertIn(";busy (test_sampler.py:", stack)
+        self.assertEqual(count, "3")
+        self.assertFalse(any(line.startswith("SamplerThread;") for line in lines))
+
+    def test_run_until_stopped(self) -> None:
+        """Stopping early still writes the samples taken."""
+        sampler = Sampler(60.0, self.path, interval=0.001)
+        sampler.start()
+        sampler.stop()
+        sampler.join(timeout=1.0)
+        self.assertFalse(sampler.is_alive())
+        self.assertTrue(self.path.exists())
+
+
+class TestSamplerControl(TestCase):
+    def setUp(self) -> None:
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.control_path = Path(temp_dir.name) / "sample"
+        self.control = SamplerControl(self.control_path, Path(temp_dir.name) / "samples")
+        sampler_patcher = patch("swaystatus.sampler.Sampler")
+        self.sampler_mock = sampler_patcher.start()
+        self.addCleanup(sampler_patcher.stop)
+
+    def test_no_control_file(self) -> None:
+        self.control.tick()
+        self.sampler_mock.assert_not_called()
+
+    def test_control_file(self) -> None:
+        """A control file starts sampling for the seconds it contains, and is removed."""
+        for text, duration in [("", SAMPLE_DURATION), ("30\n", 30.0)]:
+            with self.subTest(text=text):
+                self.sampler_mock.reset_mock()
+                self.sampler_mock.return_value.is_alive.return_value = False
+                self.control_path.write_text(text)
+                self.control.tick()
+                self.assertFalse(self.control_path.exists())
+                self.sampler_mock.assert_called_once_with(duration, self.control.samples_path)
+                self.sampler_mock.return_value.start.assert_called_once_with()
+
+    def test_control_file_invalid(self) -> None:
+        self.control_path.write_text("forever")
+        with self.assertLogs("swaystatus", level="WARNING"):
+            self.control.tick()
+        self.assertFalse(self.control_path.exists())
+        self.sampler_mock.assert_not_called()
+
+    def test_trigger_while_sampling(self) -> None:
+        """Only one sampler runs at a time."""
+        self.control.trigger()
+        self.sampler_mock.return_value.is_alive.return_value = True
+        with self.assertLogs("swaystatus", level="WARNING"):
+            self.control.trigger()
+        self.sampler_mock.assert_called_once_with(SAMPLE_DURATION, self.control.samples_path)
+
+    def test_stop(self) -> None:
+        self.control.trigger()
+        self.control.stop()
+        self.sampler_mock.return_value.stop.assert_called_once_with()
+
+    def test_trigger_during_stop(self) -> None:
+        """A request interrupting `stop` on the same thread (e.g. from a signal handler) doesn't deadlock."""
+        self.control.trigger()
+        self.sampler_mock.return_value.stop.side_effect = lambda: self.control.trigger()
+        self.control.stop()
+        self.sampler_mock.assert_called_once_with(SAMPLE_DURATION, self.control.samples_path)
+
+    def test_no_thread_without_polling(self) -> None:
+        self.control.start()
+        self.assertFalse(self.control.is_alive())
+        self.control.trigger()
+        self.sampler_mock.return_value.start.assert_called_once_with()
+
+    def test_polling(self) -> None:
+        control = SamplerControl(self.control_path, self.control.samples_path, poll_interval=0.01)
+        control.start()
+        self.addCleanup(control.stop)
+        self.assertTrue(control.is_alive())
+        self.sampler_mock.return_value.is_alive.return_value = False
+        self.control_path.write_text("")
+        for _ in range(100):
+            if self.sampler_mock.called:
+                break
+            time.sleep(0.01)
+        self.sampler_mock.assert_called_once_with(SAMPLE_DURATION, self.control.samples_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import random
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from swaystatus.scheduler import Scheduler
+
+
+class TestScheduler(TestCase):
+    def assert_timeout(self, scheduler: Scheduler, now: float, expected: float) -> None:
+        timeout = scheduler.timeout(now)
+        assert timeout is not None
+        self.assertAlmostEqual(timeout, expected)
+
+    def test_all_due_initially(self) -> None:
+        intervals = [1.0, None, 5, 60.0]
+        self.assertEqual(Scheduler(intervals).due(0.0), {0, 1, 2, 3})
+
+    def test_unscheduled_due_when_expired(self) -> None:
+        scheduler = Scheduler([None, 10.0])
+        scheduler.due(0.0)
+        for now in [0.0, 1.0, 5.0]:
+            with self.subTest(now=now):
+                self.assertEqual(scheduler.due(now), set())
+        scheduler.expire([0])
+        self.assertEqual(scheduler.due(6.0), {0})
+        self.assertEqual(scheduler.due(7.0), set())
+
+    def test_due_by_deadline(self) -> None:
+        scheduler = Scheduler([1.0, 5.0, 60.0])
+        scheduler.due(0.0)
+        self.assertEqual(scheduler.due(0.5), set())
+        self.assertEqual(scheduler.due(1.0), {0})
+        self.assertEqual(scheduler.due(2.0), {0})
+        self.assertEqual(scheduler.due(5.5), {0, 1})
+        self.assertEqual(scheduler.due(30.0), {0, 1})
+        self.assertEqual(scheduler.due(60.0), {0, 1, 2})
+
+    def test_due_without_drift(self) -> None:
+        """Noticing a deadline late doesn't delay the ones after it."""
+        scheduler = Scheduler([1.0])
+        scheduler.due(0.0)
+        self.assertEqual(scheduler.due(1.3), {0})
+        self.assert_timeout(scheduler, 1.3, 0.7)
+        self.assertEqual(scheduler.due(2.0), {0})
+
+    def test_due_skips_missed(self) -> None:
+        """Deadlines that were missed entirely are not caught up on."""
+        scheduler = Scheduler([1.0])
+        scheduler.due(0.0)
+        self.assertEqual(scheduler.due(5.5), {0})
+        self.assertEqual(scheduler.due(5.9), set())
+        self.assertEqual(scheduler.due(6.0), {0})
+
+    def test_due_aligned(self) -> None:
+        """Aligned deadlines fall on multiples of the interval on the wall clock."""
+        offset = 1000.25  # wall clock time at monotonic time zero
+        with (
+            patch("swaystatus.scheduler.time.time", return_value=offset),
+            patch("swaystatus.scheduler.time.monotonic", return_value=0.0),
+        ):
+            scheduler = Scheduler([60.0, 60.0], align=[True, False])
+            self.assertEqual(scheduler.due(0.0), {0, 1})
+            self.assert_timeout(scheduler, 0.0, 1020.0 - offset)
+            self.assertEqual(scheduler.due(19.75), {0})
+            self.assert_timeout(scheduler, 19.75, 40.25)
+            self.assertEqual(scheduler.due(60.0), {1})
+            self.assertEqual(scheduler.due(79.75), {0})
+
+    def test_expire(self) -> None:
+        intervals = [random.uniform(1.0, 10.0) for _ in range(random.randint(2, 10))]
+        scheduler = Scheduler(intervals)
+        scheduler.due(0.0)
+        self.assertEqual(scheduler.due(0.5), set())
+        scheduler.expire()
+        self.assertEqual(scheduler.due(0.5), set(range(len(intervals))))
+
+    def test_expire_indices(self) -> None:
+        scheduler = Scheduler([1.0, 10.0, None])
+        scheduler.due(0.0)
+        scheduler.expire([1, 2])
+        self.assertEqual(scheduler.due(0.5), {1, 2})
+        self.assertEqual(scheduler.due(1.0), {0})
+
+    def test_timeout(self) -> None:
+        scheduler = Scheduler([3.0, None, 2.0])
+        self.assertEqual(scheduler.timeout(0.0), 0.0)
+        scheduler.due(0.0)
+        self.assertEqual(scheduler.timeout(0.5), 1.5)
+        self.assertEqual(scheduler.timeout(10.0), 0.0)
+
+    def test_timeout_unscheduled(self) -> None:
+        scheduler = Scheduler([None, None])
+        scheduler.due(0.0)
+        self.assertIsNone(scheduler.timeout(0.0))
+
+    def test_timeout_expired(self) -> None:
+        scheduler = Scheduler([None, 10.0])
+        scheduler.due(0.0)
+        scheduler.expire([0])
+        self.assertEqual(scheduler.timeout(1.0), 0.0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import io
+import logging
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from swaystatus.logger import logger
+from swaystatus.startup import Startup, process_uptime
+
+
+class TestStartup(TestCase):
+    def setUp(self) -> None:
+        self.startup = Startup()
+        self.startup.origin = 0.0
+
+    def test_record(self) -> None:
+        self.startup.record("config", 1.0, 1.5)
+        self.assertEqual(self.startup.phases, [("config", 0, 1.0, 0.5)])
+
+    def test_phase_nested(self) -> None:
+        with (
+            patch("swaystatus.startup.time.perf_counter", side_effect=[1.0, 1.25, 1.5, 2.0]),
+            self.startup.phase("import clock"),
+            self.startup.phase("packages"),
+        ):
+            pass
+        self.assertEqual(
+            self.startup.phases,
+            [("packages", 1, 1.25, 0.25), ("import clock", 0, 1.0, 1.0)],
+        )
+
+    def test_phase_exception(self) -> None:
+        with self.assertRaises(ValueError), self.startup.phase("config"):
+            raise ValueError
+        self.assertEqual([p.name for p in self.startup.phases], ["config"])
+        with self.startup.phase("init"):
+            pass
+        self.assertEqual(self.startup.phases[-1].depth, 0)
+
+    def test_finished(self) -> None:
+        with self.assertLogs(logger, logging.DEBUG):
+            self.startup.finish()
+        self.startup.record("config", 1.0, 1.5)
+        with self.startup.phase("init"):
+            pass
+        self.assertEqual(self.startup.phases, [])
+
+    def test_finish_report(self) -> None:
+        self.startup.output = io.StringIO()
+        self.startup.record("interpreter and imports", 0.0, 0.1)
+        self.startup.record("packages", 0.15, 0.2, depth=1)
+        self.startup.record("import clock", 0.1, 0.3)
+        with (
+            patch("swaystatus.startup.time.perf_counter", return_value=0.5),
+            self.assertLogs(logger, logging.DEBUG) as logged,
+        ):
+            self.startup.finish()
+        report = self.startup.output.getvalue()
+        self.assertEqual(
+            report.splitlines(),
+            [
+                "     start       time  phase",
+                "       0.0      100.0  interpreter and imports",
+                "     100.0      200.0  import clock",
+                "     150.0       50.0    packages",
+                "                500.0  total",
+            ],
+        )
+        self.assertEqual([r.message for r in logged.records], [f"startup: {line}" for line in report.splitlines()])
+
+    def test_finish_once(self) -> None:
+        self.startup.output = io.StringIO()
+        with self.assertLogs(logger, logging.DEBUG):
+            self.startup.finish()
+        self.startup.finish()
+        self.assertEqual(self.startup.output.getvalue().count("total"), 1)
+
+    def test_process_uptime(self) -> None:
+        uptime = process_uptime()
+        if uptime is not None:
+            self.assertGreaterEqual(uptime, 0.0)
+        with patch("builtins.open", side_effect=OSError):
+            self.assertIsNone(process_uptime())
+
+
+if __name__ == "__main__":
+    main()
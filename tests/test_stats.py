@@ -0,0 +1,103 @@
+import os
+import random
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from swaystatus.stats import Histogram, Stats, stats_path
+
+
+class TestHistogram(TestCase):
+    def test_empty(self) -> None:
+        histogram = Histogram()
+        self.assertEqual(histogram.count, 0)
+        self.assertEqual(histogram.mean, 0.0)
+        self.assertEqual(histogram.percentile(50), 0.0)
+
+    def test_add(self) -> None:
+        histogram = Histogram()
+        durations = [random.uniform(0.001, 1.0) for _ in range(random.randint(2, 100))]
+        for seconds in durations:
+            histogram.add(seconds)
+        self.assertEqual(histogram.count, len(durations))
+        self.assertEqual(histogram.last, durations[-1])
+        self.assertEqual(histogram.max, max(durations))
+        self.assertAlmostEqual(histogram.mean, sum(durations) / len(durations))
+
+    def test_percentile(self) -> None:
+        histogram = Histogram()
+        for _ in range(99):
+            histogram.add(0.001)
+        histogram.add(0.5)
+        self.assertAlmostEqual(histogram.percentile(50), 0.001, delta=0.00026)
+        self.assertAlmostEqual(histogram.percentile(99), 0.001, delta=0.00026)
+        self.assertEqual(histogram.percentile(100), 0.5)
+
+    def test_percentile_bounded_by_max(self) -> None:
+        histogram = Histogram()
+        histogram.add(0.0011)
+        self.assertEqual(histogram.percentile(50), 0.0011)
+
+    def test_extremes(self) -> None:
+        histogram = Histogram()
+        for seconds in [0.0, 1e-9, 1e6]:
+            histogram.add(seconds)
+        self.assertEqual(histogram.count, 3)
+        self.assertEqual(histogram.percentile(100), 1e6)
+
+
+class TestStats(TestCase):
+    def test_record(self) -> None:
+        stats = Stats()
+        stats.record("blocks", "clock", 0.5)
+        stats.record("blocks", "clock", 1.5)
+        stats.record("click", "clock", 0.25)
+        blocks = stats.histogram("blocks", "clock")
+        assert blocks
+        self.assertEqual(blocks.count, 2)
+        self.assertEqual(blocks.mean, 1.0)
+        click = stats.histogram("click", "clock")
+        assert click
+        self.assertEqual(click.count, 1)
+        self.assertIsNone(stats.histogram("click", "disk"))
+
+    def test_timed(self) -> None:
+        stats = Stats()
+        with patch("swaystatus.stats.time.perf_counter", side_effect=[1.0, 3.5]), stats.timed("blocks", "clock"):
+            pass
+        histogram = stats.histogram("blocks", "clock")
+        assert histogram
+        self.assertEqual(histogram.last, 2.5)
+
+    def test_timed_exception(self) -> None:
+        stats = Stats()
+        with self.assertRaises(ValueError), stats.timed("click", "clock"):
+            raise ValueError
+        self.assertIsNotNone(stats.histogram("click", "clock"))
+
+    def test_report(self) -> None:
+        stats = Stats()
+        stats.record("blocks", "fast", 0.001)
+        stats.record("blocks", "slow", 0.250)
+        stats.record("click", "clock", 0.010)
+        lines = stats.report().splitlines()
+        self.assertEqual(lines[0].split(), ["kind", "count", "last", "mean", "p50", "p99", "max", "name"])
+        self.assertEqual([line.split()[-1] for line in lines[1:]], ["slow", "fast", "clock"])
+        self.assertEqual(lines[1].split()[1:3], ["1", "250.000"])
+
+    def test_dump(self) -> None:
+        stats = Stats()
+        stats.record("blocks", "clock", 0.5)
+        with TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "swaystatus" / "stats"
+            stats.dump(path)
+            self.assertEqual(path.read_text(), stats.report())
+
+    def test_stats_path(self) -> None:
+        with patch.dict("os.environ", {"XDG_RUNTIME_DIR": "/run/user/1000"}):
+            self.assertEqual(stats_path(), Path(f"/run/user/1000/swaystatus/stats.{os.getpid()}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,14 @@
 import random
+import threading
+import time
 from collections.abc import Iterator
 from contextlib import contextmanager
-from threading import Barrier, Event
+from queue import SimpleQueue
+from threading import Barrier, Event, current_thread
 from unittest import TestCase, main
 from unittest.mock import Mock, call, patch
 
-from swaystatus.threads import Ticker
+from swaystatus.threads import Ticker, WorkerPool
 
 
 class TestTicker(TestCase):
@@ -83,5 +86,95 @@ class TestTicker(TestCase):
                 pass
 
 
+class TestTickerMinInterval(TestCase):
+    def start(self, min_interval: float) -> tuple[Ticker, SimpleQueue[float]]:
+        ticks: SimpleQueue[float] = SimpleQueue()
+        ticker = Ticker(lambda: ticks.put(time.monotonic()), min_interval=min_interval)
+        ticker.start()
+        self.addCleanup(ticker.join, timeout=1.0)
+        self.addCleanup(ticker.stop)
+        return ticker, ticks
+
+    def test_burst_merged(self) -> None:
+        """A burst of requests within the minimum interval of a tick results in a single tick."""
+        ticker, ticks = self.start(0.2)
+        ticker.next()
+        first = ticks.get(timeout=1.0)
+        count = random.randint(2, 10)
+        for _ in range(count):
+            ticker.next()
+        self.assertGreaterEqual(ticks.get(timeout=1.0) - first, 0.2)
+        self.assertTrue(ticks.empty())
+        self.assertEqual(ticker.requests_merged, count - 1)
+
+    def test_isolated_request_not_delayed(self) -> None:
+        """A request after the minimum interval has passed since the last tick ticks immediately."""
+        ticker, ticks = self.start(0.2)
+        for _ in range(2):
+            requested = time.monotonic()
+            ticker.next()
+            self.assertLess(ticks.get(timeout=1.0) - requested, 0.1)
+            time.sleep(0.25)
+        self.assertEqual(ticker.requests_merged, 0)
+
+
+class TestWorkerPool(TestCase):
+    def test_submit_result(self) -> None:
+        pool = WorkerPool(2)
+        self.addCleanup(pool.shutdown)
+        futures = [pool.submit(pow, i, 2) for i in range(10)]
+        self.assertEqual([f.result(timeout=1.0) for f in futures], [i**2 for i in range(10)])
+
+    def test_submit_exception(self) -> None:
+        pool = WorkerPool(1)
+        self.addCleanup(pool.shutdown)
+        with self.assertRaises(ZeroDivisionError):
+            pool.submit(lambda: 1 / 0).result(timeout=1.0)
+
+    def test_bounded_threads(self) -> None:
+        size = random.randint(2, 5)
+        pool = WorkerPool(size, name="TestThread")
+        self.addCleanup(pool.shutdown)
+        release = Event()
+
+        def thread_name() -> str:
+            release.wait(timeout=1.0)
+            return current_thread().name
+
+        futures = [pool.submit(thread_name) for _ in range(size * 3)]
+        release.set()
+        names = {f.result(timeout=1.0) for f in futures}
+        self.assertLessEqual(len(names), size)
+        self.assertTrue(all(n.startswith("TestThread.") for n in names))
+
+    def test_shrink(self) -> None:
+        def alive() -> int:
+            return len([t for t in threading.enumerate() if t.name.startswith("ShrinkThread.")])
+
+        size = random.randint(3, 5)
+        pool = WorkerPool(size, name="ShrinkThread")
+        self.addCleanup(pool.shutdown)
+        barrier = Barrier(size, timeout=1.0)
+        for future in [pool.submit(barrier.wait) for _ in range(size)]:
+            future.result(timeout=1.0)
+        self.assertEqual(alive(), size)
+        pool.size = 1
+        deadline = time.monotonic() + 1.0
+        while alive() > 1:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.001)
+        self.assertEqual(pool.submit(pow, 2, 3).result(timeout=1.0), 8)
+        pool.size = 2
+        barrier = Barrier(2, timeout=1.0)
+        for future in [pool.submit(barrier.wait) for _ in range(2)]:
+            future.result(timeout=1.0)
+        self.assertEqual(alive(), 2)
+
+    def test_daemonic(self) -> None:
+        pool = WorkerPool(1)
+        self.addCleanup(pool.shutdown)
+        self.assertTrue(pool.submit(lambda: current_thread().daemon).result(timeout=1.0))
+
+
 if __name__ == "__main__":
     main()
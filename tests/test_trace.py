@@ -0,0 +1,83 @@
+import json
+import threading
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Thread
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from swaystatus.context import context
+from swaystatus.trace import Tracer
+
+
+class TestTracer(TestCase):
+    def test_disabled(self) -> None:
+        tracer = Tracer()
+        self.assertFalse(tracer.enabled)
+        with tracer.span("blocks", "clock"):
+            pass
+        tracer.record("process", "process 1", 0, 1000)
+        self.assertEqual(tracer.events(), [])
+
+    def test_span(self) -> None:
+        tracer = Tracer()
+        tracer.start(Path("trace.json"))
+        with (
+            patch("swaystatus.trace.time.perf_counter_ns", side_effect=[1_000_000, 3_500_000]),
+            context("element 0"),
+            tracer.span("blocks", "clock"),
+        ):
+            pass
+        thread = threading.current_thread()
+        metadata, span = tracer.events()
+        self.assertEqual(metadata["ph"], "M")
+        self.assertEqual(metadata["args"], {"name": thread.name})
+        self.assertEqual(span["name"], "clock")
+        self.assertEqual(span["cat"], "blocks")
+        self.assertEqual(span["ph"], "X")
+        self.assertEqual(span["ts"], 1000.0)
+        self.assertEqual(span["dur"], 2500.0)
+        self.assertEqual(span["tid"], thread.native_id)
+        self.assertEqual(span["args"], {"context": "element 0"})
+
+    def test_record_args(self) -> None:
+        tracer = Tracer()
+        tracer.start(Path("trace.json"))
+        tracer.record("process", "process 1", 0, 1000, args="true")
+        self.assertEqual(tracer.events()[-1]["args"], {"context": None, "args": "true"})
+
+    def test_threads(self) -> None:
+        def work() -> None:
+            with tracer.span("tick", threading.current_thread().name):
+                pass
+
+        tracer = Tracer()
+        tracer.start(Path("trace.json"))
+        threads = [Thread(target=work, name=f"Worker{i}") for i in range(3)]
+        for thread in threads:
+            thread.start()
+            thread.join()
+        events = tracer.events()
+        names = {e["tid"]: e["args"]["name"] for e in events if e["ph"] == "M"}
+        self.assertEqual(sorted(names[e["tid"]] for e in events if e["ph"] == "X"), [t.name for t in threads])
+
+    def test_max_events(self) -> None:
+        tracer = Tracer(max_events=2)
+        tracer.start(Path("trace.json"))
+        for i in range(5):
+            tracer.record("tick", f"tick {i}", i, i + 1)
+        self.assertEqual([e["name"] for e in tracer.events() if e["ph"] == "X"], ["tick 3", "tick 4"])
+
+    def test_dump(self) -> None:
+        tracer = Tracer()
+        with TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "swaystatus" / "trace.json"
+            tracer.start(path)
+            with tracer.span("output", "encode"):
+                pass
+            tracer.dump()
+            self.assertEqual(json.loads(path.read_text())["traceEvents"], tracer.events())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import os
+from io import StringIO
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from swaystatus.writer import PipeWriter, StdoutWriter, stdout_writer
+
+
+class TestStdoutWriter(TestCase):
+    def test_write(self) -> None:
+        """Every line is written to stdout."""
+        stdout = StringIO()
+        writer = StdoutWriter()
+        with patch("sys.stdout", stdout):
+            writer.open()
+            writer.write("header")
+            writer.write("line", droppable=True)
+            writer.close()
+        self.assertEqual(stdout.getvalue(), "header\nline\n")
+        self.assertEqual(writer.lines_written, 2)
+
+
+class TestPipeWriter(TestCase):
+    def setUp(self) -> None:
+        self.read_fd, self.write_fd = os.pipe()
+        self.addCleanup(os.close, self.write_fd)
+        self.reader = os.fdopen(self.read_fd, "rb")
+        self.addCleanup(self.reader.close)
+        self.writer = PipeWriter(self.write_fd, poll_interval=0.01)
+        self.addCleanup(self.writer.close, timeout=1.0)
+
+    def test_write(self) -> None:
+        """Lines are written in order."""
+        self.writer.open()
+        self.writer.write("header")
+        self.writer.write("[[]")
+        self.writer.write(",[1]", droppable=True)
+        self.assertEqual(self.reader.readline(), b"header\n")
+        self.assertEqual(self.reader.readline(), b"[[]\n")
+        self.assertEqual(self.reader.readline(), b",[1]\n")
+        self.writer.close(timeout=1.0)
+        self.assertEqual(self.writer.lines_written, 3)
+        self.assertEqual(self.writer.lines_coalesced, 0)
+
+    def test_write_latest(self) -> None:
+        """A waiting status line is replaced by a newer one, but required lines never are."""
+        self.writer.write("header")
+        for n in range(3):
+            self.writer.write(f",[{n}]", droppable=True)
+        self.writer.write("footer")
+        self.writer.open()
+        self.writer.close(timeout=1.0)
+        self.assertEqual([self.reader.readline() for _ in range(3)], [b"header\n", b"footer\n", b",[2]\n"])
+        self.assertEqual(self.writer.lines_coalesced, 2)
+
+    def test_write_stalled(self) -> None:
+        """Status lines sent while the reader is stalled are coalesced into the latest one."""
+        size = os.fstat(self.write_fd).st_blksize * 1024  # more than the pipe can hold
+        self.writer.open()
+        self.writer.write("x" * size, droppable=True)
+        self.reader.peek(1)  # the writer is now stuck on the first line
+        for n in range(3):
+            self.writer.write(f",[{n}]", droppable=True)
+        self.assertEqual(len(self.reader.readline()), size + 1)
+        self.assertEqual(self.reader.readline(), b",[2]\n")
+        self.assertEqual(self.writer.lines_coalesced, 2)
+
+    def test_broken_pipe(self) -> None:
+        """Lines are dropped once the reader is gone."""
+        self.reader.close()
+        with self.assertLogs("swaystatus", level="ERROR") as logged:
+            self.writer.write("header")
+            self.writer.write("[[]")
+            self.writer.open()
+            self.writer.join(timeout=1.0)
+        self.assertIn("abandoned output", logged.output[0])
+        self.assertEqual(self.writer.lines_dropped, 2)
+
+    def test_close_stalled(self) -> None:
+        """Closing doesn't wait forever for a stalled reader."""
+        size = os.fstat(self.write_fd).st_blksize * 1024
+        with self.assertLogs("swaystatus", level="ERROR"):
+            self.writer.open()
+            self.writer.write("x" * size, droppable=True)
+            self.writer.close(timeout=1.0)
+        self.assertFalse(self.writer.is_alive())
+        self.assertEqual(self.writer.lines_dropped, 1)
+
+
+class TestStdoutWriterFactory(TestCase):
+    def test_stream(self) -> None:
+        """A stream without a file descriptor is written synchronously."""
+        with patch("sys.stdout", StringIO()):
+            self.assertIsInstance(stdout_writer(), StdoutWriter)
+
+    def test_pipe(self) -> None:
+        """A pipe of its own is written without blocking."""
+        read_fd, write_fd = os.pipe()
+        with os.fdopen(read_fd, "rb"), os.fdopen(write_fd, "w") as stdout, patch("sys.stdout", stdout):
+            self.assertIsInstance(stdout_writer(), PipeWriter)
+
+    def test_pipe_shared(self) -> None:
+        """A pipe shared with stderr is written synchronously."""
+        read_fd, write_fd = os.pipe()
+        with (
+            os.fdopen(read_fd, "rb"),
+            os.fdopen(write_fd, "w") as stdout,
+            patch("sys.stdout", stdout),
+            patch("sys.stderr", stdout),
+        ):
+            self.assertIsInstance(stdout_writer(), StdoutWriter)
+
+
+if __name__ == "__main__":
+    main()